@@ -0,0 +1,35 @@
+"""add_balance_checkpoints_table
+
+Revision ID: 380279de0bd6
+Revises: 55e25f902ed2
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '380279de0bd6'
+down_revision: Union[str, Sequence[str], None] = '55e25f902ed2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Os checkpoints são gerados sob demanda (app.crud.balance_checkpoint.ensure)
+    op.create_table(
+        'balance_checkpoints',
+        sa.Column('account_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('accounts.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('month_end', sa.Date(), primary_key=True),
+        sa.Column('balance', sa.Numeric(precision=12, scale=2), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('balance_checkpoints')
@@ -0,0 +1,100 @@
+"""add_account_balances_table
+
+Revision ID: 55e25f902ed2
+Revises: 1de9efc20e1d
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '55e25f902ed2'
+down_revision: Union[str, Sequence[str], None] = '1de9efc20e1d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'account_balances',
+        sa.Column('account_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('accounts.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('ledger_balance', sa.Numeric(precision=12, scale=2), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+
+    # Backfill: saldo contábil completo (inclui lançamentos futuros) de cada conta existente
+    op.execute("""
+    INSERT INTO account_balances (account_id, ledger_balance)
+    SELECT
+        a.id,
+        a.initial_balance + COALESCE(SUM(
+            CASE
+                WHEN t.date >= a.initial_balance_date
+                 AND t.deleted_at IS NULL
+                THEN t.amount
+                ELSE 0
+            END
+        ), 0)
+    FROM accounts a
+    LEFT JOIN transactions t ON a.id = t.account_id
+    GROUP BY a.id, a.initial_balance;
+    """)
+
+    if op.get_context().dialect.name == 'postgresql':
+        # v_account_balances passa a ler o saldo materializado e desconta apenas os
+        # lançamentos futuros. Contas sem linha materializada caem no cálculo completo.
+        op.execute("""
+        CREATE OR REPLACE VIEW v_account_balances AS
+        SELECT a.id, a.type, a.user_id,
+            CASE
+                WHEN ab.account_id IS NULL THEN
+                    a.initial_balance + COALESCE((
+                        SELECT SUM(t.amount)
+                        FROM transactions t
+                        WHERE t.account_id = a.id
+                          AND t.deleted_at IS NULL
+                          AND t.date >= a.initial_balance_date
+                          AND t.date <= (CURRENT_TIMESTAMP AT TIME ZONE 'America/Sao_Paulo')::date
+                    ), 0)
+                ELSE
+                    ab.ledger_balance - COALESCE((
+                        SELECT SUM(t.amount)
+                        FROM transactions t
+                        WHERE t.account_id = a.id
+                          AND t.deleted_at IS NULL
+                          AND t.date >= a.initial_balance_date
+                          AND t.date > (CURRENT_TIMESTAMP AT TIME ZONE 'America/Sao_Paulo')::date
+                    ), 0)
+            END AS current_balance
+        FROM accounts a
+        LEFT JOIN account_balances ab ON ab.account_id = a.id;
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute("""
+        CREATE OR REPLACE VIEW v_account_balances AS
+        SELECT a.id, a.type, a.user_id,
+            (a.initial_balance + COALESCE(sum(
+                CASE
+                    WHEN (t.date >= a.initial_balance_date)
+                    AND (t.date <= (CURRENT_TIMESTAMP AT TIME ZONE 'America/Sao_Paulo')::date)
+                    AND (t.deleted_at IS NULL)
+                    THEN t.amount
+                    ELSE 0
+                END), 0)) AS current_balance
+        FROM accounts a
+        LEFT JOIN transactions t ON a.id = t.account_id
+        GROUP BY a.id, a.type, a.user_id,
+                 a.initial_balance, a.initial_balance_date;
+        """)
+
+    op.drop_table('account_balances')
@@ -0,0 +1,54 @@
+"""unique_balance_history_account_date
+
+Revision ID: 7c2e91d4a6b3
+Revises: 380279de0bd6
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e91d4a6b3'
+down_revision: Union[str, Sequence[str], None] = '380279de0bd6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Mantém uma única linha por (conta, dia) antes de criar a restrição
+    if op.get_context().dialect.name == 'postgresql':
+        op.execute("""
+        DELETE FROM balance_history a
+        USING balance_history b
+        WHERE a.account_id = b.account_id
+          AND a.date = b.date
+          AND a.ctid > b.ctid;
+        """)
+    else:
+        op.execute("""
+        DELETE FROM balance_history
+        WHERE rowid NOT IN (
+            SELECT MIN(rowid) FROM balance_history GROUP BY account_id, date
+        );
+        """)
+
+    # A restrição única já cria o índice (account_id, date); o índice simples fica redundante
+    op.drop_index('ix_balance_history_account_date', table_name='balance_history')
+    with op.batch_alter_table('balance_history', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_balance_history_account_date', ['account_id', 'date'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('balance_history', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_balance_history_account_date', type_='unique')
+    op.create_index(
+        'ix_balance_history_account_date',
+        'balance_history',
+        ['account_id', 'date']
+    )
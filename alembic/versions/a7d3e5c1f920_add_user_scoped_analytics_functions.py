@@ -0,0 +1,228 @@
+"""add_user_scoped_analytics_functions
+
+Revision ID: a7d3e5c1f920
+Revises: f2c9d81e6b04
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e5c1f920'
+down_revision: Union[str, Sequence[str], None] = 'f2c9d81e6b04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Versões por usuário das views analíticas: o filtro de usuário (e de datas) é aplicado
+# ANTES das agregações, em vez de agregar todos os usuários e filtrar depois. Cada função
+# devolve exatamente o tipo de linha da view correspondente (RETURNS SETOF v_*), então
+# as views não podem mudar de colunas sem recriar as funções.
+FUNCTIONS = [
+    ("f_account_balances(uuid)", """
+    CREATE OR REPLACE FUNCTION f_account_balances(p_user_id uuid)
+    RETURNS SETOF v_account_balances
+    LANGUAGE sql STABLE AS $$
+        SELECT a.id, a.type, a.user_id,
+            CASE
+                WHEN ab.account_id IS NULL THEN
+                    a.initial_balance + COALESCE((
+                        SELECT SUM(t.amount)
+                        FROM transactions t
+                        WHERE t.account_id = a.id
+                          AND t.deleted_at IS NULL
+                          AND t.date >= a.initial_balance_date
+                          AND t.date <= (CURRENT_TIMESTAMP AT TIME ZONE 'America/Sao_Paulo')::date
+                    ), 0)
+                ELSE
+                    ab.ledger_balance - COALESCE((
+                        SELECT SUM(t.amount)
+                        FROM transactions t
+                        WHERE t.account_id = a.id
+                          AND t.deleted_at IS NULL
+                          AND t.date >= a.initial_balance_date
+                          AND t.date > (CURRENT_TIMESTAMP AT TIME ZONE 'America/Sao_Paulo')::date
+                    ), 0)
+            END AS current_balance
+        FROM accounts a
+        LEFT JOIN account_balances ab ON ab.account_id = a.id
+        WHERE a.user_id = p_user_id;
+    $$;
+    """),
+    ("f_net_worth(uuid)", """
+    CREATE OR REPLACE FUNCTION f_net_worth(p_user_id uuid)
+    RETURNS SETOF v_net_worth
+    LANGUAGE sql STABLE AS $$
+        SELECT
+            user_id,
+            COALESCE(SUM(current_balance), 0) AS net_worth
+        FROM f_account_balances(p_user_id)
+        GROUP BY user_id;
+    $$;
+    """),
+    ("f_assets_liabilities(uuid)", """
+    CREATE OR REPLACE FUNCTION f_assets_liabilities(p_user_id uuid)
+    RETURNS SETOF v_assets_liabilities
+    LANGUAGE sql STABLE AS $$
+        SELECT
+            user_id,
+            CASE
+                WHEN type IN ('banco','investimento','carteira','poupanca','outros_ativos')
+                    THEN 'asset'
+                WHEN type IN ('cartao_credito','outros_passivos')
+                    THEN 'liability'
+                ELSE 'other'
+            END AS classification,
+            SUM(
+                CASE
+                    WHEN type IN ('banco','investimento','carteira','poupanca','outros_ativos')
+                        THEN current_balance
+                    WHEN type IN ('cartao_credito','outros_passivos')
+                        THEN -current_balance
+                    ELSE 0
+                END
+            ) AS total
+        FROM f_account_balances(p_user_id)
+        GROUP BY user_id, 2;
+    $$;
+    """),
+    ("f_operational_monthly(uuid, date, date)", """
+    CREATE OR REPLACE FUNCTION f_operational_monthly(p_user_id uuid, p_from date DEFAULT NULL, p_to date DEFAULT NULL)
+    RETURNS SETOF v_operational_monthly
+    LANGUAGE sql STABLE AS $$
+        -- Período semiaberto [p_from, p_to); NULL = sem limite
+        SELECT
+            t.user_id,
+            date_trunc('month', t.date) AS month,
+            SUM(CASE WHEN t.nature = 'INCOME' THEN t.amount ELSE 0 END) AS total_income,
+            SUM(CASE WHEN t.nature = 'EXPENSE' THEN -t.amount ELSE 0 END) AS total_expense,
+            SUM(CASE WHEN t.nature IN ('INCOME','EXPENSE') THEN t.amount ELSE 0 END) AS net_result
+        FROM transactions t
+        WHERE t.user_id = p_user_id
+          AND t.deleted_at IS NULL
+          AND (p_from IS NULL OR t.date >= p_from)
+          AND (p_to IS NULL OR t.date < p_to)
+        GROUP BY t.user_id, 2
+        ORDER BY 2;
+    $$;
+    """),
+    ("f_savings_rate(uuid, date, date)", """
+    CREATE OR REPLACE FUNCTION f_savings_rate(p_user_id uuid, p_from date DEFAULT NULL, p_to date DEFAULT NULL)
+    RETURNS SETOF v_savings_rate
+    LANGUAGE sql STABLE AS $$
+        SELECT
+            user_id,
+            month,
+            total_income,
+            total_expense,
+            net_result,
+            CASE
+                WHEN total_income > 0
+                THEN ROUND(net_result / total_income, 4)
+                ELSE 0
+            END AS savings_rate
+        FROM f_operational_monthly(p_user_id, p_from, p_to);
+    $$;
+    """),
+    ("f_goal_progress(uuid)", """
+    CREATE OR REPLACE FUNCTION f_goal_progress(p_user_id uuid)
+    RETURNS SETOF v_goal_progress
+    LANGUAGE sql STABLE AS $$
+        WITH current_nw AS (
+            SELECT user_id, net_worth FROM f_net_worth(p_user_id)
+        )
+        SELECT
+            g.id,
+            g.user_id,
+            g.name,
+            g.target_amount,
+            g.goal_type,
+            g.start_date,
+            g.target_date,
+            nw.net_worth AS current_amount,
+            CASE
+                WHEN CURRENT_DATE < g.start_date THEN 0
+                WHEN g.target_amount > 0 THEN ROUND((nw.net_worth / g.target_amount) * 100, 2)
+                ELSE 0
+            END AS percentage_completed,
+            GREATEST(g.target_amount - nw.net_worth, 0) AS remaining_amount,
+            GREATEST(g.target_date - CURRENT_DATE, 0) AS days_remaining,
+            CASE
+                WHEN CURRENT_DATE < g.start_date THEN TRUE
+                WHEN CURRENT_DATE > g.target_date THEN nw.net_worth >= g.target_amount
+                ELSE
+                    nw.net_worth >= (
+                        g.target_amount * (
+                            (CURRENT_DATE - g.start_date)::float /
+                            NULLIF((g.target_date - g.start_date), 0)::float
+                        )
+                    )
+            END AS on_track
+        FROM financial_goals g
+        JOIN current_nw nw ON g.user_id = nw.user_id
+        WHERE g.user_id = p_user_id
+          AND g.deleted_at IS NULL;
+    $$;
+    """),
+    ("f_financial_forecast(uuid)", """
+    CREATE OR REPLACE FUNCTION f_financial_forecast(p_user_id uuid)
+    RETURNS SETOF v_financial_forecast
+    LANGUAGE sql STABLE AS $$
+        WITH stats AS (
+            SELECT
+                nw.user_id,
+                nw.net_worth AS current_net_worth,
+                COALESCE(AVG(om.net_result), 0) AS avg_monthly_result
+            FROM f_net_worth(p_user_id) nw
+            LEFT JOIN f_operational_monthly(
+                p_user_id,
+                (date_trunc('month', now()) - interval '3 months')::date,
+                date_trunc('month', now())::date
+            ) om ON nw.user_id = om.user_id
+            GROUP BY nw.user_id, nw.net_worth
+        )
+        SELECT
+            user_id,
+            current_net_worth,
+            avg_monthly_result AS avg_monthly_result_last_3m,
+            current_net_worth + (avg_monthly_result * 3) AS projected_3m,
+            current_net_worth + (avg_monthly_result * 6) AS projected_6m,
+            current_net_worth + (avg_monthly_result * 12) AS projected_12m,
+            CASE
+                WHEN avg_monthly_result < 0 THEN
+                    CASE
+                        WHEN current_net_worth <= 0 THEN 0
+                        ELSE ABS(current_net_worth / avg_monthly_result)
+                    END
+                ELSE NULL
+            END AS months_until_zero,
+            CASE
+                WHEN avg_monthly_result < 0 THEN
+                    CASE
+                        WHEN current_net_worth <= 0 THEN CURRENT_DATE
+                        ELSE (date_trunc('day', now()) + (ABS(current_net_worth / avg_monthly_result) * interval '1 month'))::date
+                    END
+                ELSE NULL
+            END AS projected_date_of_zero
+        FROM stats;
+    $$;
+    """),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for _, ddl in FUNCTIONS:
+        op.execute(ddl)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for signature, _ in reversed(FUNCTIONS):
+        op.execute(f"DROP FUNCTION IF EXISTS {signature};")
@@ -0,0 +1,44 @@
+"""add_closed_month_cache
+
+Revision ID: b8e4f1a2c736
+Revises: a7d3e5c1f920
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f1a2c736'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e5c1f920'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'month_versions',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('version', sa.BigInteger(), nullable=False, server_default='0'),
+    )
+    op.create_table(
+        'closed_month_cache',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('endpoint', sa.String(), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('month_version', sa.BigInteger(), nullable=False),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('closed_month_cache')
+    op.drop_table('month_versions')
@@ -0,0 +1,57 @@
+"""add_matview_snapshot_markers
+
+Revision ID: c5f1d9a3e847
+Revises: b8e4f1a2c736
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f1d9a3e847'
+down_revision: Union[str, Sequence[str], None] = 'b8e4f1a2c736'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Sem leitores: operational monthly e burn rate leem monthly_rollups. View normal ->
+# (materializada, chave única), como em f2c9d81e6b04, para recriá-las no downgrade.
+UNUSED_MATVIEWS = {
+    'v_operational_monthly': ('mv_operational_monthly', ['user_id', 'month']),
+    'v_burn_rate': ('mv_burn_rate', ['user_id']),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # users.data_xid: txid da última escrita nos dados do usuário; matview_refreshes.snapshot:
+    # txid_current_snapshot() tirado antes do REFRESH. A materializada tem a última escrita
+    # do usuário quando txid_visible_in_snapshot(data_xid, snapshot).
+    op.add_column('users', sa.Column('data_xid', sa.BigInteger(), nullable=True))
+    op.add_column('matview_refreshes', sa.Column('snapshot', sa.String(), nullable=True))
+
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    matviews = [matview for matview, _ in UNUSED_MATVIEWS.values()]
+    for matview in matviews:
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {matview};")
+    op.execute(f"DELETE FROM matview_refreshes WHERE view_name IN ({', '.join(repr(m) for m in matviews)});")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('matview_refreshes', 'snapshot')
+    op.drop_column('users', 'data_xid')
+
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for view, (matview, key) in UNUSED_MATVIEWS.items():
+        op.execute(f"CREATE MATERIALIZED VIEW {matview} AS SELECT * FROM {view} WITH DATA;")
+        op.execute(f"CREATE UNIQUE INDEX ux_{matview} ON {matview} ({', '.join(key)});")
+        op.execute(f"""
+        INSERT INTO matview_refreshes (view_name, last_refreshed_at)
+        VALUES ('{matview}', now());
+        """)
@@ -0,0 +1,208 @@
+"""inline_operational_monthly_function
+
+Revision ID: d3a8b6f2c915
+Revises: c5f1d9a3e847
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8b6f2c915'
+down_revision: Union[str, Sequence[str], None] = 'c5f1d9a3e847'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Operational monthly e burn rate leem monthly_rollups: f_operational_monthly só era usada
+# por f_savings_rate e f_financial_forecast, que passam a agregar transactions diretamente
+# com os mesmos filtros.
+FUNCTIONS = [
+    ("f_savings_rate(uuid, date, date)", """
+    CREATE OR REPLACE FUNCTION f_savings_rate(p_user_id uuid, p_from date DEFAULT NULL, p_to date DEFAULT NULL)
+    RETURNS SETOF v_savings_rate
+    LANGUAGE sql STABLE AS $$
+        -- Período semiaberto [p_from, p_to); NULL = sem limite
+        SELECT
+            user_id,
+            month,
+            total_income,
+            total_expense,
+            net_result,
+            CASE
+                WHEN total_income > 0
+                THEN ROUND(net_result / total_income, 4)
+                ELSE 0
+            END AS savings_rate
+        FROM (
+            SELECT
+                t.user_id,
+                date_trunc('month', t.date) AS month,
+                SUM(CASE WHEN t.nature = 'INCOME' THEN t.amount ELSE 0 END) AS total_income,
+                SUM(CASE WHEN t.nature = 'EXPENSE' THEN -t.amount ELSE 0 END) AS total_expense,
+                SUM(CASE WHEN t.nature IN ('INCOME','EXPENSE') THEN t.amount ELSE 0 END) AS net_result
+            FROM transactions t
+            WHERE t.user_id = p_user_id
+              AND t.deleted_at IS NULL
+              AND (p_from IS NULL OR t.date >= p_from)
+              AND (p_to IS NULL OR t.date < p_to)
+            GROUP BY t.user_id, 2
+        ) om
+        ORDER BY month;
+    $$;
+    """),
+    ("f_financial_forecast(uuid)", """
+    CREATE OR REPLACE FUNCTION f_financial_forecast(p_user_id uuid)
+    RETURNS SETOF v_financial_forecast
+    LANGUAGE sql STABLE AS $$
+        WITH stats AS (
+            SELECT
+                nw.user_id,
+                nw.net_worth AS current_net_worth,
+                COALESCE(AVG(om.net_result), 0) AS avg_monthly_result
+            FROM f_net_worth(p_user_id) nw
+            LEFT JOIN (
+                SELECT
+                    t.user_id,
+                    SUM(CASE WHEN t.nature IN ('INCOME','EXPENSE') THEN t.amount ELSE 0 END) AS net_result
+                FROM transactions t
+                WHERE t.user_id = p_user_id
+                  AND t.deleted_at IS NULL
+                  AND t.date >= (date_trunc('month', now()) - interval '3 months')::date
+                  AND t.date < date_trunc('month', now())::date
+                GROUP BY t.user_id, date_trunc('month', t.date)
+            ) om ON nw.user_id = om.user_id
+            GROUP BY nw.user_id, nw.net_worth
+        )
+        SELECT
+            user_id,
+            current_net_worth,
+            avg_monthly_result AS avg_monthly_result_last_3m,
+            current_net_worth + (avg_monthly_result * 3) AS projected_3m,
+            current_net_worth + (avg_monthly_result * 6) AS projected_6m,
+            current_net_worth + (avg_monthly_result * 12) AS projected_12m,
+            CASE
+                WHEN avg_monthly_result < 0 THEN
+                    CASE
+                        WHEN current_net_worth <= 0 THEN 0
+                        ELSE ABS(current_net_worth / avg_monthly_result)
+                    END
+                ELSE NULL
+            END AS months_until_zero,
+            CASE
+                WHEN avg_monthly_result < 0 THEN
+                    CASE
+                        WHEN current_net_worth <= 0 THEN CURRENT_DATE
+                        ELSE (date_trunc('day', now()) + (ABS(current_net_worth / avg_monthly_result) * interval '1 month'))::date
+                    END
+                ELSE NULL
+            END AS projected_date_of_zero
+        FROM stats;
+    $$;
+    """),
+]
+
+# Definições de a7d3e5c1f920, recriadas no downgrade: f_operational_monthly antes das
+# duas funções que a chamam
+PREVIOUS_FUNCTIONS = [
+    ("f_operational_monthly(uuid, date, date)", """
+    CREATE OR REPLACE FUNCTION f_operational_monthly(p_user_id uuid, p_from date DEFAULT NULL, p_to date DEFAULT NULL)
+    RETURNS SETOF v_operational_monthly
+    LANGUAGE sql STABLE AS $$
+        -- Período semiaberto [p_from, p_to); NULL = sem limite
+        SELECT
+            t.user_id,
+            date_trunc('month', t.date) AS month,
+            SUM(CASE WHEN t.nature = 'INCOME' THEN t.amount ELSE 0 END) AS total_income,
+            SUM(CASE WHEN t.nature = 'EXPENSE' THEN -t.amount ELSE 0 END) AS total_expense,
+            SUM(CASE WHEN t.nature IN ('INCOME','EXPENSE') THEN t.amount ELSE 0 END) AS net_result
+        FROM transactions t
+        WHERE t.user_id = p_user_id
+          AND t.deleted_at IS NULL
+          AND (p_from IS NULL OR t.date >= p_from)
+          AND (p_to IS NULL OR t.date < p_to)
+        GROUP BY t.user_id, 2
+        ORDER BY 2;
+    $$;
+    """),
+    ("f_savings_rate(uuid, date, date)", """
+    CREATE OR REPLACE FUNCTION f_savings_rate(p_user_id uuid, p_from date DEFAULT NULL, p_to date DEFAULT NULL)
+    RETURNS SETOF v_savings_rate
+    LANGUAGE sql STABLE AS $$
+        SELECT
+            user_id,
+            month,
+            total_income,
+            total_expense,
+            net_result,
+            CASE
+                WHEN total_income > 0
+                THEN ROUND(net_result / total_income, 4)
+                ELSE 0
+            END AS savings_rate
+        FROM f_operational_monthly(p_user_id, p_from, p_to);
+    $$;
+    """),
+    ("f_financial_forecast(uuid)", """
+    CREATE OR REPLACE FUNCTION f_financial_forecast(p_user_id uuid)
+    RETURNS SETOF v_financial_forecast
+    LANGUAGE sql STABLE AS $$
+        WITH stats AS (
+            SELECT
+                nw.user_id,
+                nw.net_worth AS current_net_worth,
+                COALESCE(AVG(om.net_result), 0) AS avg_monthly_result
+            FROM f_net_worth(p_user_id) nw
+            LEFT JOIN f_operational_monthly(
+                p_user_id,
+                (date_trunc('month', now()) - interval '3 months')::date,
+                date_trunc('month', now())::date
+            ) om ON nw.user_id = om.user_id
+            GROUP BY nw.user_id, nw.net_worth
+        )
+        SELECT
+            user_id,
+            current_net_worth,
+            avg_monthly_result AS avg_monthly_result_last_3m,
+            current_net_worth + (avg_monthly_result * 3) AS projected_3m,
+            current_net_worth + (avg_monthly_result * 6) AS projected_6m,
+            current_net_worth + (avg_monthly_result * 12) AS projected_12m,
+            CASE
+                WHEN avg_monthly_result < 0 THEN
+                    CASE
+                        WHEN current_net_worth <= 0 THEN 0
+                        ELSE ABS(current_net_worth / avg_monthly_result)
+                    END
+                ELSE NULL
+            END AS months_until_zero,
+            CASE
+                WHEN avg_monthly_result < 0 THEN
+                    CASE
+                        WHEN current_net_worth <= 0 THEN CURRENT_DATE
+                        ELSE (date_trunc('day', now()) + (ABS(current_net_worth / avg_monthly_result) * interval '1 month'))::date
+                    END
+                ELSE NULL
+            END AS projected_date_of_zero
+        FROM stats;
+    $$;
+    """),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for _, ddl in FUNCTIONS:
+        op.execute(ddl)
+    op.execute("DROP FUNCTION IF EXISTS f_operational_monthly(uuid, date, date);")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name != 'postgresql':
+        return
+    for _, ddl in PREVIOUS_FUNCTIONS:
+        op.execute(ddl)
@@ -0,0 +1,29 @@
+"""add_data_version_to_users
+
+Revision ID: d3f7a2b9c815
+Revises: 7c2e91d4a6b3
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f7a2b9c815'
+down_revision: Union[str, Sequence[str], None] = '7c2e91d4a6b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('data_version', sa.BigInteger(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
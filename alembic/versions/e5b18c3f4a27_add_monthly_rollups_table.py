@@ -0,0 +1,60 @@
+"""add_monthly_rollups_table
+
+Revision ID: e5b18c3f4a27
+Revises: d3f7a2b9c815
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b18c3f4a27'
+down_revision: Union[str, Sequence[str], None] = 'd3f7a2b9c815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'monthly_rollups',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('month', sa.Date(), primary_key=True),
+        sa.Column('nature', postgresql.ENUM('INCOME', 'EXPENSE', 'INVESTMENT', 'TRANSFER', 'SYSTEM_ADJUSTMENT', name='transactionnature', create_type=False), primary_key=True),
+        sa.Column('category_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('account_id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('inflow', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+        sa.Column('outflow', sa.Numeric(precision=14, scale=2), nullable=False, server_default='0'),
+        sa.Column('tx_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    )
+    op.create_index('ix_monthly_rollups_user_nature_month', 'monthly_rollups', ['user_id', 'nature', 'month'])
+
+    # Backfill: agregados de todas as transações não excluídas; categoria/conta ausentes
+    # entram com o UUID máximo (ver app.models.monthly_rollup.UNASSIGNED)
+    op.execute("""
+    INSERT INTO monthly_rollups (user_id, month, nature, category_id, account_id, inflow, outflow, tx_count)
+    SELECT
+        t.user_id,
+        date_trunc('month', t.date)::date,
+        t.nature,
+        COALESCE(t.category_id, 'ffffffff-ffff-ffff-ffff-ffffffffffff'::uuid),
+        COALESCE(t.account_id, 'ffffffff-ffff-ffff-ffff-ffffffffffff'::uuid),
+        SUM(CASE WHEN t.amount > 0 THEN t.amount ELSE 0 END),
+        SUM(CASE WHEN t.amount < 0 THEN t.amount ELSE 0 END),
+        COUNT(*)
+    FROM transactions t
+    WHERE t.deleted_at IS NULL
+    GROUP BY 1, 2, 3, 4, 5;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_monthly_rollups_user_nature_month', table_name='monthly_rollups')
+    op.drop_table('monthly_rollups')
@@ -0,0 +1,61 @@
+"""add_materialized_analytical_views
+
+Revision ID: f2c9d81e6b04
+Revises: e5b18c3f4a27
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c9d81e6b04'
+down_revision: Union[str, Sequence[str], None] = 'e5b18c3f4a27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# View normal -> (materializada, chave única). REFRESH ... CONCURRENTLY exige um índice
+# único em colunas simples cobrindo todas as linhas.
+MATVIEWS = {
+    'v_operational_monthly': ('mv_operational_monthly', ['user_id', 'month']),
+    'v_savings_rate': ('mv_savings_rate', ['user_id', 'month']),
+    'v_burn_rate': ('mv_burn_rate', ['user_id']),
+    'v_account_balances': ('mv_account_balances', ['id']),
+    'v_net_worth': ('mv_net_worth', ['user_id']),
+    'v_assets_liabilities': ('mv_assets_liabilities', ['user_id', 'classification']),
+    'v_goal_progress': ('mv_goal_progress', ['id']),
+    'v_financial_forecast': ('mv_financial_forecast', ['user_id']),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'matview_refreshes',
+        sa.Column('view_name', sa.String(), primary_key=True),
+        sa.Column('last_refreshed_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+    if op.get_context().dialect.name != 'postgresql':
+        return
+
+    for view, (matview, key) in MATVIEWS.items():
+        op.execute(f"CREATE MATERIALIZED VIEW {matview} AS SELECT * FROM {view} WITH DATA;")
+        op.execute(f"CREATE UNIQUE INDEX ux_{matview} ON {matview} ({', '.join(key)});")
+        if 'user_id' not in key:
+            op.execute(f"CREATE INDEX ix_{matview}_user_id ON {matview} (user_id);")
+        op.execute(f"""
+        INSERT INTO matview_refreshes (view_name, last_refreshed_at)
+        VALUES ('{matview}', now());
+        """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_context().dialect.name == 'postgresql':
+        for matview, _ in MATVIEWS.values():
+            op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {matview};")
+    op.drop_table('matview_refreshes')
@@ -9,6 +9,9 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 10080))
     INVITE_CODE: Optional[str] = os.getenv("INVITE_CODE")
+    RESULT_CACHE_SIZE: int = int(os.getenv("RESULT_CACHE_SIZE", 2048))
+    MATVIEW_REFRESH_DEBOUNCE_SECONDS: float = float(os.getenv("MATVIEW_REFRESH_DEBOUNCE_SECONDS", 5))
+    MATVIEW_REFRESH_MAX_DELAY_SECONDS: float = float(os.getenv("MATVIEW_REFRESH_MAX_DELAY_SECONDS", 60))
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -1,15 +1,33 @@
+import logging
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.services.memo import memo_stats
 
 engine = create_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+logger = logging.getLogger(__name__)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
+        memo = memo_stats(db)
+        if memo["hits"] or memo["misses"]:
+            logger.debug(f"Memo da requisição: {memo['hits']} acertos, {memo['misses']} faltas")
         db.close()
+
+def dialect_insert(db, model):
+    """
+    INSERT do dialeto em uso (PostgreSQL em produção, SQLite nos testes), que expõe
+    on_conflict_do_nothing/on_conflict_do_update para upserts em lote.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(model)
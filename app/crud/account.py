@@ -4,8 +4,11 @@ import sqlalchemy as sa
 from sqlalchemy.orm import Session
 from sqlalchemy import select, func, or_, delete
 from app.crud.base import CRUDBase
+from app.crud.ledger import ledger
+from app.crud.balance_checkpoint import balance_checkpoint
+from app.crud.monthly_rollup import monthly_rollup
 from app.models.account import Account
-from app.models.balance_history import BalanceHistory
+from app.models.account_balance import AccountBalance
 from app.models.transaction import Transaction, TransactionNature
 from app.models.recurring_expense import RecurringExpense
 from app.models.category import Category, CategoryType
@@ -30,12 +33,11 @@ class CRUDAccount(CRUDBase[Account, AccountCreate, AccountUpdate]):
             is_default=is_first_account
         )
         db.add(db_obj)
+        db.flush()
+        ledger.refresh(db, [db_obj.id])
         db.commit()
         db.refresh(db_obj)
 
-        balance = self.get_balance(db, db_obj.id)
-        self._record_history(db, db_obj.id, balance)
-
         return db_obj
 
     def update(self, db: Session, *, db_obj: Account, obj_in: AccountUpdate | dict) -> Account:
@@ -46,7 +48,18 @@ class CRUDAccount(CRUDBase[Account, AccountCreate, AccountUpdate]):
 
         current_balance_input = update_data.pop("current_balance", None)
 
-        updated_obj = super().update(db, db_obj=db_obj, obj_in=update_data)
+        for field in update_data:
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, update_data[field])
+        db.add(db_obj)
+
+        # Mudança no saldo/data inicial altera todo o saldo contábil: recalcula na mesma transação
+        if "initial_balance" in update_data or "initial_balance_date" in update_data:
+            ledger.refresh(db, [db_obj.id])
+
+        db.commit()
+        db.refresh(db_obj)
+        updated_obj = db_obj
 
         if current_balance_input is not None:
             actual_balance = self.get_balance(db, db_obj.id)
@@ -82,33 +95,13 @@ class CRUDAccount(CRUDBase[Account, AccountCreate, AccountUpdate]):
                     user_id=db_obj.user_id
                 )
                 db.add(adjustment)
+                db.flush()
+                ledger.apply(db, Transaction.id == adjustment.id)
 
                 db.commit()
 
-        new_balance = self.get_balance(db, db_obj.id)
-        self._record_history(db, db_obj.id, new_balance)
-
         return updated_obj
 
-    def _record_history(self, db: Session, account_id: UUID, balance: Decimal):
-        today = date.today()
-        history = db.scalar(
-            select(BalanceHistory).filter(
-                BalanceHistory.account_id == account_id,
-                BalanceHistory.date == today
-            )
-        )
-        if history:
-            history.balance = balance
-        else:
-            history = BalanceHistory(
-                account_id=account_id,
-                balance=balance,
-                date=today
-            )
-            db.add(history)
-        db.commit()
-
     def get_with_balance(self, db: Session, id: UUID, user_id: UUID) -> Optional[Account]:
         account = self.get_by_user(db, id, user_id)
         if account:
@@ -116,9 +109,12 @@ class CRUDAccount(CRUDBase[Account, AccountCreate, AccountUpdate]):
         return account
 
     def get_multi_with_balance(self, db: Session, *, user_id: UUID, skip: int = 0, limit: int = 100) -> List[Account]:
-        accounts = self.get_multi_by_user(db, user_id=user_id, skip=skip, limit=limit)
-        for account in accounts:
-            account.balance = self.get_balance(db, account.id)
+        from app.services.financial_engine import financial_engine
+        rows = financial_engine.get_accounts_with_balances(db, user_id, skip=skip, limit=limit)
+        accounts = []
+        for account, balance in rows:
+            account.balance = balance
+            accounts.append(account)
         return accounts
 
     def remove_by_user(self, db: Session, *, id: UUID, user_id: UUID) -> Optional[Account]:
@@ -127,7 +123,18 @@ class CRUDAccount(CRUDBase[Account, AccountCreate, AccountUpdate]):
             db.execute(
                 delete(RecurringExpense).where(RecurringExpense.account_id == id)
             )
+            db.execute(
+                delete(AccountBalance).where(AccountBalance.account_id == id)
+            )
+            balance_checkpoint.invalidate_accounts(db, [id])
+            # O ORM zera transactions.account_id: a contribuição dessas transações sai da chave
+            # da conta e volta em monthly_rollups na chave sem conta (UNASSIGNED)
+            orphaned = db.scalars(select(Transaction.id).where(Transaction.account_id == id)).all()
+            monthly_rollup.retract(db, Transaction.account_id == id)
             db.delete(obj)
+            db.flush()
+            if orphaned:
+                monthly_rollup.apply(db, Transaction.id.in_(orphaned))
             db.commit()
         return obj
 
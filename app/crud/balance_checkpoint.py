@@ -0,0 +1,168 @@
+import logging
+from typing import Dict, Iterable
+from uuid import UUID
+from datetime import date, timedelta
+from decimal import Decimal
+from dateutil.relativedelta import relativedelta
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, delete, and_
+from sqlalchemy.exc import SQLAlchemyError
+from app.core.database import dialect_insert
+from app.crud.data_version import data_version
+from app.models.account import Account
+from app.models.balance_checkpoint import BalanceCheckpoint
+from app.models.transaction import Transaction
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+def month_end(d: date) -> date:
+    return (d.replace(day=1) + relativedelta(months=1)) - timedelta(days=1)
+
+class CRUDBalanceCheckpoint:
+    def _lock_accounts(self, db: Session, account_ids: Iterable[UUID], read: bool = False) -> None:
+        """
+        Trava as linhas das contas até o fim da transação (só PostgreSQL; o SQLite já serializa
+        as escritas). invalidate trava para escrita e o insert de ensure para leitura: um
+        ensure que grava enquanto uma escrita retroativa está em andamento espera o commit dela
+        e então vê a nova data_version; um que gravou antes tem os checkpoints removidos pelo
+        DELETE da escrita, que só roda depois do commit do ensure.
+        """
+        db.execute(select(Account.id).where(Account.id.in_(list(account_ids))).with_for_update(read=read))
+
+    def _versions(self, db: Session, account_ids: Iterable[UUID]) -> Dict[UUID, int]:
+        owners = select(Account.user_id).where(Account.id.in_(list(account_ids)))
+        return dict(db.execute(select(User.id, User.data_version).where(User.id.in_(owners))).all())
+
+    def invalidate(self, db: Session, first_dates: Dict[UUID, date]) -> None:
+        """
+        Remove os checkpoints que deixaram de valer: para cada conta, todos com
+        month_end >= data da transação alterada.
+        """
+        if first_dates:
+            self._lock_accounts(db, first_dates)
+        for account_id, first_date in first_dates.items():
+            db.execute(
+                delete(BalanceCheckpoint).where(
+                    BalanceCheckpoint.account_id == account_id,
+                    BalanceCheckpoint.month_end >= first_date
+                )
+            )
+
+    def invalidate_accounts(self, db: Session, account_ids: Iterable[UUID]) -> None:
+        account_ids = [acc_id for acc_id in set(account_ids) if acc_id]
+        if account_ids:
+            self._lock_accounts(db, account_ids)
+            db.execute(delete(BalanceCheckpoint).where(BalanceCheckpoint.account_id.in_(account_ids)))
+
+    def ensure(self, db: Session, account_ids: Iterable[UUID], through: date) -> int:
+        """
+        Gera os checkpoints de fim de mês que faltam até `through` (normalmente o último
+        mês encerrado), continuando do último checkpoint existente de cada conta.
+        São duas leituras e um insert, independente da quantidade de contas e meses.
+        Retorna quantos checkpoints foram criados.
+
+        Chamado no caminho de leitura (balance_as_of): grava numa sessão própria e nunca faz
+        commit na sessão da requisição. Com escritas ainda não confirmadas na sessão, não grava
+        nada (o checkpoint guardaria um saldo que pode ser desfeito). Se a data_version dos
+        donos das contas mudar entre as leituras e o insert (uma escrita confirmada por outra
+        sessão, que pode ter invalidado os checkpoints), também não grava.
+        """
+        account_ids = [acc_id for acc_id in set(account_ids) if acc_id]
+        if not account_ids or data_version.has_pending(db):
+            return 0
+        # Lida ANTES dos saldos: uma escrita confirmada depois disso muda a versão
+        versions = self._versions(db, account_ids)
+
+        latest = (
+            select(
+                BalanceCheckpoint.account_id,
+                func.max(BalanceCheckpoint.month_end).label("month_end")
+            )
+            .where(BalanceCheckpoint.account_id.in_(account_ids))
+            .group_by(BalanceCheckpoint.account_id)
+            .subquery()
+        )
+        accounts = db.execute(
+            select(
+                Account.id,
+                Account.initial_balance,
+                Account.initial_balance_date,
+                latest.c.month_end,
+                BalanceCheckpoint.balance
+            )
+            .outerjoin(latest, latest.c.account_id == Account.id)
+            .outerjoin(
+                BalanceCheckpoint,
+                and_(
+                    BalanceCheckpoint.account_id == latest.c.account_id,
+                    BalanceCheckpoint.month_end == latest.c.month_end
+                )
+            )
+            .where(Account.id.in_(account_ids))
+        ).all()
+
+        # (conta, saldo de partida, transações a partir de, primeiro mês a gerar)
+        pending = []
+        for acc_id, initial_balance, initial_date, last_month_end, last_balance in accounts:
+            if last_month_end is not None:
+                start = last_month_end + timedelta(days=1)
+                base = Decimal(str(last_balance))
+                first = month_end(start)
+            else:
+                start = initial_date
+                base = Decimal(str(initial_balance))
+                first = month_end(initial_date)
+            if first <= through:
+                pending.append((acc_id, base, start, first))
+
+        if not pending:
+            return 0
+
+        # Somatório por dia (apenas dias com movimento) desde o checkpoint mais antigo a estender
+        daily = db.execute(
+            select(Transaction.account_id, Transaction.date, func.sum(Transaction.amount))
+            .join(Account, Account.id == Transaction.account_id)
+            .where(
+                Transaction.account_id.in_([p[0] for p in pending]),
+                Transaction.deleted_at == None,
+                Transaction.date >= Account.initial_balance_date,
+                Transaction.date >= min(p[2] for p in pending),
+                Transaction.date <= through
+            )
+            .group_by(Transaction.account_id, Transaction.date)
+        ).all()
+
+        starts = {p[0]: p[2] for p in pending}
+        monthly: Dict[tuple, Decimal] = {}
+        for acc_id, tx_date, total in daily:
+            # O que vem antes do início da conta já está no saldo de partida
+            if tx_date < starts[acc_id]:
+                continue
+            key = (acc_id, month_end(tx_date))
+            monthly[key] = monthly.get(key, Decimal(0)) + Decimal(str(total))
+
+        rows = []
+        for acc_id, base, _, current in pending:
+            running = base
+            while current <= through:
+                running += monthly.get((acc_id, current), Decimal(0))
+                rows.append({"account_id": acc_id, "month_end": current, "balance": running})
+                current = month_end(current + timedelta(days=1))
+
+        with Session(bind=db.get_bind()) as session:
+            try:
+                self._lock_accounts(session, account_ids, read=True)
+                if self._versions(session, account_ids) != versions:
+                    session.rollback()
+                    return 0
+                session.execute(dialect_insert(session, BalanceCheckpoint).on_conflict_do_nothing(), rows)
+                session.commit()
+            except SQLAlchemyError:
+                # Os checkpoints são só uma otimização: balance_as_of continua correto sem eles
+                session.rollback()
+                logger.exception("Falha ao gravar balance_checkpoints")
+                return 0
+        return len(rows)
+
+balance_checkpoint = CRUDBalanceCheckpoint()
@@ -0,0 +1,63 @@
+from typing import Iterable
+from uuid import UUID
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.models.balance_history import BalanceHistory
+
+DIRTY_ACCOUNTS_KEY = "balance_history_dirty_accounts"
+
+class CRUDBalanceHistory:
+    """
+    Registra o saldo do dia em balance_history para as contas alteradas, uma vez por
+    unidade de trabalho e na MESMA transação da escrita.
+
+    O ledger marca as contas tocadas (mark) em session.info; no before_commit da sessão,
+    todas elas têm o saldo lido em uma query e gravado em um único upsert.
+    """
+
+    def mark(self, db: Session, account_ids: Iterable[UUID]) -> None:
+        db.info.setdefault(DIRTY_ACCOUNTS_KEY, set()).update(acc_id for acc_id in account_ids if acc_id)
+
+    def pending(self, db: Session) -> set:
+        return db.info.get(DIRTY_ACCOUNTS_KEY, set())
+
+    def record(self, db: Session, account_ids: Iterable[UUID]) -> None:
+        from app.services.financial_engine import financial_engine
+
+        account_ids = list(set(account_ids))
+        if not account_ids:
+            return
+
+        today = financial_engine._today()
+        balances = financial_engine.get_balances_for_accounts(db, account_ids, as_of=today)
+        if not balances:
+            return
+
+        stmt = dialect_insert(db, BalanceHistory).values([
+            {"account_id": acc_id, "date": today, "balance": balance}
+            for acc_id, balance in balances.items()
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["account_id", "date"],
+            set_={"balance": stmt.excluded.balance}
+        ))
+
+    def flush_pending(self, db: Session) -> None:
+        account_ids = db.info.pop(DIRTY_ACCOUNTS_KEY, None)
+        if account_ids:
+            db.flush()
+            self.record(db, account_ids)
+
+    def discard_pending(self, db: Session) -> None:
+        db.info.pop(DIRTY_ACCOUNTS_KEY, None)
+
+balance_history = CRUDBalanceHistory()
+
+@event.listens_for(Session, "before_commit")
+def _record_dirty_accounts(session: Session) -> None:
+    balance_history.flush_pending(session)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dirty_accounts(session: Session) -> None:
+    balance_history.discard_pending(session)
@@ -5,9 +5,12 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select, or_, func, text
 from app.crud.base import CRUDBase
 from app.models.category import Category, CategoryType
-from app.models.transaction import Transaction, TransactionNature
+from app.models.transaction import TransactionNature
+from app.models.monthly_rollup import MonthlyRollup
 from app.schemas.category import CategoryCreate, CategoryUpdate
 from decimal import Decimal
+from datetime import datetime
+import pytz
 
 class CRUDCategory(CRUDBase[Category, CategoryCreate, CategoryUpdate]):
     def create_with_user(self, db: Session, *, obj_in: CategoryCreate, user_id: UUID) -> Category:
@@ -46,17 +49,16 @@ class CRUDCategory(CRUDBase[Category, CategoryCreate, CategoryUpdate]):
         ).all()
 
         # Calculate current spending for each category
-        # Filter: nature=EXPENSE, non-deleted, current month in America/Sao_Paulo
+        # Filter: nature=EXPENSE, non-deleted, current month in America/Sao_Paulo (monthly_rollups)
+        current_month = datetime.now(pytz.timezone("America/Sao_Paulo")).date().replace(day=1)
         spending_query = select(
-            Transaction.category_id,
-            func.sum(func.abs(Transaction.amount)).label("total")
+            MonthlyRollup.category_id,
+            func.sum(MonthlyRollup.inflow - MonthlyRollup.outflow).label("total")
         ).filter(
-            Transaction.user_id == user_id,
-            Transaction.nature == TransactionNature.EXPENSE,
-            Transaction.deleted_at == None,
-            func.date_trunc('month', Transaction.date.op('AT TIME ZONE')('America/Sao_Paulo')) ==
-            func.date_trunc('month', func.now().op('AT TIME ZONE')('America/Sao_Paulo'))
-        ).group_by(Transaction.category_id)
+            MonthlyRollup.user_id == user_id,
+            MonthlyRollup.nature == TransactionNature.EXPENSE,
+            MonthlyRollup.month == current_month
+        ).group_by(MonthlyRollup.category_id)
 
         spending_results = db.execute(spending_query).all()
         spending_map = {row.category_id: row.total for row in spending_results}
@@ -0,0 +1,81 @@
+from typing import Iterable, Optional
+from uuid import UUID
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.models.account import Account
+from app.models.transaction import Transaction
+from app.models.recurring_expense import RecurringExpense
+from app.models.category import Category
+from app.models.category_override import CategoryOverride
+from app.models.goal import Goal
+
+PENDING_USERS_KEY = "data_version_pending_users"
+BUMPED_USERS_KEY = "data_version_bumped_users"
+ALL_USERS = "*"
+
+# Escritas nestes modelos mudam o resultado de summary/analytics do dono (user_id)
+TRACKED_MODELS = (Transaction, Account, RecurringExpense, Category, CategoryOverride, Goal)
+
+class CRUDDataVersion:
+    """
+    Versão dos dados de cada usuário (users.data_version), incrementada na MESMA transação
+    de qualquer escrita em transações, contas, recorrências, categorias ou metas.
+
+    Objetos ORM alterados na sessão são detectados sozinhos (before_flush). Escritas em
+    lote (update()/delete() direto na tabela) precisam chamar touch(db, user_id).
+    Categorias do sistema (user_id NULL) são compartilhadas: incrementam todos os usuários.
+    """
+
+    def touch(self, db: Session, user_id: Optional[UUID]) -> None:
+        db.info.setdefault(PENDING_USERS_KEY, set()).add(user_id if user_id else ALL_USERS)
+
+    def touch_many(self, db: Session, user_ids: Iterable[Optional[UUID]]) -> None:
+        for user_id in user_ids:
+            self.touch(db, user_id)
+
+    def has_pending(self, db: Session) -> bool:
+        return bool(db.info.get(PENDING_USERS_KEY)) or bool(db.new or db.dirty or db.deleted)
+
+    def get(self, db: Session, user_id: UUID) -> int:
+        return db.scalar(select(User.data_version).where(User.id == user_id)) or 0
+
+    def bump_pending(self, db: Session) -> None:
+        pending = db.info.pop(PENDING_USERS_KEY, None)
+        if not pending:
+            return
+        # Lido no after_commit por quem reage a escritas confirmadas (app.services.matviews)
+        db.info.setdefault(BUMPED_USERS_KEY, set()).update(pending)
+        values = {"data_version": User.data_version + 1}
+        if db.get_bind().dialect.name == "postgresql":
+            values["data_xid"] = func.txid_current()
+        stmt = update(User).values(**values)
+        if ALL_USERS not in pending:
+            stmt = stmt.where(User.id.in_(pending))
+        db.execute(stmt.execution_options(synchronize_session=False))
+
+    def discard_pending(self, db: Session) -> None:
+        db.info.pop(PENDING_USERS_KEY, None)
+        db.info.pop(BUMPED_USERS_KEY, None)
+
+    def pop_bumped(self, db: Session) -> set:
+        """Usuários incrementados na transação recém-confirmada (ALL_USERS = todos)."""
+        return db.info.pop(BUMPED_USERS_KEY, None) or set()
+
+data_version = CRUDDataVersion()
+
+@event.listens_for(Session, "before_flush")
+def _collect_changed_users(session: Session, flush_context, instances) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, TRACKED_MODELS) and (obj in session.new or obj in session.deleted or session.is_modified(obj)):
+            data_version.touch(session, obj.user_id)
+
+@event.listens_for(Session, "before_commit")
+def _bump_data_versions(session: Session) -> None:
+    # Flush antes para o before_flush ver os objetos ainda pendentes
+    session.flush()
+    data_version.bump_pending(session)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_data_versions(session: Session) -> None:
+    data_version.discard_pending(session)
@@ -0,0 +1,129 @@
+from typing import Iterable, List
+from uuid import UUID
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, update, delete, insert
+from app.models.account import Account
+from app.models.account_balance import AccountBalance
+from app.models.transaction import Transaction
+from app.crud.balance_checkpoint import balance_checkpoint
+from app.crud.balance_history import balance_history
+from app.crud.monthly_rollup import monthly_rollup
+
+class CRUDLedger:
+    """
+    Mantém account_balances (e monthly_rollups) em sincronia com transactions dentro da
+    MESMA transação do banco.
+
+    Todo caminho de escrita envolve a alteração com as mesmas condições:
+        ledger.retract(db, <criteria>)   # antes: remove a contribuição atual das linhas
+        ... altera / exclui ...
+        ledger.apply(db, <criteria>)     # depois: soma a nova contribuição
+    Inserções só precisam de apply; exclusões físicas só de retract.
+    Os checkpoints de fim de mês a partir da data mais antiga afetada são descartados
+    no mesmo passo e regerados sob demanda, e as contas tocadas têm o saldo do dia gravado
+    em balance_history no commit (ver CRUDBalanceHistory).
+    """
+
+    def _contributions(self, db: Session, criteria) -> List:
+        # Mesma regra do saldo: apenas não excluídas e a partir de initial_balance_date
+        db.flush()
+        return db.execute(
+            select(
+                Transaction.account_id,
+                func.sum(Transaction.amount).label("total"),
+                func.min(Transaction.date).label("first_date")
+            )
+            .join(Account, Account.id == Transaction.account_id)
+            .filter(
+                *criteria,
+                Transaction.deleted_at == None,
+                Transaction.date >= Account.initial_balance_date
+            )
+            .group_by(Transaction.account_id)
+        ).all()
+
+    def _shift(self, db: Session, rows: List, sign: int) -> None:
+        balance_checkpoint.invalidate(db, {account_id: first_date for account_id, _, first_date in rows})
+        balance_history.mark(db, [account_id for account_id, _, _ in rows])
+        for account_id, total, _ in rows:
+            if not total:
+                continue
+            # Contas sem linha materializada são lidas pelo cálculo completo; nada a ajustar
+            db.execute(
+                update(AccountBalance)
+                .where(AccountBalance.account_id == account_id)
+                .values(
+                    ledger_balance=AccountBalance.ledger_balance + sign * Decimal(str(total)),
+                    updated_at=func.now()
+                )
+            )
+
+    def apply(self, db: Session, *criteria) -> None:
+        self._shift(db, self._contributions(db, criteria), 1)
+        monthly_rollup.apply(db, *criteria)
+
+    def retract(self, db: Session, *criteria) -> None:
+        self._shift(db, self._contributions(db, criteria), -1)
+        monthly_rollup.retract(db, *criteria)
+
+    def _expected_balance(self):
+        total = (
+            select(func.coalesce(func.sum(Transaction.amount), 0))
+            .where(
+                Transaction.account_id == Account.id,
+                Transaction.deleted_at == None,
+                Transaction.date >= Account.initial_balance_date
+            )
+            .correlate(Account)
+            .scalar_subquery()
+        )
+        return Account.initial_balance + total
+
+    def refresh(self, db: Session, account_ids: Iterable[UUID]) -> None:
+        """
+        Recalcula do zero as linhas das contas informadas (criação de conta, mudança de
+        initial_balance/initial_balance_date, correção da reconciliação).
+        """
+        account_ids = [acc_id for acc_id in set(account_ids) if acc_id]
+        if not account_ids:
+            return
+        db.flush()
+        db.execute(delete(AccountBalance).where(AccountBalance.account_id.in_(account_ids)))
+        balance_checkpoint.invalidate_accounts(db, account_ids)
+        balance_history.mark(db, account_ids)
+        db.execute(
+            insert(AccountBalance).from_select(
+                ["account_id", "ledger_balance"],
+                select(Account.id, self._expected_balance()).where(Account.id.in_(account_ids))
+            )
+        )
+
+    def reconcile(self, db: Session, fix: bool = False) -> List[dict]:
+        """
+        Confere account_balances contra o recálculo completo de todas as contas.
+        Retorna as divergências (linhas ausentes ou com saldo diferente); com fix=True, corrige-as.
+        """
+        expected = self._expected_balance().label("expected")
+        rows = db.execute(
+            select(Account.id, AccountBalance.ledger_balance, expected)
+            .outerjoin(AccountBalance, AccountBalance.account_id == Account.id)
+        ).all()
+
+        mismatches = []
+        for account_id, stored, expected_balance in rows:
+            expected_balance = Decimal(str(expected_balance))
+            if stored is None or Decimal(str(stored)) != expected_balance:
+                mismatches.append({
+                    "account_id": account_id,
+                    "stored": stored,
+                    "expected": expected_balance
+                })
+
+        if fix and mismatches:
+            self.refresh(db, [m["account_id"] for m in mismatches])
+            db.commit()
+
+        return mismatches
+
+ledger = CRUDLedger()
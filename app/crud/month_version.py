@@ -0,0 +1,73 @@
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import event, select, update
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.models.month_version import MonthVersion
+from app.models.category import Category
+from app.models.category_override import CategoryOverride
+
+PENDING_USERS_KEY = "month_version_pending_users"
+ALL_USERS = "*"
+
+class CRUDMonthVersion:
+    """
+    Versão por (usuário, mês) dos dados, base do cache de meses encerrados.
+
+    bump() é chamado pelo monthly_rollup em todo retract/apply, com os meses das transações
+    afetadas (lançamentos retroativos, importações, propagate_changes). Mudanças em categorias
+    alteram nomes/cores de todos os meses: incrementam todos os meses do dono no commit
+    (categorias do sistema, de todos os usuários). Meses sem linha nunca tiveram transação.
+    """
+
+    def bump(self, db: Session, keys: Iterable[Tuple[UUID, date]]) -> None:
+        keys = sorted(set(keys), key=lambda key: (str(key[0]), key[1]))
+        if not keys:
+            return
+        stmt = dialect_insert(db, MonthVersion).values([
+            {"user_id": user_id, "month": month, "version": 1} for user_id, month in keys
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=["user_id", "month"],
+            set_={"version": MonthVersion.version + 1}
+        ))
+
+    def bump_users(self, db: Session, user_ids: Optional[Iterable[UUID]] = None) -> None:
+        """Todos os meses dos usuários informados (None = de todos os usuários)."""
+        stmt = update(MonthVersion).values(version=MonthVersion.version + 1)
+        if user_ids is not None:
+            user_ids = [user_id for user_id in set(user_ids) if user_id]
+            if not user_ids:
+                return
+            stmt = stmt.where(MonthVersion.user_id.in_(user_ids))
+        db.execute(stmt.execution_options(synchronize_session=False))
+
+    def get_many(self, db: Session, user_id: UUID, months: List[date]) -> Dict[date, int]:
+        if not months:
+            return {}
+        versions = {month: 0 for month in months}
+        versions.update(db.execute(
+            select(MonthVersion.month, MonthVersion.version)
+            .where(MonthVersion.user_id == user_id, MonthVersion.month.in_(months))
+        ).all())
+        return versions
+
+month_version = CRUDMonthVersion()
+
+@event.listens_for(Session, "before_flush")
+def _collect_category_changes(session: Session, flush_context, instances) -> None:
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, (Category, CategoryOverride)) and (obj in session.new or obj in session.deleted or session.is_modified(obj)):
+            session.info.setdefault(PENDING_USERS_KEY, set()).add(obj.user_id or ALL_USERS)
+
+@event.listens_for(Session, "before_commit")
+def _bump_category_months(session: Session) -> None:
+    session.flush()
+    pending = session.info.pop(PENDING_USERS_KEY, None)
+    if pending:
+        month_version.bump_users(session, None if ALL_USERS in pending else pending)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_category_changes(session: Session) -> None:
+    session.info.pop(PENDING_USERS_KEY, None)
@@ -0,0 +1,113 @@
+from typing import Iterable, List, Optional
+from uuid import UUID
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from sqlalchemy import select, func, case, delete
+from app.core.database import dialect_insert
+from app.models.monthly_rollup import MonthlyRollup, UNASSIGNED
+from app.models.transaction import Transaction
+from app.services.periods import month_start, as_date
+from app.crud.month_version import month_version
+
+KEY_COLUMNS = ["user_id", "month", "nature", "category_id", "account_id"]
+
+class CRUDMonthlyRollup:
+    """
+    Mantém monthly_rollups em sincronia com transactions dentro da MESMA transação do banco.
+
+    Segue o contrato do ledger (que já chama retract/apply daqui em todo caminho de escrita):
+    retract antes da alteração remove a contribuição atual das linhas afetadas e apply depois
+    soma a nova. Cada passo é um único upsert com os deltas por chave; chaves que ficam sem
+    transações são apagadas. Os meses tocados têm a versão incrementada (month_versions),
+    o que invalida o cache de meses encerrados só desses meses.
+    """
+
+    def _contributions(self, db: Session, criteria) -> List[dict]:
+        db.flush()
+        bucket = month_start(db, Transaction.date)
+        rows = db.execute(
+            select(
+                Transaction.user_id,
+                bucket.label("month"),
+                Transaction.nature,
+                Transaction.category_id,
+                Transaction.account_id,
+                func.sum(case((Transaction.amount > 0, Transaction.amount), else_=0)).label("inflow"),
+                func.sum(case((Transaction.amount < 0, Transaction.amount), else_=0)).label("outflow"),
+                func.count().label("tx_count")
+            )
+            .filter(*criteria, Transaction.deleted_at == None)
+            .group_by(
+                Transaction.user_id,
+                bucket,
+                Transaction.nature,
+                Transaction.category_id,
+                Transaction.account_id
+            )
+        ).all()
+        return [
+            {
+                "user_id": row.user_id,
+                "month": as_date(row.month),
+                "nature": row.nature,
+                "category_id": row.category_id or UNASSIGNED,
+                "account_id": row.account_id or UNASSIGNED,
+                "inflow": Decimal(str(row.inflow or 0)),
+                "outflow": Decimal(str(row.outflow or 0)),
+                "tx_count": row.tx_count
+            }
+            for row in rows
+        ]
+
+    def _shift(self, db: Session, rows: List[dict], sign: int) -> None:
+        if not rows:
+            return
+        month_version.bump(db, [(row["user_id"], row["month"]) for row in rows])
+        stmt = dialect_insert(db, MonthlyRollup).values([
+            {**row, "inflow": sign * row["inflow"], "outflow": sign * row["outflow"], "tx_count": sign * row["tx_count"]}
+            for row in rows
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=KEY_COLUMNS,
+            set_={
+                "inflow": MonthlyRollup.inflow + stmt.excluded.inflow,
+                "outflow": MonthlyRollup.outflow + stmt.excluded.outflow,
+                "tx_count": MonthlyRollup.tx_count + stmt.excluded.tx_count,
+                "updated_at": func.now()
+            }
+        ))
+        if sign < 0:
+            db.execute(
+                delete(MonthlyRollup)
+                .where(
+                    MonthlyRollup.user_id.in_({row["user_id"] for row in rows}),
+                    MonthlyRollup.tx_count <= 0
+                )
+                .execution_options(synchronize_session=False)
+            )
+
+    def apply(self, db: Session, *criteria) -> None:
+        self._shift(db, self._contributions(db, criteria), 1)
+
+    def retract(self, db: Session, *criteria) -> None:
+        self._shift(db, self._contributions(db, criteria), -1)
+
+    def rebuild(self, db: Session, user_ids: Optional[Iterable[UUID]] = None) -> None:
+        """
+        Recalcula do zero os agregados dos usuários informados (ou de todos). Não faz commit.
+        """
+        if user_ids is None:
+            db.flush()
+            month_version.bump_users(db)
+            db.execute(delete(MonthlyRollup))
+            self.apply(db)
+            return
+        user_ids = [user_id for user_id in set(user_ids) if user_id]
+        if not user_ids:
+            return
+        db.flush()
+        month_version.bump_users(db, user_ids)
+        db.execute(delete(MonthlyRollup).where(MonthlyRollup.user_id.in_(user_ids)))
+        self.apply(db, Transaction.user_id.in_(user_ids))
+
+monthly_rollup = CRUDMonthlyRollup()
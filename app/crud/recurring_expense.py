@@ -5,7 +5,7 @@ from decimal import Decimal, ROUND_HALF_UP
 from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import select, delete
 from app.crud.base import CRUDBase
-from app.crud.account import account as crud_account
+from app.crud.ledger import ledger
 from app.models.recurring_expense import RecurringExpense
 from app.models.category import Category, CategoryType
 from app.models.transaction import Transaction
@@ -51,16 +51,8 @@ class CRUDRecurringExpense(CRUDBase[RecurringExpense, RecurringExpenseCreate, Re
     def remove_by_user(self, db: Session, *, id: UUID, user_id: UUID) -> Optional[RecurringExpense]:
         obj = self.get_by_user(db, id, user_id)
         if obj:
-            # Get affected account_ids before deletion
-            affected_account_ids = db.scalars(
-                select(Transaction.account_id)
-                .where(Transaction.recurring_expense_id == id, Transaction.user_id == user_id, Transaction.deleted_at == None)
-            ).all()
-            affected_account_ids = set(affected_account_ids)
-            if obj.account_id:
-                affected_account_ids.add(obj.account_id)
-
             # Delete ALL transactions associated with this recurring expense
+            ledger.retract(db, Transaction.recurring_expense_id == id, Transaction.user_id == user_id)
             db.execute(
                 delete(Transaction).where(Transaction.recurring_expense_id == id, Transaction.user_id == user_id)
             )
@@ -68,32 +60,19 @@ class CRUDRecurringExpense(CRUDBase[RecurringExpense, RecurringExpenseCreate, Re
             db.delete(obj)
             db.commit()
 
-            # Update balance history for all affected accounts
-            for acc_id in affected_account_ids:
-                balance = crud_account.get_balance(db, acc_id)
-                crud_account._record_history(db, acc_id, balance)
-
         return obj
 
     def terminate_by_user(self, db: Session, *, id: UUID, user_id: UUID) -> Optional[RecurringExpense]:
         obj = self.get_by_user(db, id, user_id)
         if obj:
-            # Get affected account_ids before deletion
-            affected_account_ids = db.scalars(
-                select(Transaction.account_id)
-                .where(
-                    Transaction.recurring_expense_id == id,
-                    Transaction.user_id == user_id,
-                    Transaction.date > datetime.date.today(),
-                    Transaction.deleted_at == None
-                )
-            ).all()
-            affected_account_ids = set(affected_account_ids)
-            if obj.account_id:
-                affected_account_ids.add(obj.account_id)
-
             # Delete only FUTURE transactions
             today = datetime.date.today()
+            ledger.retract(
+                db,
+                Transaction.recurring_expense_id == id,
+                Transaction.user_id == user_id,
+                Transaction.date > today
+            )
             db.execute(
                 delete(Transaction).where(
                     Transaction.recurring_expense_id == id,
@@ -106,11 +85,6 @@ class CRUDRecurringExpense(CRUDBase[RecurringExpense, RecurringExpenseCreate, Re
             db.add(obj)
             db.commit()
 
-            # Update balance history for all affected accounts
-            for acc_id in affected_account_ids:
-                balance = crud_account.get_balance(db, acc_id)
-                crud_account._record_history(db, acc_id, balance)
-
             # Re-fetch with joinedload after commit to ensure category is loaded and object is not expired
             obj = db.scalar(
                 select(self.model)
@@ -140,6 +114,10 @@ class CRUDRecurringExpense(CRUDBase[RecurringExpense, RecurringExpenseCreate, Re
             )
         ).all()
 
+        # Saldo materializado: retira a contribuição antiga antes de reescrever as transações
+        transaction_ids = [t.id for t in transactions]
+        ledger.retract(db, Transaction.id.in_(transaction_ids))
+
         import calendar
         for t in transactions:
             # Update fields
@@ -159,18 +137,9 @@ class CRUDRecurringExpense(CRUDBase[RecurringExpense, RecurringExpenseCreate, Re
 
             db.add(t)
 
+        ledger.apply(db, Transaction.id.in_(transaction_ids))
         db.commit()
 
-        # Update balance history for affected account (one or more)
-        affected_account_ids = {t.account_id for t in transactions}
-        if db_obj.account_id:
-            affected_account_ids.add(db_obj.account_id)
-
-        for acc_id in affected_account_ids:
-            if acc_id:
-                balance = crud_account.get_balance(db, acc_id)
-                crud_account._record_history(db, acc_id, balance)
-
         return transactions
 
     def update_by_user(self, db: Session, *, db_obj: RecurringExpense, obj_in: RecurringExpenseUpdate, user_id: UUID) -> RecurringExpense:
@@ -254,17 +223,15 @@ class CRUDRecurringExpense(CRUDBase[RecurringExpense, RecurringExpenseCreate, Re
 
         total_recurring = total_subscriptions + total_installments
 
-        # Calculate average income from last 3 months
-        avg_income = Decimal(0)
-        for i in range(1, 4):
-            # Calculate for previous 3 closed months
-            d = first_day_of_month - datetime.timedelta(days=1) # Last day of previous month
-            # Go back i-1 more months
-            for _ in range(i-1):
-                d = d.replace(day=1) - datetime.timedelta(days=1)
-
-            monthly = financial_engine.get_monthly_totals(db, d.year, d.month, user_id=user_id)
-            avg_income += monthly["income"]
+        # Calculate average income from last 3 months (closed), in one grouped query
+        last_closed_month = first_day_of_month - datetime.timedelta(days=1)
+        three_months_ago = last_closed_month.replace(day=1)
+        for _ in range(2):
+            three_months_ago = (three_months_ago - datetime.timedelta(days=1)).replace(day=1)
+        avg_income = sum(
+            (monthly["income"] for monthly in financial_engine.get_monthly_totals_range(db, user_id, three_months_ago, last_closed_month)),
+            Decimal(0)
+        )
 
         avg_income = avg_income / 3 if avg_income > 0 else Decimal(0)
 
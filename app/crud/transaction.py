@@ -11,20 +11,19 @@ from app.models.recurring_expense import RecurringExpense
 from app.models.account import Account
 from app.models.category import Category, CategoryType
 from app.schemas.transaction import TransactionCreate, TransactionUpdate, UnifiedTransactionResponse
-from app.crud.account import account as crud_account
+from app.crud.ledger import ledger
+from app.crud.data_version import data_version
 
 class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate]):
     def create_with_user(self, db: Session, *, obj_in: TransactionCreate, user_id: UUID) -> Transaction:
         obj_in_data = obj_in.model_dump()
         db_obj = self.model(**obj_in_data, user_id=user_id)
         db.add(db_obj)
+        db.flush()
+        ledger.apply(db, Transaction.id == db_obj.id)
         db.commit()
         db.refresh(db_obj)
 
-        # Update balance history for the affected account
-        balance = crud_account.get_balance(db, db_obj.account_id)
-        crud_account._record_history(db, db_obj.account_id, balance)
-
         return db_obj
 
     def update(
@@ -34,19 +33,21 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         db_obj: Transaction,
         obj_in: TransactionUpdate | dict
     ) -> Transaction:
-        old_account_id = db_obj.account_id
-        updated_obj = super().update(db, db_obj=db_obj, obj_in=obj_in)
-
-        # Update balance history for the current account
-        balance = crud_account.get_balance(db, updated_obj.account_id)
-        crud_account._record_history(db, updated_obj.account_id, balance)
-
-        # If account changed, update the old account too
-        if old_account_id != updated_obj.account_id:
-            old_balance = crud_account.get_balance(db, old_account_id)
-            crud_account._record_history(db, old_account_id, old_balance)
-
-        return updated_obj
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        # Saldo materializado: retira a contribuição antiga e soma a nova na mesma transação
+        ledger.retract(db, Transaction.id == db_obj.id)
+        for field in update_data:
+            if hasattr(db_obj, field):
+                setattr(db_obj, field, update_data[field])
+        db.add(db_obj)
+        ledger.apply(db, Transaction.id == db_obj.id)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
 
     def get_by_user(self, db: Session, id: UUID, user_id: UUID) -> Optional[Transaction]:
         return db.scalars(
@@ -70,19 +71,16 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         obj = self.get_by_user(db, id, user_id)
         if obj:
             now = datetime.now()
-            affected_account_ids = {obj.account_id}
+            # Exclusão em lote (update direto): o before_flush não enxerga
+            data_version.touch(db, user_id)
 
             # If it belongs to a transfer group, delete all related transactions
             if obj.transfer_group_id:
-                # Find all account_ids in the group before deleting
-                group_accounts = db.scalars(
-                    select(Transaction.account_id)
-                    .where(Transaction.transfer_group_id == obj.transfer_group_id)
-                    .where(Transaction.user_id == user_id)
-                    .where(Transaction.deleted_at == None)
-                ).all()
-                affected_account_ids.update(group_accounts)
-
+                ledger.retract(
+                    db,
+                    Transaction.transfer_group_id == obj.transfer_group_id,
+                    Transaction.user_id == user_id
+                )
                 db.execute(
                     update(Transaction)
                     .where(Transaction.transfer_group_id == obj.transfer_group_id)
@@ -91,6 +89,7 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
                     .values(deleted_at=now)
                 )
             else:
+                ledger.retract(db, Transaction.id == id, Transaction.user_id == user_id)
                 db.execute(
                     update(Transaction)
                     .where(Transaction.id == id)
@@ -102,11 +101,6 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
             db.commit()
             db.refresh(obj)
 
-            # Update balance history for all affected accounts
-            for acc_id in affected_account_ids:
-                balance = crud_account.get_balance(db, acc_id)
-                crud_account._record_history(db, acc_id, balance)
-
         return obj
 
     def get_unified(
@@ -1,9 +1,20 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers.api import api_router
 from app.core.config import settings
+from app.core.database import engine, SessionLocal
+from app.services.matviews import matview_refresher
 
-app = FastAPI(title=settings.PROJECT_NAME)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Views materializadas só existem no PostgreSQL
+    if engine.dialect.name == "postgresql":
+        matview_refresher.start(SessionLocal)
+    yield
+    matview_refresher.stop()
+
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -5,4 +5,10 @@ from app.models.transaction import Transaction, TransactionNature
 from app.models.recurring_expense import RecurringExpense, FrequencyType, RecurringType
 from app.models.account import Account, AccountType
 from app.models.balance_history import BalanceHistory
+from app.models.account_balance import AccountBalance
+from app.models.balance_checkpoint import BalanceCheckpoint
+from app.models.monthly_rollup import MonthlyRollup
+from app.models.matview_refresh import MatviewRefresh
+from app.models.month_version import MonthVersion
+from app.models.closed_month_cache import ClosedMonthCache
 from app.models.goal import Goal, GoalType
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Numeric, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class AccountBalance(Base):
+    """
+    Saldo contábil materializado por conta: initial_balance + SUM(amount) de todas as
+    transações não excluídas a partir de initial_balance_date, INCLUINDO as agendadas
+    (datas futuras). O saldo atual é ledger_balance menos as transações posteriores a hoje.
+    Mantido por app.crud.ledger na mesma transação das escritas em transactions.
+    """
+    __tablename__ = "account_balances"
+
+    account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    ledger_balance = Column(Numeric(12, 2), nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
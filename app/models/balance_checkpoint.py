@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Numeric, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class BalanceCheckpoint(Base):
+    """
+    Saldo de fechamento de uma conta no último dia de cada mês encerrado
+    (initial_balance + SUM(amount) de initial_balance_date até month_end, inclusive).
+    Escritas retroativas removem os checkpoints a partir do mês afetado (app.crud.ledger).
+    """
+    __tablename__ = "balance_checkpoints"
+
+    account_id = Column(UUID(as_uuid=True), ForeignKey("accounts.id", ondelete="CASCADE"), primary_key=True)
+    month_end = Column(Date, primary_key=True)
+    balance = Column(Numeric(12, 2), nullable=False)
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, Numeric, Date, ForeignKey
+from sqlalchemy import Column, Numeric, Date, ForeignKey, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -13,3 +13,5 @@ class BalanceHistory(Base):
     date = Column(Date, nullable=False)
 
     account = relationship("Account")
+
+    __table_args__ = (UniqueConstraint('account_id', 'date', name='uq_balance_history_account_date'),)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, Date, DateTime, BigInteger, JSON, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ClosedMonthCache(Base):
+    """
+    Resultado de um endpoint para um mês já encerrado (app.services.closed_months), em JSON.
+    Vale enquanto month_version for igual à versão atual do mês em month_versions.
+    """
+    __tablename__ = "closed_month_cache"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    endpoint = Column(String, primary_key=True)
+    month = Column(Date, primary_key=True)  # primeiro dia do mês
+    month_version = Column(BigInteger, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime
+from app.core.database import Base
+
+class MatviewRefresh(Base):
+    """
+    Última atualização de cada view materializada (mv_*), gravada pelo MatviewRefresher
+    (app.services.matviews) com o horário de INÍCIO do REFRESH e o snapshot de transações
+    (txid_current_snapshot) tirado antes dele: toda transação visível no snapshot está na view.
+    """
+    __tablename__ = "matview_refreshes"
+
+    view_name = Column(String, primary_key=True)
+    last_refreshed_at = Column(DateTime(timezone=True), nullable=False)
+    snapshot = Column(String, nullable=True)
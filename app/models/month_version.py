@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Date, BigInteger, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from app.core.database import Base
+
+class MonthVersion(Base):
+    """
+    Versão dos dados de um mês do usuário, incrementada na MESMA transação de qualquer escrita
+    com data nesse mês (app.crud.month_version, chamado pelo monthly_rollup). Mês sem linha = 0.
+    Valida as entradas de closed_month_cache.
+    """
+    __tablename__ = "month_versions"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # primeiro dia do mês
+    version = Column(BigInteger, nullable=False, default=0)
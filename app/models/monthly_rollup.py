@@ -0,0 +1,33 @@
+import uuid
+from sqlalchemy import Column, Numeric, Date, DateTime, Integer, Enum, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.core.database import Base
+from app.models.transaction import TransactionNature
+
+# Transações sem categoria/conta entram na chave com o UUID máximo (as colunas fazem parte
+# da PK e não aceitam NULL); por isso category_id/account_id não têm FK. O UUID nulo não
+# serve: no SQLite o texto só com dígitos vira o inteiro 0 (afinidade NUMERIC).
+UNASSIGNED = uuid.UUID("ffffffff-ffff-ffff-ffff-ffffffffffff")
+
+class MonthlyRollup(Base):
+    """
+    Agregado mensal das transações não excluídas por (usuário, mês, natureza, categoria, conta).
+    inflow/outflow separam as somas positivas e negativas de amount (inflow + outflow = SUM(amount)).
+    Mantido por app.crud.monthly_rollup na mesma transação das escritas em transactions.
+    """
+    __tablename__ = "monthly_rollups"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    month = Column(Date, primary_key=True)  # primeiro dia do mês
+    nature = Column(Enum(TransactionNature), primary_key=True)
+    category_id = Column(UUID(as_uuid=True), primary_key=True, default=UNASSIGNED)
+    account_id = Column(UUID(as_uuid=True), primary_key=True, default=UNASSIGNED)
+    inflow = Column(Numeric(14, 2), nullable=False, default=0)
+    outflow = Column(Numeric(14, 2), nullable=False, default=0)
+    tx_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_monthly_rollups_user_nature_month', 'user_id', 'nature', 'month'),
+    )
@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, Numeric, Date, DateTime, ForeignKey, Integer, Enum
+from sqlalchemy import Column, String, Numeric, Date, DateTime, ForeignKey, Integer, Enum, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -61,3 +61,9 @@ class Transaction(Base):
     category = relationship("Category")
     recurring_expense = relationship("RecurringExpense", back_populates="transactions")
     account = relationship("Account", back_populates="transactions")
+
+    # Criados na migration 1de9efc20e1d; declarados aqui para o metadata refletir o schema
+    __table_args__ = (
+        Index('ix_transactions_user_date_deleted', 'user_id', 'date', 'deleted_at'),
+        Index('ix_transactions_account_deleted', 'account_id', 'deleted_at'),
+    )
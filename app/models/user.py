@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy import Column, String, DateTime, BigInteger, func
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.database import Base
 
@@ -11,3 +11,7 @@ class User(Base):
     display_name = Column(String)
     hashed_password = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Incrementado a cada escrita nos dados do usuário (ver app.crud.data_version)
+    data_version = Column(BigInteger, nullable=False, default=0, server_default="0")
+    # txid da transação dessa escrita (só PostgreSQL), comparado ao snapshot das materializadas
+    data_xid = Column(BigInteger, nullable=True)
@@ -1,18 +1,26 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.analytics import analytics_service
+from app.services.analytics_bundle import analytics_bundle, BUNDLE_PARTS
+from app.services.projection_engine import MAX_PROJECTION_MONTHS
+from app.services.forecast_simulation import (
+    MIN_SIMULATION_MONTHS, MAX_SIMULATION_MONTHS, MAX_SIMULATION_PATHS, DEFAULT_SEED
+)
 from app.schemas.analytics import (
     OperationalMonthly, SavingsRate, AssetsLiabilities, AccountBalance,
-    BurnRate, NetWorth, DailyExpensesResponse, SankeyResponse,
-    ProjectionResponse, MonthlyCommitment, PeriodSummaryResponse
+    BurnRate, NetWorth, DailyExpensesResponse, DailyExpensesSeries, SankeyResponse,
+    ProjectionResponse, ProjectionScenariosRequest, ProjectionScenariosResponse,
+    MonthlyCommitment, PeriodSummaryResponse, AnalyticsBundle, CategoryMatrix
 )
 from app.schemas.goals import GoalProgress
-from app.schemas.forecast import ForecastRead
+from app.schemas.forecast import ForecastRead, ForecastSimulation
 from app.routers.auth import get_current_user
 from app.models.user import User
-from typing import List
+from app.models.transaction import TransactionNature
+from typing import List, Optional
 from decimal import Decimal
+from datetime import date
 
 router = APIRouter()
 
@@ -32,10 +40,15 @@ def get_savings_rate(
 
 @router.get("/burn-rate", response_model=BurnRate)
 def get_burn_rate(
+    window: int = 3,
+    points: int = 1,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    data = analytics_service.get_burn_rate(db, user_id=current_user.id)
+    try:
+        data = analytics_service.get_burn_rate(db, user_id=current_user.id, window=window, points=points)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return BurnRate(**data)
 
 @router.get("/net-worth", response_model=NetWorth)
@@ -74,6 +87,16 @@ def get_forecast(
 ):
     return analytics_service.get_forecast(db, user_id=current_user.id)
 
+@router.get("/forecast/simulate", response_model=ForecastSimulation)
+def simulate_forecast(
+    months: int = Query(MIN_SIMULATION_MONTHS, ge=MIN_SIMULATION_MONTHS, le=MAX_SIMULATION_MONTHS),
+    paths: int = Query(MAX_SIMULATION_PATHS, ge=100, le=MAX_SIMULATION_PATHS),
+    seed: int = Query(DEFAULT_SEED, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return analytics_service.simulate_forecast(db, user_id=current_user.id, months=months, paths=paths, seed=seed)
+
 @router.get("/daily-expenses", response_model=DailyExpensesResponse)
 def get_daily_expenses(
     year: int,
@@ -83,22 +106,58 @@ def get_daily_expenses(
 ):
     return analytics_service.get_daily_expenses(db, user_id=current_user.id, year=year, month=month)
 
+@router.get("/daily-expenses/overlay", response_model=List[DailyExpensesSeries])
+def get_daily_expenses_overlay(
+    months: List[str] = Query(..., description="Meses no formato YYYY-MM; repita o parâmetro para cada mês"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        parsed = [date.fromisoformat(f"{m}-01") for m in months]
+        return analytics_service.get_daily_expenses_overlay(db, user_id=current_user.id, months=parsed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/sankey", response_model=SankeyResponse)
 def get_sankey_data(
-    year: int,
-    month: int,
+    year: Optional[int] = None,
+    month: Optional[int] = None,
+    start: Optional[str] = Query(None, description="Mês inicial no formato YYYY-MM (com end, no lugar de year/month)"),
+    end: Optional[str] = Query(None, description="Mês final no formato YYYY-MM, inclusive"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return analytics_service.get_sankey_data(db, user_id=current_user.id, year=year, month=month)
+    try:
+        if start is not None and end is not None:
+            return analytics_service.get_sankey_range(
+                db, user_id=current_user.id,
+                start=date.fromisoformat(f"{start}-01"), end=date.fromisoformat(f"{end}-01")
+            )
+        if year is not None and month is not None:
+            return analytics_service.get_sankey_data(db, user_id=current_user.id, year=year, month=month)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    raise HTTPException(status_code=400, detail="Informe year e month ou start e end")
 
 @router.get("/projection", response_model=ProjectionResponse)
 def get_projection(
-    months: int = 6,
+    months: int = Query(6, ge=1, le=MAX_PROJECTION_MONTHS),
+    include_items: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return analytics_service.get_projection(db, user_id=current_user.id, months=months)
+    return analytics_service.get_projection(db, user_id=current_user.id, months=months, include_items=include_items)
+
+@router.post("/projection/scenarios", response_model=ProjectionScenariosResponse)
+def get_projection_scenarios(
+    request: ProjectionScenariosRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        return analytics_service.get_projection_scenarios(db, user_id=current_user.id, request=request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/monthly-commitment", response_model=MonthlyCommitment)
 def get_monthly_commitment(
@@ -124,3 +183,31 @@ def get_period_summary(
         end_year=end_year,
         end_month=end_month
     )
+
+@router.get("/bundle", response_model=AnalyticsBundle)
+def get_bundle(
+    parts: Optional[str] = Query(None, description=f"Partes separadas por vírgula; sem o parâmetro, todas: {','.join(BUNDLE_PARTS)}"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    requested = [part.strip() for part in parts.split(",") if part.strip()] if parts else []
+    try:
+        return analytics_bundle.get_bundle(db, user_id=current_user.id, parts=requested)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/category-matrix", response_model=CategoryMatrix)
+def get_category_matrix(
+    start: str = Query(..., description="Mês inicial no formato YYYY-MM"),
+    end: str = Query(..., description="Mês final no formato YYYY-MM, inclusive"),
+    nature: TransactionNature = TransactionNature.EXPENSE,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    try:
+        return analytics_service.get_category_matrix(
+            db, user_id=current_user.id,
+            start=date.fromisoformat(f"{start}-01"), end=date.fromisoformat(f"{end}-01"), nature=nature
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.services.summary import summary_service
 from app.services.financial_engine import financial_engine
 from app.routers.auth import get_current_user
 from app.models.user import User
+from app.schemas.summary import NetWorthGranularity, NetWorthSeries, YearSummary
 from datetime import date
 from typing import Optional
 
@@ -28,6 +29,16 @@ def get_month_summary(
     """Resumo detalhado de um mês específico"""
     return summary_service.get_monthly_summary(db, year, month, user_id=current_user.id)
 
+@router.get("/year", response_model=YearSummary)
+def get_year_summary(
+    year: int = Query(..., description="Ano"),
+    compare_to: Optional[int] = Query(None, description="Ano para comparação"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Resumo anual com detalhamento mensal e comparação entre anos"""
+    return summary_service.get_year_summary(db, user_id=current_user.id, year=year, compare_to=compare_to)
+
 @router.get("/net-worth")
 def get_net_worth_summary(
     db: Session = Depends(get_db),
@@ -36,6 +47,24 @@ def get_net_worth_summary(
     """Resumo do Patrimônio Líquido"""
     return summary_service.get_net_worth(db, user_id=current_user.id)
 
+@router.get("/net-worth/history", response_model=NetWorthSeries)
+def get_net_worth_history(
+    start: Optional[date] = Query(None, description="Data inicial (padrão: 12 meses atrás)"),
+    end: Optional[date] = Query(None, description="Data final (padrão: hoje)"),
+    granularity: NetWorthGranularity = Query(NetWorthGranularity.month, description="day, week ou month"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Evolução do Patrimônio Líquido em qualquer intervalo"""
+    if start and end and start > end:
+        raise HTTPException(status_code=400, detail="start deve ser anterior a end")
+    try:
+        return summary_service.get_net_worth_history(
+            db, user_id=current_user.id, start=start, end=end, granularity=granularity
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/cash-flow-summary")
 def get_cash_flow_summary(
     months: int = Query(6, description="Quantidade de meses para análise"),
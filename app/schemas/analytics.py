@@ -1,7 +1,12 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from decimal import Decimal
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
+from uuid import UUID
+from app.models.recurring_expense import RecurringType, FrequencyType
+from app.models.transaction import TransactionNature
+from app.schemas.forecast import ForecastRead
+from app.schemas.goals import GoalProgress
 
 class OperationalMonthly(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -18,11 +23,24 @@ class SavingsRate(BaseModel):
     net_result: Decimal
     savings_rate: float
 
+class BurnRatePoint(BaseModel):
+    month: date  # último mês fechado da janela
+    avg_monthly_expense: Decimal
+    previous_avg: Decimal
+    trend: str  # 'UP', 'DOWN', 'STABLE'
+
 class BurnRate(BaseModel):
     model_config = ConfigDict(from_attributes=True)
+    # Sempre 3 meses fechados contra os 3 anteriores
     avg_monthly_expense_last_3m: Decimal
     previous_3m_avg: Decimal
     trend: str  # 'UP', 'DOWN', 'STABLE'
+    # Mesmo cálculo para a janela de window_months meses
+    window_months: int = 3
+    avg_monthly_expense: Optional[Decimal] = None
+    previous_avg: Optional[Decimal] = None
+    window_trend: Optional[str] = None
+    series: List[BurnRatePoint] = []
 
 class NetWorth(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -54,6 +72,11 @@ class DailyExpensesResponse(BaseModel):
     current_month: List[DailyExpenseEntry]
     previous_month: List[DailyExpenseEntry]
 
+class DailyExpensesSeries(BaseModel):
+    year: int
+    month: int
+    days: List[DailyExpenseEntry]
+
 class SankeyNode(BaseModel):
     name: str
     color: Optional[str] = None
@@ -67,6 +90,12 @@ class SankeyResponse(BaseModel):
     nodes: List[SankeyNode]
     links: List[SankeyLink]
 
+class SankeyMonthTotal(BaseModel):
+    category_name: str
+    category_color: Optional[str] = None
+    nature: TransactionNature
+    total: Decimal
+
 class ProjectionItem(BaseModel):
     description: str
     amount: Decimal
@@ -87,6 +116,38 @@ class ProjectionResponse(BaseModel):
     projections: List[MonthlyProjection]
     has_recurring_income: bool
 
+class ScenarioRecurring(BaseModel):
+    description: str
+    amount: Decimal  # total da compra para parcelas; valor mensal/anual para assinaturas
+    type: RecurringType = RecurringType.subscription
+    frequency: Optional[FrequencyType] = FrequencyType.monthly
+    total_installments: Optional[int] = Field(default=None, ge=1)
+    start_date: Optional[date] = None  # padrão: primeiro mês projetado
+    end_date: Optional[date] = None  # parcelas: padrão = start_date + (total_installments - 1) meses
+    is_income: bool = False
+
+class ProjectionScenario(BaseModel):
+    name: str
+    cancel_recurring_ids: List[UUID] = []
+    add_recurring: List[ScenarioRecurring] = []
+    income_delta: Decimal = Decimal(0)  # ajuste mensal na receita média
+    variable_expense_delta: Decimal = Decimal(0)  # ajuste mensal nas despesas variáveis
+
+class ProjectionScenariosRequest(BaseModel):
+    months: int = Field(default=12, ge=1, le=360)
+    scenarios: List[ProjectionScenario]
+
+class ScenarioProjection(BaseModel):
+    name: str
+    projections: List[MonthlyProjection]
+    final_balance: Decimal
+    min_balance: Decimal
+    difference_from_current: Decimal
+
+class ProjectionScenariosResponse(BaseModel):
+    current: ScenarioProjection
+    scenarios: List[ScenarioProjection]
+
 class MonthlyCommitment(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     gasto_ate_hoje: Decimal
@@ -119,7 +180,45 @@ class PeriodCategorySummary(BaseModel):
     previous_total: Decimal
     percentage: float
 
+# Parcial de um mês para o period-summary (guardado no cache de meses encerrados). Só o id da
+# categoria: nome, ícone e cor são lidos a cada resumo
+class PeriodMonthCategory(BaseModel):
+    category_id: Optional[UUID] = None
+    total: Decimal
+
+class PeriodMonthPartial(BaseModel):
+    income: Decimal = Decimal(0)
+    expense: Decimal = Decimal(0)
+    categories: List[PeriodMonthCategory] = []
+
 class PeriodSummaryResponse(BaseModel):
     months: List[PeriodMonthSummary]
     totals: PeriodTotals
     top_categories: List[PeriodCategorySummary]
+
+class CategoryMatrix(BaseModel):
+    """
+    Matriz categoria x mês em colunas: values[i * len(months) + j] é o total da categoria i no
+    mês j (0 quando não houve transação). Valores em float (não Decimal, que vira string no
+    JSON) para manter a resposta compacta.
+    """
+    nature: TransactionNature
+    months: List[str]  # "YYYY-MM"
+    category_ids: List[Optional[UUID]]  # None = sem categoria
+    category_names: List[str]
+    category_colors: List[Optional[str]]
+    values: List[float]
+
+class AnalyticsBundle(BaseModel):
+    # Só as partes pedidas em /analytics/bundle?parts=... vêm preenchidas
+    operational_monthly: Optional[List[OperationalMonthly]] = None
+    savings_rate: Optional[List[SavingsRate]] = None
+    burn_rate: Optional[BurnRate] = None
+    net_worth: Optional[NetWorth] = None
+    assets_liabilities: Optional[List[AssetsLiabilities]] = None
+    account_balances: Optional[List[AccountBalance]] = None
+    forecast: Optional[ForecastRead] = None
+    goals_progress: Optional[List[GoalProgress]] = None
+    monthly_commitment: Optional[MonthlyCommitment] = None
+    # Parte pedida que falhou -> mensagem (a parte fica nula)
+    errors: Dict[str, str] = {}
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import date
 from decimal import Decimal
 
@@ -14,3 +14,21 @@ class ForecastRead(BaseModel):
 
     class Config:
         from_attributes = True
+
+class ForecastSimulationPoint(BaseModel):
+    month: date
+    p5: Decimal
+    p25: Decimal
+    p50: Decimal
+    p75: Decimal
+    p95: Decimal
+    probability_negative: float  # fração dos caminhos com saldo < 0 no fim do mês
+
+class ForecastSimulation(BaseModel):
+    months: int
+    paths: int
+    seed: int
+    history_months: int  # meses fechados usados como amostra
+    start_balance: Decimal
+    probability_negative: float  # fração dos caminhos que ficam negativos em algum mês
+    points: List[ForecastSimulationPoint]
@@ -1,7 +1,8 @@
 from pydantic import BaseModel
 from decimal import Decimal
-from typing import Dict, List
+from typing import Dict, List, Optional
 import datetime
+import enum
 
 class CashFlowDay(BaseModel):
     date: datetime.date
@@ -45,10 +46,44 @@ class YearlySummary(BaseModel):
     total_invested: Decimal
     balance: Decimal
 
+class YearMonthSummary(YearlySummary):
+    month: int
+
+class YearCategoryComparison(BaseModel):
+    category_name: str
+    total: Decimal
+    compare_total: Optional[Decimal] = None
+    delta: Optional[Decimal] = None
+    delta_percentage: Optional[float] = None
+
+class YearSummary(BaseModel):
+    year: int
+    totals: YearlySummary
+    months: List[YearMonthSummary]
+    compare_to: Optional[int] = None
+    compare_totals: Optional[YearlySummary] = None
+    compare_months: Optional[List[YearMonthSummary]] = None
+    categories: List[YearCategoryComparison] = []
+
 class NetWorthHistory(BaseModel):
     month: str
     value: Decimal
 
+class NetWorthGranularity(str, enum.Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+class NetWorthPoint(BaseModel):
+    date: datetime.date
+    value: Decimal
+
+class NetWorthSeries(BaseModel):
+    start: datetime.date
+    end: datetime.date
+    granularity: NetWorthGranularity
+    points: List[NetWorthPoint] = []
+
 class NetWorthData(BaseModel):
     total_accounts: Decimal
     total_investments: Decimal
@@ -1,23 +1,34 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import text, func, select
+from sqlalchemy import text, func, select, case, or_
 from app.models.recurring_expense import RecurringExpense, RecurringType, FrequencyType
+from app.models.monthly_rollup import MonthlyRollup, UNASSIGNED
+from app.models.transaction import Transaction, TransactionNature
+from app.models.category import Category
 from app.schemas.analytics import (
-    OperationalMonthly, SavingsRate, BurnRate,
-    NetWorth, AssetsLiabilities, AccountBalance,
-    DailyExpensesResponse, SankeyResponse, SankeyNode, SankeyLink,
-    ProjectionResponse, MonthlyProjection, ProjectionItem,
+    OperationalMonthly, SavingsRate, AssetsLiabilities, AccountBalance,
+    DailyExpenseEntry, SankeyResponse, SankeyNode, SankeyLink, SankeyMonthTotal,
+    ProjectionResponse,
+    ProjectionScenariosRequest, ProjectionScenariosResponse,
     MonthlyCommitment, PeriodSummaryResponse, PeriodMonthSummary,
-    PeriodTotals, PeriodCategorySummary
+    PeriodTotals, PeriodCategorySummary, PeriodMonthPartial, PeriodMonthCategory,
+    CategoryMatrix
 )
 from app.schemas.goals import GoalProgress
-from app.schemas.forecast import ForecastRead
-from typing import List
+from app.schemas.forecast import ForecastRead, ForecastSimulation
+from typing import Dict, List, Optional
 from decimal import Decimal
 from uuid import UUID
 from datetime import date, timedelta, datetime
 from dateutil.relativedelta import relativedelta
 import calendar
 import pytz
+from app.services.result_cache import cached_result
+from app.services.closed_months import closed_month_results
+from app.services.projection_engine import projection_engine
+from app.services.forecast_simulation import forecast_simulator
+from app.services.memo import request_memo
+from app.services.matviews import last_refreshed, source_for
+from app.services.periods import in_month, as_date, months_between
 
 class AnalyticsService:
     PORTUGUESE_MONTHS = {
@@ -25,10 +36,34 @@ class AnalyticsService:
         5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto",
         9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
     }
+
+    @request_memo
+    def _refreshed_matviews(self, db: Session, user_id: UUID) -> dict:
+        if db.get_bind().dialect.name != "postgresql":
+            return {}
+        return last_refreshed(db, user_id)
+
+    def _source(self, db: Session, view: str, user_id: UUID) -> str:
+        """View materializada quando em dia para o usuário, senão a função por usuário (app.services.matviews)."""
+        return source_for(db, view, user_id, self._refreshed_matviews(db, user_id))
+
+    @cached_result("analytics.operational_monthly")
     def get_operational_monthly(self, db: Session, user_id: UUID) -> List[OperationalMonthly]:
+        # Mesmas regras de v_operational_monthly, lidas de monthly_rollups
+        net = MonthlyRollup.inflow + MonthlyRollup.outflow
         result = db.execute(
-            text("SELECT * FROM v_operational_monthly WHERE user_id = :user_id ORDER BY month ASC"),
-            {"user_id": str(user_id)}
+            select(
+                MonthlyRollup.month,
+                func.sum(case((MonthlyRollup.nature == TransactionNature.INCOME, net), else_=0)).label("total_income"),
+                func.sum(case((MonthlyRollup.nature == TransactionNature.EXPENSE, -net), else_=0)).label("total_expense"),
+                func.sum(case(
+                    (MonthlyRollup.nature.in_([TransactionNature.INCOME, TransactionNature.EXPENSE]), net),
+                    else_=0
+                )).label("net_result")
+            )
+            .filter(MonthlyRollup.user_id == user_id)
+            .group_by(MonthlyRollup.month)
+            .order_by(MonthlyRollup.month.asc())
         ).all()
         return [
             OperationalMonthly.model_validate({
@@ -40,10 +75,11 @@ class AnalyticsService:
             for row in result
         ]
 
+    @cached_result("analytics.savings_rate")
     def get_savings_rate(self, db: Session, user_id: UUID) -> List[SavingsRate]:
         result = db.execute(
-            text("SELECT * FROM v_savings_rate WHERE user_id = :user_id"),
-            {"user_id": str(user_id)}
+            text(f"SELECT * FROM {self._source(db, 'v_savings_rate', user_id)} WHERE user_id = :user_id"),
+            {"user_id": str(user_id), "from_date": None, "to_date": None}
         ).all()
         return [
             SavingsRate.model_validate({
@@ -56,74 +92,146 @@ class AnalyticsService:
             for row in result
         ]
 
-    def get_burn_rate(self, db: Session, user_id: UUID) -> dict:
-        # Get last 3 months (excluding current) - Versão PostgreSQL apenas
-        last_3m = db.execute(text("""
-            SELECT COALESCE(AVG(total_expense), 0)
-            FROM v_operational_monthly
-            WHERE user_id = :user_id
-              AND month >= date_trunc('month', now()) - interval '3 months'
-              AND month < date_trunc('month', now())
-        """), {"user_id": str(user_id)}).scalar()
-
-        # Get previous 3 months (months -6 to -4)
-        prev_3m = db.execute(text("""
-            SELECT COALESCE(AVG(total_expense), 0)
-            FROM v_operational_monthly
-            WHERE user_id = :user_id
-              AND month >= date_trunc('month', now()) - interval '6 months'
-              AND month < date_trunc('month', now()) - interval '3 months'
-        """), {"user_id": str(user_id)}).scalar()
-
-        avg_last = Decimal(last_3m or 0)
-        avg_prev = Decimal(prev_3m or 0)
+    BURN_RATE_WINDOWS = (3, 6, 12)
+    MAX_BURN_RATE_POINTS = 36
 
+    @staticmethod
+    def _burn_rate_trend(avg_last: Decimal, avg_prev: Decimal) -> str:
         if avg_prev == 0:
-            trend = "STABLE"
-        elif avg_last > avg_prev * Decimal('1.05'):
-            trend = "UP"
-        elif avg_last < avg_prev * Decimal('0.95'):
-            trend = "DOWN"
-        else:
-            trend = "STABLE"
+            return "STABLE"
+        if avg_last > avg_prev * Decimal('1.05'):
+            return "UP"
+        if avg_last < avg_prev * Decimal('0.95'):
+            return "DOWN"
+        return "STABLE"
+
+    @cached_result("analytics.burn_rate")
+    def get_burn_rate(self, db: Session, user_id: UUID, window: int = 3, points: int = 1) -> dict:
+        """
+        Média mensal de despesas nos `window` meses fechados (3, 6 ou 12) comparada à janela
+        anterior (avg_monthly_expense, previous_avg, window_trend), mais a série móvel com
+        `points` pontos (um por mês fechado, do mais antigo ao atual). Os campos antigos
+        (avg_monthly_expense_last_3m, previous_3m_avg, trend) são sempre de 3 meses. Como em
+        v_operational_monthly, só entram na média os meses com transações.
+
+        Um único SELECT sobre monthly_rollups: cada média é um AVG(...) FILTER (WHERE mês na janela).
+        """
+        if window not in self.BURN_RATE_WINDOWS:
+            raise ValueError(f"window deve ser um de {self.BURN_RATE_WINDOWS}")
+        points = max(1, min(points, self.MAX_BURN_RATE_POINTS))
+
+        current_month = datetime.now(pytz.timezone("America/Sao_Paulo")).date().replace(day=1)
+        # Fim (exclusivo) da janela de cada ponto, do mais antigo ao mês atual
+        ends = [current_month - relativedelta(months=offset) for offset in range(points - 1, -1, -1)]
+        first_needed = min(ends[0] - relativedelta(months=2 * window), current_month - relativedelta(months=6))
+
+        net = MonthlyRollup.inflow + MonthlyRollup.outflow
+        monthly = (
+            select(
+                MonthlyRollup.month.label("month"),
+                func.sum(case((MonthlyRollup.nature == TransactionNature.EXPENSE, -net), else_=0)).label("total_expense")
+            )
+            .filter(
+                MonthlyRollup.user_id == user_id,
+                MonthlyRollup.month >= first_needed,
+                MonthlyRollup.month < current_month
+            )
+            .group_by(MonthlyRollup.month)
+            .subquery()
+        )
+
+        columns = []
+        for i, end in enumerate(ends):
+            start = end - relativedelta(months=window)
+            columns.append(func.avg(monthly.c.total_expense).filter(
+                monthly.c.month >= start, monthly.c.month < end
+            ).label(f"last_{i}"))
+            columns.append(func.avg(monthly.c.total_expense).filter(
+                monthly.c.month >= start - relativedelta(months=window), monthly.c.month < start
+            ).label(f"prev_{i}"))
+        if window != 3:
+            # Campos antigos: sempre os 3 meses fechados contra os 3 anteriores
+            for label, start, end in (
+                ("last_3m", current_month - relativedelta(months=3), current_month),
+                ("prev_3m", current_month - relativedelta(months=6), current_month - relativedelta(months=3)),
+            ):
+                columns.append(func.avg(monthly.c.total_expense).filter(
+                    monthly.c.month >= start, monthly.c.month < end
+                ).label(label))
+        row = db.execute(select(*columns)).one()
+
+        series = []
+        for i, end in enumerate(ends):
+            avg_last = Decimal(str(getattr(row, f"last_{i}") or 0))
+            avg_prev = Decimal(str(getattr(row, f"prev_{i}") or 0))
+            series.append({
+                "month": end - relativedelta(months=1),
+                "avg_monthly_expense": avg_last,
+                "previous_avg": avg_prev,
+                "trend": self._burn_rate_trend(avg_last, avg_prev)
+            })
 
+        latest = series[-1]
+        if window == 3:
+            avg_last_3m, avg_prev_3m = latest["avg_monthly_expense"], latest["previous_avg"]
+        else:
+            avg_last_3m = Decimal(str(row.last_3m or 0))
+            avg_prev_3m = Decimal(str(row.prev_3m or 0))
         return {
-            "avg_monthly_expense_last_3m": avg_last,
-            "previous_3m_avg": avg_prev,
-            "trend": trend
+            "avg_monthly_expense_last_3m": avg_last_3m,
+            "previous_3m_avg": avg_prev_3m,
+            "trend": self._burn_rate_trend(avg_last_3m, avg_prev_3m),
+            "window_months": window,
+            "avg_monthly_expense": latest["avg_monthly_expense"],
+            "previous_avg": latest["previous_avg"],
+            "window_trend": latest["trend"],
+            "series": series
         }
 
+    @cached_result("analytics.net_worth")
     def get_net_worth(self, db: Session, user_id: UUID) -> Decimal:
         result = db.execute(
-            text("SELECT net_worth FROM v_net_worth WHERE user_id = :user_id"),
+            text(f"SELECT net_worth FROM {self._source(db, 'v_net_worth', user_id)} WHERE user_id = :user_id"),
             {"user_id": str(user_id)}
         ).scalar()
         return Decimal(result or 0)
 
+    @cached_result("analytics.assets_liabilities")
     def get_assets_liabilities(self, db: Session, user_id: UUID) -> List[AssetsLiabilities]:
         result = db.execute(
-            text("SELECT * FROM v_assets_liabilities WHERE user_id = :user_id"),
+            text(f"SELECT * FROM {self._source(db, 'v_assets_liabilities', user_id)} WHERE user_id = :user_id"),
             {"user_id": str(user_id)}
         ).all()
         return [AssetsLiabilities.model_validate(row) for row in result]
 
+    @cached_result("analytics.account_balances")
     def get_account_balances(self, db: Session, user_id: UUID) -> List[AccountBalance]:
         result = db.execute(
-            text("SELECT id, type, current_balance FROM v_account_balances WHERE user_id = :user_id"),
+            text(f"SELECT id, type, current_balance FROM {self._source(db, 'v_account_balances', user_id)} WHERE user_id = :user_id"),
             {"user_id": str(user_id)}
         ).all()
         return [AccountBalance.model_validate(row) for row in result]
 
+    @cached_result("analytics.goals_progress")
     def get_goals_progress(self, db: Session, user_id: UUID) -> List[GoalProgress]:
         result = db.execute(
-            text("SELECT * FROM v_goal_progress WHERE user_id = :user_id ORDER BY target_date ASC"),
+            text(f"SELECT * FROM {self._source(db, 'v_goal_progress', user_id)} WHERE user_id = :user_id ORDER BY target_date ASC"),
             {"user_id": str(user_id)}
-        ).all()
-        return [GoalProgress.model_validate(row) for row in result]
-
+        ).mappings().all()
+        progress = []
+        for row in result:
+            row = dict(row)
+            # Meta de duração zero no próprio dia: o NULLIF da view deixa on_track nulo. O
+            # prazo já chegou, então vale a mesma regra de depois do target_date.
+            if row["on_track"] is None:
+                row["on_track"] = row["current_amount"] >= row["target_amount"]
+            progress.append(GoalProgress.model_validate(row))
+        return progress
+
+    @cached_result("analytics.forecast")
     def get_forecast(self, db: Session, user_id: UUID) -> ForecastRead:
         result = db.execute(
-            text("SELECT * FROM v_financial_forecast WHERE user_id = :user_id"),
+            text(f"SELECT * FROM {self._source(db, 'v_financial_forecast', user_id)} WHERE user_id = :user_id"),
             {"user_id": str(user_id)}
         ).first()
         if not result:
@@ -136,28 +244,71 @@ class AnalyticsService:
             )
         return ForecastRead.model_validate(result)
 
+    MAX_SANKEY_MONTHS = 60
+
+    def _sankey_month_partials(self, db: Session, user_id: UUID, months: List[date]) -> Dict[date, List[SankeyMonthTotal]]:
+        """Totais por categoria e natureza de cada mês, numa única consulta sobre monthly_rollups."""
+        # SUM(ABS(amount)) = inflow - outflow (outflow guarda a soma dos negativos)
+        category_name = func.coalesce(Category.name, 'Sem Categoria')
+        partials = {month: [] for month in months}
+        for row in db.execute(
+            select(
+                MonthlyRollup.month,
+                category_name.label("category_name"),
+                Category.color.label("category_color"),
+                MonthlyRollup.nature,
+                func.sum(MonthlyRollup.inflow - MonthlyRollup.outflow).label("total")
+            )
+            .outerjoin(Category, Category.id == MonthlyRollup.category_id)
+            .filter(
+                MonthlyRollup.user_id == user_id,
+                MonthlyRollup.month.in_(months),
+                MonthlyRollup.nature.in_([
+                    TransactionNature.INCOME,
+                    TransactionNature.EXPENSE,
+                    TransactionNature.INVESTMENT
+                ])
+            )
+            .group_by(MonthlyRollup.month, Category.name, Category.color, MonthlyRollup.nature)
+        ):
+            partials[as_date(row.month)].append(SankeyMonthTotal(
+                category_name=row.category_name,
+                category_color=row.category_color,
+                nature=row.nature,
+                total=Decimal(str(row.total))
+            ))
+        return partials
+
     def get_sankey_data(self, db: Session, user_id: UUID, year: int, month: int) -> SankeyResponse:
-        query = text("""
-            SELECT
-                COALESCE(c.name, 'Sem Categoria') as category_name,
-                c.color as category_color,
-                t.nature,
-                SUM(ABS(t.amount)) as total
-            FROM transactions t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.user_id = :user_id
-              AND t.deleted_at IS NULL
-              AND EXTRACT(YEAR FROM t.date) = :year
-              AND EXTRACT(MONTH FROM t.date) = :month
-              AND t.nature IN ('INCOME', 'EXPENSE', 'INVESTMENT')
-            GROUP BY c.name, c.color, t.nature
-        """)
-
-        results = db.execute(query, {
-            "user_id": str(user_id),
-            "year": year,
-            "month": month
-        }).all()
+        month_start = date(year, month, 1)
+        return self.get_sankey_range(db, user_id=user_id, start=month_start, end=month_start)
+
+    @cached_result("analytics.sankey_range")
+    def get_sankey_range(self, db: Session, user_id: UUID, start: date, end: date) -> SankeyResponse:
+        """
+        Sankey de start a end (meses inclusive), somando os parciais mensais: meses encerrados
+        vêm do closed_month_results e os demais de uma única consulta.
+        """
+        months = months_between(start, end)
+        if not months:
+            raise ValueError("O mês inicial deve ser anterior ou igual ao final")
+        if len(months) > self.MAX_SANKEY_MONTHS:
+            raise ValueError(f"No máximo {self.MAX_SANKEY_MONTHS} meses por consulta")
+
+        partials = closed_month_results.get_many(
+            db, user_id, "analytics.sankey_month", months,
+            lambda missing: self._sankey_month_partials(db, user_id, missing),
+            List[SankeyMonthTotal]
+        )
+        merged = {}
+        for month in months:
+            for row in partials[month]:
+                key = (row.category_name, row.category_color, row.nature)
+                merged[key] = merged.get(key, Decimal(0)) + row.total
+        results = [
+            SankeyMonthTotal(category_name=name, category_color=color, nature=nature, total=total)
+            for (name, color, nature), total in merged.items()
+        ]
 
         nodes = []
         links = []
@@ -183,10 +334,10 @@ class AnalyticsService:
         outflow_cats = []
 
         for row in results:
-            if row.nature == 'INCOME':
+            if row.nature == TransactionNature.INCOME:
                 total_income += row.total
                 income_cats.append((row.category_name, row.category_color, row.total))
-            elif row.nature in ('EXPENSE', 'INVESTMENT'):
+            elif row.nature in (TransactionNature.EXPENSE, TransactionNature.INVESTMENT):
                 total_outflow += row.total
                 outflow_cats.append((row.category_name, row.category_color, row.total))
 
@@ -212,132 +363,21 @@ class AnalyticsService:
 
         return SankeyResponse(nodes=nodes, links=links)
 
-    def get_projection(self, db: Session, user_id: UUID, months: int) -> ProjectionResponse:
-        from app.services.financial_engine import financial_engine
-        from app.models.category import Category, CategoryType
-        from dateutil.relativedelta import relativedelta
-        from sqlalchemy import select
-
-        # 1. Initial Balance (Available Balance: banco, carteira, poupanca)
-        current_balance = financial_engine.calculate_available_balance(db, user_id)
-
-        # 2. Variable Expenses Average (Last 3 closed months)
-        # Expense transactions without recurring_expense_id
-        avg_var_expense = db.execute(text("""
-            SELECT COALESCE(ABS(AVG(monthly_total)), 0)
-            FROM (
-                SELECT SUM(amount) as monthly_total
-                FROM transactions
-                WHERE user_id = :user_id
-                  AND nature = 'EXPENSE'
-                  AND recurring_expense_id IS NULL
-                  AND deleted_at IS NULL
-                  AND date >= date_trunc('month', now()) - interval '3 months'
-                  AND date < date_trunc('month', now())
-                GROUP BY date_trunc('month', date)
-            ) s
-        """), {"user_id": str(user_id)}).scalar() or Decimal(0)
-
-        # 3. Income Average (Last 3 closed months)
-        avg_income = db.execute(text("""
-            SELECT COALESCE(AVG(monthly_total), 0)
-            FROM (
-                SELECT SUM(amount) as monthly_total
-                FROM transactions
-                WHERE user_id = :user_id
-                  AND nature = 'INCOME'
-                  AND deleted_at IS NULL
-                  AND date >= date_trunc('month', now()) - interval '3 months'
-                  AND date < date_trunc('month', now())
-                GROUP BY date_trunc('month', date)
-            ) s
-        """), {"user_id": str(user_id)}).scalar() or Decimal(0)
-
-        # 4. Fetch Active Recurring Expenses
-        active_recurring = db.execute(
-            select(RecurringExpense, Category.type.label("cat_type"))
-            .join(Category)
-            .filter(RecurringExpense.user_id == user_id, RecurringExpense.active == True)
-        ).all()
-
-        has_recurring_income = any(row.cat_type == CategoryType.income for row in active_recurring)
-
-        projections = []
-        today = date.today()
-        running_balance = current_balance
-
-        for i in range(1, months + 1):
-            projection_month_date = (today + relativedelta(months=i)).replace(day=1)
-
-            month_recurring_expenses = Decimal(0)
-            month_installments = Decimal(0)
-            month_income_recorrente = Decimal(0)
-
-            recurring_items = []
-            installment_items = []
-            income_items = []
-
-            for rec, cat_type in active_recurring:
-                # Check if recurring is active in this future month
-                # For subscriptions: start_date <= month_date
-                # For installments: start_date <= month_date AND (end_date is NULL OR end_date >= month_date)
-
-                is_active_this_month = rec.start_date <= projection_month_date
-                if rec.end_date and rec.end_date < projection_month_date:
-                    is_active_this_month = False
-
-                if is_active_this_month:
-                    # Calculate monthly value for installments
-                    amount = abs(rec.amount)
-                    monthly_val = amount
-                    if rec.type == RecurringType.installment and rec.total_installments and rec.total_installments > 0:
-                        monthly_val = (amount / Decimal(str(rec.total_installments))).quantize(Decimal("0.01"))
-
-                    # Original rec.amount is used for income, but with monthly logic
-                    if cat_type == CategoryType.income:
-                        rec_monthly_amount = rec.amount
-                        if rec.type == RecurringType.installment and rec.total_installments and rec.total_installments > 0:
-                            rec_monthly_amount = (rec.amount / Decimal(str(rec.total_installments))).quantize(Decimal("0.01"))
-
-                        item = ProjectionItem(description=rec.description, amount=rec_monthly_amount)
-                        month_income_recorrente += rec_monthly_amount
-                        income_items.append(item)
-                    else:
-                        item = ProjectionItem(description=rec.description, amount=monthly_val)
-                        if rec.type == RecurringType.subscription:
-                            month_recurring_expenses += monthly_val
-                            recurring_items.append(item)
-                        else:
-                            month_installments += monthly_val
-                            installment_items.append(item)
-
-            # Use average income if no recurring income?
-            # The prompt says: "income: média dos últimos 3 meses de receitas (ou zero se não houver padrão)"
-            # Let's use the average income calculated earlier.
-
-            # Balance at end of month: balance_start + income - recurring - installments - variable
-            projected_end_balance = running_balance + avg_income - month_recurring_expenses - month_installments - avg_var_expense
-
-            projections.append(MonthlyProjection(
-                month=projection_month_date,
-                initial_balance=running_balance,
-                recurring_expenses=month_recurring_expenses,
-                installments=month_installments,
-                variable_expenses=avg_var_expense,
-                income=avg_income,
-                projected_balance=projected_end_balance,
-                recurring_items=recurring_items,
-                installment_items=installment_items,
-                income_items=income_items
-            ))
+    @cached_result("analytics.projection")
+    def get_projection(self, db: Session, user_id: UUID, months: int, include_items: bool = False) -> ProjectionResponse:
+        # Cálculo vetorizado em centavos (app.services.projection_engine)
+        return projection_engine.project(db, user_id, months, include_items)
 
-            running_balance = projected_end_balance
+    def get_projection_scenarios(self, db: Session, user_id: UUID, request: ProjectionScenariosRequest) -> ProjectionScenariosResponse:
+        # Todos os cenários num único cálculo em lote (app.services.projection_engine)
+        return projection_engine.scenarios(db, user_id, request.months, request.scenarios)
 
-        return ProjectionResponse(
-            projections=projections,
-            has_recurring_income=has_recurring_income
-        )
+    @cached_result("analytics.forecast_simulation")
+    def simulate_forecast(self, db: Session, user_id: UUID, months: int, paths: int, seed: int) -> ForecastSimulation:
+        # Monte Carlo vetorizado (app.services.forecast_simulation); semente fixa = cacheável
+        return forecast_simulator.simulate(db, user_id, months, paths, seed)
 
+    @cached_result("analytics.monthly_commitment")
     def get_monthly_commitment(self, db: Session, user_id: UUID) -> MonthlyCommitment:
         from app.models.transaction import Transaction, TransactionNature
         from app.models.category import Category, CategoryType
@@ -419,6 +459,41 @@ class AnalyticsService:
             saldo_projetado=saldo_projetado
         )
 
+    def _period_month_partials(self, db: Session, user_id: UUID, months: List[date]) -> Dict[date, PeriodMonthPartial]:
+        """
+        Receita, despesa e despesas por categoria de cada mês. Duas consultas sobre
+        monthly_rollups sem JOIN (agrupar pelas colunas de Category custava mais que a própria
+        soma); os dados das categorias ficam para get_period_summary.
+        """
+        net = MonthlyRollup.inflow + MonthlyRollup.outflow
+        in_months = (MonthlyRollup.user_id == user_id, MonthlyRollup.month.in_(months))
+        partials = {month: PeriodMonthPartial() for month in months}
+
+        for month, income, expense in db.execute(
+            select(
+                MonthlyRollup.month,
+                func.sum(case((MonthlyRollup.nature == TransactionNature.INCOME, net), else_=0)),
+                func.sum(case((MonthlyRollup.nature == TransactionNature.EXPENSE, MonthlyRollup.inflow - MonthlyRollup.outflow), else_=0))
+            )
+            .filter(*in_months)
+            .group_by(MonthlyRollup.month)
+        ):
+            partial = partials[as_date(month)]
+            partial.income = Decimal(str(income))
+            partial.expense = Decimal(str(expense))
+
+        for month, category_id, total in db.execute(
+            select(MonthlyRollup.month, MonthlyRollup.category_id, func.sum(MonthlyRollup.inflow - MonthlyRollup.outflow))
+            .filter(*in_months, MonthlyRollup.nature == TransactionNature.EXPENSE)
+            .group_by(MonthlyRollup.month, MonthlyRollup.category_id)
+        ):
+            partials[as_date(month)].categories.append(PeriodMonthCategory(
+                category_id=None if category_id == UNASSIGNED else category_id,
+                total=Decimal(str(total))
+            ))
+        return partials
+
+    @cached_result("analytics.period_summary")
     def get_period_summary(self, db: Session, user_id: UUID, start_year: int, start_month: int, end_year: int, end_month: int) -> PeriodSummaryResponse:
         tz = pytz.timezone("America/Sao_Paulo")
         start_date = date(start_year, start_month, 1)
@@ -429,41 +504,24 @@ class AnalyticsService:
         prev_start_date = start_date - relativedelta(months=period_months)
         prev_end_date = start_date - timedelta(days=1)
 
-        # 1. Monthly data for the period
-        monthly_query = text("""
-            SELECT
-                EXTRACT(YEAR FROM date AT TIME ZONE 'UTC' AT TIME ZONE 'America/Sao_Paulo')::int as year,
-                EXTRACT(MONTH FROM date AT TIME ZONE 'UTC' AT TIME ZONE 'America/Sao_Paulo')::int as month,
-                SUM(CASE WHEN nature = 'INCOME' THEN amount ELSE 0 END) as income,
-                SUM(CASE WHEN nature = 'EXPENSE' THEN ABS(amount) ELSE 0 END) as expense
-            FROM transactions
-            WHERE user_id = :user_id
-              AND deleted_at IS NULL
-              AND date AT TIME ZONE 'UTC' AT TIME ZONE 'America/Sao_Paulo' >= :start_date
-              AND date AT TIME ZONE 'UTC' AT TIME ZONE 'America/Sao_Paulo' <= :end_date
-            GROUP BY 1, 2
-            ORDER BY 1, 2
-        """)
-
-        monthly_results = db.execute(monthly_query, {
-            "user_id": str(user_id),
-            "start_date": start_date,
-            "end_date": end_date
-        }).all()
+        # 1. Parciais por mês (totais e despesas por categoria), do período anterior ao fim do
+        # atual; meses encerrados vêm do closed_month_results
+        partials = closed_month_results.get_many(
+            db, user_id, "analytics.period_summary",
+            months_between(prev_start_date, end_date),
+            lambda missing: self._period_month_partials(db, user_id, missing),
+            PeriodMonthPartial
+        )
 
         months_list = []
         total_income = Decimal(0)
         total_expense = Decimal(0)
 
         # Build results for each month in period (even if no transactions)
-        curr = start_date
-        results_map = {(r.year, r.month): r for r in monthly_results}
-
-        while curr <= end_date:
+        for curr in months_between(start_date, end_date):
             y, m = curr.year, curr.month
-            row = results_map.get((y, m))
-            inc = Decimal(row.income if row else 0)
-            exp = Decimal(row.expense if row else 0)
+            inc = partials[curr].income
+            exp = partials[curr].expense
             net = inc - exp
             sr = float((net / inc) * 100) if inc > 0 else None
 
@@ -479,7 +537,6 @@ class AnalyticsService:
 
             total_income += inc
             total_expense += exp
-            curr += relativedelta(months=1)
 
         overall_net = total_income - total_expense
         overall_sr = float((overall_net / total_income) * 100) if total_income > 0 else None
@@ -491,115 +548,154 @@ class AnalyticsService:
             avg_savings_rate=overall_sr
         )
 
-        # 2. Top Categories
-        cat_query = text("""
-            SELECT
-                c.id as category_id,
-                c.name as category_name,
-                c.icon as category_icon,
-                c.color as category_color,
-                SUM(ABS(t.amount)) as total
-            FROM transactions t
-            LEFT JOIN categories c ON t.category_id = c.id
-            WHERE t.user_id = :user_id
-              AND t.deleted_at IS NULL
-              AND t.nature = 'EXPENSE'
-              AND t.date AT TIME ZONE 'UTC' AT TIME ZONE 'America/Sao_Paulo' >= :start_date
-              AND t.date AT TIME ZONE 'UTC' AT TIME ZONE 'America/Sao_Paulo' <= :end_date
-            GROUP BY 1, 2, 3, 4
-            ORDER BY total DESC
-        """)
-
-        current_cats = db.execute(cat_query, {
-            "user_id": str(user_id),
-            "start_date": start_date,
-            "end_date": end_date
-        }).all()
-
-        prev_cat_query = text("""
-            SELECT
-                category_id,
-                SUM(ABS(amount)) as total
-            FROM transactions
-            WHERE user_id = :user_id
-              AND deleted_at IS NULL
-              AND nature = 'EXPENSE'
-              AND date AT TIME ZONE 'UTC' AT TIME ZONE 'America/Sao_Paulo' >= :start_date
-              AND date AT TIME ZONE 'UTC' AT TIME ZONE 'America/Sao_Paulo' <= :end_date
-            GROUP BY 1
-        """)
-
-        prev_cats = db.execute(prev_cat_query, {
-            "user_id": str(user_id),
-            "start_date": prev_start_date,
-            "end_date": prev_end_date
-        }).all()
-
-        prev_map = {r.category_id: Decimal(r.total) for r in prev_cats}
+        # 2. Top Categories: totais somados dos parciais; nome, ícone e cor numa consulta só. Sem
+        # categoria (ou categoria removida) somam numa única entrada, como no LEFT JOIN
+        def expenses_by_category(period_start: date, period_end: date) -> Dict[Optional[UUID], Decimal]:
+            totals_by_category = {}
+            for month in months_between(period_start, period_end):
+                for cat in partials[month].categories:
+                    totals_by_category[cat.category_id] = totals_by_category.get(cat.category_id, Decimal(0)) + cat.total
+            return totals_by_category
+
+        current_map = expenses_by_category(start_date, end_date)
+        prev_map = expenses_by_category(prev_start_date, prev_end_date)
+        category_ids = (current_map.keys() | prev_map.keys()) - {None}
+        categories = {
+            row.id: row
+            for row in db.execute(
+                select(Category.id, Category.name, Category.icon, Category.color).where(Category.id.in_(category_ids))
+            )
+        } if category_ids else {}
+        for totals_by_category in (current_map, prev_map):
+            for category_id in [c for c in totals_by_category if c is not None and c not in categories]:
+                totals_by_category[None] = totals_by_category.get(None, Decimal(0)) + totals_by_category.pop(category_id)
 
         top_categories = []
-        for cat in current_cats:
-            percentage = float((cat.total / total_expense) * 100) if total_expense > 0 else 0
+        for category_id, total in sorted(current_map.items(), key=lambda item: item[1], reverse=True):
+            category = categories.get(category_id)
+            percentage = float((total / total_expense) * 100) if total_expense > 0 else 0
             top_categories.append(PeriodCategorySummary(
-                category_id=str(cat.category_id) if cat.category_id else None,
-                category_name=cat.category_name or "Sem Categoria",
-                category_icon=cat.category_icon,
-                category_color=cat.category_color,
-                total=Decimal(cat.total),
-                previous_total=prev_map.get(cat.category_id, Decimal(0)),
+                category_id=str(category_id) if category_id else None,
+                category_name=category.name if category else "Sem Categoria",
+                category_icon=category.icon if category else None,
+                category_color=category.color if category else None,
+                total=total,
+                previous_total=prev_map.get(category_id, Decimal(0)),
                 percentage=percentage
             ))
-
         return PeriodSummaryResponse(
             months=months_list,
             totals=totals,
             top_categories=top_categories
         )
 
-    def get_daily_expenses(self, db: Session, user_id: UUID, year: int, month: int) -> dict:
-        def get_cumulative_for_month(y: int, m: int):
-            query = text("""
-                WITH days AS (
-                    SELECT generate_series(
-                        date_trunc('month', make_date(:year, :month, 1)),
-                        date_trunc('month', make_date(:year, :month, 1)) + interval '1 month' - interval '1 day',
-                        interval '1 day'
-                    )::date AS day
-                ),
-                daily_expenses AS (
-                    SELECT
-                        (date AT TIME ZONE 'America/Sao_Paulo')::date AS day,
-                        SUM(-amount) AS amount
-                    FROM transactions
-                    WHERE user_id = :user_id
-                      AND nature = 'EXPENSE'
-                      AND deleted_at IS NULL
-                      AND date_trunc('month', date AT TIME ZONE 'America/Sao_Paulo') =
-                          date_trunc('month', make_date(:year, :month, 1) AT TIME ZONE 'America/Sao_Paulo')
-                    GROUP BY 1
+    MAX_DAILY_EXPENSE_MONTHS = 24
+
+    def _cumulative_daily_expenses(self, db: Session, user_id: UUID, months: List[date]) -> Dict[date, List[DailyExpenseEntry]]:
+        """
+        Despesa acumulada dia a dia de cada mês (primeiro dia do mês -> entradas por dia).
+        Meses encerrados vêm do closed_month_results; os demais, de uma única consulta agrupada
+        por dia, limitada aos intervalos dos meses que faltam.
+        """
+        def compute(missing: List[date]) -> Dict[date, List[DailyExpenseEntry]]:
+            rows = db.execute(
+                select(Transaction.date, func.sum(-Transaction.amount).label("amount"))
+                .filter(
+                    Transaction.user_id == user_id,
+                    Transaction.nature == TransactionNature.EXPENSE,
+                    Transaction.deleted_at == None,
+                    or_(*[in_month(Transaction.date, m.year, m.month) for m in missing])
                 )
-                SELECT
-                    EXTRACT(DAY FROM d.day)::int AS day,
-                    COALESCE(SUM(de.amount) OVER (ORDER BY d.day), 0) AS cumulative
-                FROM days d
-                LEFT JOIN daily_expenses de ON d.day = de.day
-                ORDER BY d.day;
-            """)
-            return db.execute(query, {"user_id": str(user_id), "year": y, "month": m}).all()
+                .group_by(Transaction.date)
+            ).all()
+            by_day = {as_date(row.date): Decimal(str(row.amount or 0)) for row in rows}
+
+            result = {}
+            for first in missing:
+                cumulative = Decimal(0)
+                entries = []
+                for day in range(1, calendar.monthrange(first.year, first.month)[1] + 1):
+                    cumulative += by_day.get(first.replace(day=day), Decimal(0))
+                    entries.append(DailyExpenseEntry(day=day, cumulative=cumulative))
+                result[first] = entries
+            return result
+
+        months = [m.replace(day=1) for m in months]
+        return closed_month_results.get_many(
+            db, user_id, "analytics.daily_expenses", months, compute, List[DailyExpenseEntry]
+        )
 
-        current_results = get_cumulative_for_month(year, month)
+    @cached_result("analytics.daily_expenses")
+    def get_daily_expenses(self, db: Session, user_id: UUID, year: int, month: int) -> dict:
+        current = date(year, month, 1)
+        previous = current - relativedelta(months=1)
+        series = self._cumulative_daily_expenses(db, user_id, [current, previous])
+        return {
+            "current_month": series[current],
+            "previous_month": series[previous]
+        }
 
-        # Calculate previous month
-        first_day_current = date(year, month, 1)
-        last_day_prev = first_day_current - timedelta(days=1)
-        prev_year = last_day_prev.year
-        prev_month = last_day_prev.month
+    @cached_result("analytics.daily_expenses_overlay")
+    def get_daily_expenses_overlay(self, db: Session, user_id: UUID, months: List[date]) -> List[dict]:
+        """Séries acumuladas de meses arbitrários (ex.: o mesmo mês nos últimos anos), na ordem pedida."""
+        if not months:
+            raise ValueError("Informe ao menos um mês")
+        if len(months) > self.MAX_DAILY_EXPENSE_MONTHS:
+            raise ValueError(f"No máximo {self.MAX_DAILY_EXPENSE_MONTHS} meses por consulta")
+        series = self._cumulative_daily_expenses(db, user_id, months)
+        return [
+            {"year": m.year, "month": m.month, "days": series[m.replace(day=1)]}
+            for m in months
+        ]
 
-        previous_results = get_cumulative_for_month(prev_year, prev_month)
+    MAX_CATEGORY_MATRIX_MONTHS = 60
+
+    @cached_result("analytics.category_matrix")
+    def get_category_matrix(self, db: Session, user_id: UUID, start: date, end: date, nature: TransactionNature = TransactionNature.EXPENSE) -> CategoryMatrix:
+        """
+        Total por categoria e mês (SUM(ABS(amount)), como no resumo de período) de start a end
+        (meses inclusive), numa única consulta agrupada sobre monthly_rollups. Categorias em
+        ordem decrescente de total no período.
+        """
+        months = months_between(start, end)
+        if not months:
+            raise ValueError("O mês inicial deve ser anterior ou igual ao final")
+        if len(months) > self.MAX_CATEGORY_MATRIX_MONTHS:
+            raise ValueError(f"No máximo {self.MAX_CATEGORY_MATRIX_MONTHS} meses por consulta")
+
+        rows = db.execute(
+            select(
+                MonthlyRollup.category_id,
+                MonthlyRollup.month,
+                Category.name.label("category_name"),
+                Category.color.label("category_color"),
+                func.sum(MonthlyRollup.inflow - MonthlyRollup.outflow).label("total")
+            )
+            .outerjoin(Category, Category.id == MonthlyRollup.category_id)
+            .filter(
+                MonthlyRollup.user_id == user_id,
+                MonthlyRollup.nature == nature,
+                MonthlyRollup.month >= months[0],
+                MonthlyRollup.month <= months[-1]
+            )
+            .group_by(MonthlyRollup.category_id, MonthlyRollup.month, Category.name, Category.color)
+        ).all()
 
-        return {
-            "current_month": [{"day": row.day, "cumulative": row.cumulative} for row in current_results],
-            "previous_month": [{"day": row.day, "cumulative": row.cumulative} for row in previous_results]
-        }
+        month_index = {month: j for j, month in enumerate(months)}
+        categories = {}
+        for row in rows:
+            if row.category_id not in categories:
+                categories[row.category_id] = (row.category_name, row.category_color, [0.0] * len(months))
+            categories[row.category_id][2][month_index[as_date(row.month)]] += float(row.total)
+
+        ordered = sorted(categories.items(), key=lambda item: sum(item[1][2]), reverse=True)
+        return CategoryMatrix(
+            nature=nature,
+            months=[month.strftime("%Y-%m") for month in months],
+            category_ids=[None if category_id == UNASSIGNED else category_id for category_id, _ in ordered],
+            category_names=[name or "Sem Categoria" for _, (name, _, _) in ordered],
+            category_colors=[color for _, (_, color, _) in ordered],
+            values=[round(value, 2) for _, (_, _, values) in ordered for value in values]
+        )
 
 analytics_service = AnalyticsService()
\ No newline at end of file
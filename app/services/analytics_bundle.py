@@ -0,0 +1,222 @@
+import logging
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Callable, Dict, Iterable, List, Tuple
+from uuid import UUID
+import pytz
+from dateutil.relativedelta import relativedelta
+from sqlalchemy.orm import Session
+from app.models.account import AccountType
+from app.schemas.analytics import (
+    AccountBalance, AnalyticsBundle, AssetsLiabilities, BurnRate, NetWorth,
+    OperationalMonthly, SavingsRate
+)
+from app.schemas.forecast import ForecastRead
+from app.schemas.goals import GoalProgress
+from app.services.analytics import analytics_service
+from app.services.goals import goal_service
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_PARTS = (
+    "operational_monthly", "savings_rate", "burn_rate", "net_worth", "assets_liabilities",
+    "account_balances", "forecast", "goals_progress", "monthly_commitment"
+)
+
+# Intermediários comuns de cada parte: "balances" (get_account_balances) e "monthly"
+# (get_operational_monthly)
+PART_INPUTS = {
+    "operational_monthly": ("monthly",),
+    "savings_rate": ("monthly",),
+    "burn_rate": (),
+    "net_worth": ("balances",),
+    "assets_liabilities": ("balances",),
+    "account_balances": ("balances",),
+    "forecast": ("balances", "monthly"),
+    "goals_progress": ("balances",),
+    "monthly_commitment": (),
+}
+
+# Mesma classificação de v_assets_liabilities
+ASSET_TYPES = {
+    t.value for t in (
+        AccountType.banco, AccountType.investimento, AccountType.carteira,
+        AccountType.poupanca, AccountType.outros_ativos
+    )
+}
+LIABILITY_TYPES = {AccountType.cartao_credito.value, AccountType.outros_passivos.value}
+
+class AnalyticsBundleService:
+    """
+    Várias partes do dashboard numa requisição e numa sessão. Os intermediários comuns são
+    lidos uma vez, antes das partes: os saldos das contas dão net_worth, assets_liabilities,
+    forecast e goals_progress; os totais mensais (monthly_rollups) dão savings_rate e forecast.
+    As derivações seguem as regras das views/funções correspondentes.
+
+    Cada leitura roda num SAVEPOINT: uma parte (ou intermediário) que falha fica nula, com a
+    mensagem em `errors`, sem desfazer a transação de quem chamou nem derrubar as outras.
+    """
+
+    def get_bundle(self, db: Session, user_id: UUID, parts: Iterable[str]) -> AnalyticsBundle:
+        parts = list(dict.fromkeys(parts)) or list(BUNDLE_PARTS)
+        unknown = [part for part in parts if part not in BUNDLE_PARTS]
+        if unknown:
+            raise ValueError(f"Partes desconhecidas: {', '.join(unknown)}. Use: {', '.join(BUNDLE_PARTS)}")
+
+        loaders = {
+            "balances": lambda: analytics_service.get_account_balances(db, user_id=user_id),
+            "monthly": lambda: analytics_service.get_operational_monthly(db, user_id=user_id),
+        }
+        shared, failed = {}, set()
+        for name in dict.fromkeys(name for part in parts for name in PART_INPUTS[part]):
+            ok, value = self._isolated(db, name, loaders[name])
+            if ok:
+                shared[name] = value
+            else:
+                failed.add(name)
+
+        today = datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+        builders: Dict[str, Callable[..., object]] = {
+            "operational_monthly": lambda monthly: monthly,
+            "savings_rate": self._savings_rate,
+            "burn_rate": lambda: BurnRate(**analytics_service.get_burn_rate(db, user_id=user_id)),
+            "net_worth": lambda balances: NetWorth(net_worth=self._net_worth(balances)),
+            "assets_liabilities": self._assets_liabilities,
+            "account_balances": lambda balances: balances,
+            "forecast": lambda balances, monthly: self._forecast(balances, monthly, today),
+            "goals_progress": lambda balances: self._goals_progress(db, user_id, balances, today),
+            "monthly_commitment": lambda: analytics_service.get_monthly_commitment(db, user_id=user_id),
+        }
+
+        values, errors = {}, {}
+        for part in parts:
+            inputs = PART_INPUTS[part]
+            if failed.intersection(inputs):
+                errors[part] = "Não foi possível calcular esta parte"
+                continue
+            ok, value = self._isolated(db, part, lambda: builders[part](*(shared[name] for name in inputs)))
+            if ok:
+                values[part] = value
+            else:
+                errors[part] = "Não foi possível calcular esta parte"
+        return AnalyticsBundle(**values, errors=errors)
+
+    @staticmethod
+    def _isolated(db: Session, name: str, compute: Callable[[], object]) -> Tuple[bool, object]:
+        # SAVEPOINT: um erro de SQL (que no PostgreSQL aborta a transação) volta só até aqui
+        savepoint = db.begin_nested()
+        try:
+            value = compute()
+        except Exception:
+            savepoint.rollback()
+            logger.exception("Falha ao calcular %s no bundle", name)
+            return False, None
+        savepoint.commit()
+        return True, value
+
+    @staticmethod
+    def _net_worth(balances: List[AccountBalance]) -> Decimal:
+        return sum((b.current_balance for b in balances), Decimal(0))
+
+    @staticmethod
+    def _savings_rate(monthly: List[OperationalMonthly]) -> List[SavingsRate]:
+        # v_savings_rate: ROUND(net_result / total_income, 4), 0 sem receita
+        return [
+            SavingsRate(
+                month=row.month,
+                total_income=row.total_income,
+                total_expenses=row.total_expenses,
+                net_result=row.net_result,
+                savings_rate=float(round(row.net_result / row.total_income, 4)) if row.total_income > 0 else 0
+            )
+            for row in monthly
+        ]
+
+    @staticmethod
+    def _assets_liabilities(balances: List[AccountBalance]) -> List[AssetsLiabilities]:
+        totals: Dict[str, Decimal] = {}
+        for b in balances:
+            if b.type in ASSET_TYPES:
+                classification, value = "asset", b.current_balance
+            elif b.type in LIABILITY_TYPES:
+                classification, value = "liability", -b.current_balance
+            else:
+                classification, value = "other", Decimal(0)
+            totals[classification] = totals.get(classification, Decimal(0)) + value
+        return [AssetsLiabilities(classification=c, total=t) for c, t in totals.items()]
+
+    def _forecast(self, balances: List[AccountBalance], monthly: List[OperationalMonthly], today: date) -> ForecastRead:
+        # v_financial_forecast: sem contas não há linha
+        if not balances:
+            return ForecastRead(
+                current_net_worth=Decimal(0),
+                avg_monthly_result_last_3m=Decimal(0),
+                projected_3m=Decimal(0),
+                projected_6m=Decimal(0),
+                projected_12m=Decimal(0)
+            )
+        current = self._net_worth(balances)
+        current_month = today.replace(day=1)
+        last_3m = [
+            row.net_result for row in monthly
+            if current_month - relativedelta(months=3) <= row.month < current_month
+        ]
+        avg = sum(last_3m, Decimal(0)) / len(last_3m) if last_3m else Decimal(0)
+
+        months_until_zero = None
+        projected_date_of_zero = None
+        if avg < 0:
+            if current <= 0:
+                months_until_zero, projected_date_of_zero = Decimal(0), today
+            else:
+                months_until_zero = abs(current / avg)
+                # Como "interval '1 month' * n": parte fracionária em dias de 30
+                whole = int(months_until_zero)
+                days = int((months_until_zero - whole) * 30)
+                projected_date_of_zero = today + relativedelta(months=whole, days=days)
+
+        return ForecastRead(
+            current_net_worth=current,
+            avg_monthly_result_last_3m=avg,
+            projected_3m=current + avg * 3,
+            projected_6m=current + avg * 6,
+            projected_12m=current + avg * 12,
+            months_until_zero=months_until_zero,
+            projected_date_of_zero=projected_date_of_zero
+        )
+
+    def _goals_progress(self, db: Session, user_id: UUID, balances: List[AccountBalance], today: date) -> List[GoalProgress]:
+        # v_goal_progress junta as metas com v_net_worth: sem contas, nenhuma meta
+        if not balances:
+            return []
+        current = self._net_worth(balances)
+        progress = []
+        for goal in sorted(goal_service.get_goals(db, user_id), key=lambda g: g.target_date):
+            target = Decimal(goal.target_amount)
+            duration = (goal.target_date - goal.start_date).days
+            if today < goal.start_date:
+                percentage, on_track = Decimal(0), True
+            else:
+                percentage = (current / target * 100).quantize(Decimal("0.01"), ROUND_HALF_UP) if target > 0 else Decimal(0)
+                # Meta de duração zero: o prazo já chegou (mesma regra de get_goals_progress)
+                if today > goal.target_date or duration <= 0:
+                    on_track = current >= target
+                else:
+                    elapsed = Decimal((today - goal.start_date).days) / Decimal(duration)
+                    on_track = current >= target * elapsed
+            progress.append(GoalProgress(
+                id=goal.id,
+                name=goal.name,
+                target_amount=target,
+                goal_type=goal.goal_type,
+                start_date=goal.start_date,
+                target_date=goal.target_date,
+                current_amount=current,
+                percentage_completed=float(percentage),
+                remaining_amount=max(target - current, Decimal(0)),
+                days_remaining=max((goal.target_date - today).days, 0),
+                on_track=on_track
+            ))
+        return progress
+
+analytics_bundle = AnalyticsBundleService()
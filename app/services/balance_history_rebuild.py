@@ -0,0 +1,199 @@
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, List, Optional, Set
+from uuid import UUID
+import pytz
+from sqlalchemy import select, func, union_all, delete
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.models.account import Account
+from app.models.balance_history import BalanceHistory
+from app.models.transaction import Transaction
+from app.models.user import User
+from app.services.periods import month_end, as_date
+
+MODES = ("daily", "month-end")
+
+class BalanceHistoryRebuilder:
+    """
+    Reconstrói balance_history de todas as contas com SQL em conjunto, em vez de uma
+    leitura de saldo seguida de um commit por conta.
+
+    Modos:
+        daily      uma linha por dia com movimento (e no initial_balance_date)
+        month-end  uma linha por fim de mês com movimento
+    Os leitores pegam a linha mais recente com date <= X, então dias/meses sem movimento
+    não precisam de linha.
+
+    Os usuários são processados em lotes (uma query + um upsert + um commit por lote)
+    distribuídos entre workers; cada lote concluído é gravado no arquivo de progresso,
+    e uma nova execução com o mesmo arquivo continua de onde parou.
+    """
+
+    def _today(self) -> date:
+        return datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+
+    def history_rows(self, db: Session, user_ids: List[UUID], mode: str = "daily", through: Optional[date] = None) -> List[dict]:
+        """
+        Saldo acumulado por conta em cada dia (ou fim de mês) com movimento, em UMA query:
+        initial_balance entra como lançamento em initial_balance_date e o saldo sai de
+        SUM(amount) OVER (PARTITION BY account_id ORDER BY date).
+        """
+        through = through or self._today()
+
+        seeds = (
+            select(
+                Account.id.label("account_id"),
+                Account.initial_balance_date.label("date"),
+                Account.initial_balance.label("amount")
+            )
+            .where(Account.user_id.in_(user_ids), Account.initial_balance_date <= through)
+        )
+        moves = (
+            select(
+                Transaction.account_id.label("account_id"),
+                Transaction.date.label("date"),
+                Transaction.amount.label("amount")
+            )
+            .join(Account, Account.id == Transaction.account_id)
+            .where(
+                Account.user_id.in_(user_ids),
+                Transaction.deleted_at == None,
+                Transaction.date >= Account.initial_balance_date,
+                Transaction.date <= through
+            )
+        )
+        events = union_all(seeds, moves).subquery("events")
+
+        bucket = events.c.date if mode == "daily" else month_end(db, events.c.date)
+        bucketed = (
+            select(
+                events.c.account_id,
+                bucket.label("date"),
+                func.sum(events.c.amount).label("amount")
+            )
+            .group_by(events.c.account_id, bucket)
+            .subquery("bucketed")
+        )
+        rows = db.execute(
+            select(
+                bucketed.c.account_id,
+                bucketed.c.date,
+                func.sum(bucketed.c.amount).over(
+                    partition_by=bucketed.c.account_id,
+                    order_by=bucketed.c.date
+                ).label("balance")
+            )
+        ).all()
+
+        result = []
+        for account_id, d, balance in rows:
+            d = as_date(d)
+            result.append({
+                "id": uuid.uuid4(),
+                "account_id": account_id,
+                # O mês corrente fecha em `through`, não no último dia do mês
+                "date": min(d, through),
+                "balance": Decimal(str(balance)).quantize(Decimal("0.01"))
+            })
+        return result
+
+    def rebuild_users(self, db: Session, user_ids: List[UUID], mode: str = "daily", batch_size: int = 5000) -> int:
+        """
+        Substitui o histórico das contas dos usuários informados em uma única transação.
+        Retorna quantas linhas foram gravadas.
+        """
+        through = self._today()
+        rows = self.history_rows(db, user_ids, mode=mode, through=through)
+
+        account_ids = select(Account.id).where(Account.user_id.in_(user_ids))
+        db.execute(
+            delete(BalanceHistory).where(
+                BalanceHistory.account_id.in_(account_ids),
+                BalanceHistory.date <= through
+            )
+        )
+        for i in range(0, len(rows), batch_size):
+            stmt = dialect_insert(db, BalanceHistory).values(rows[i:i + batch_size])
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["account_id", "date"],
+                set_={"balance": stmt.excluded.balance}
+            ))
+        db.commit()
+        return len(rows)
+
+    def _load_progress(self, path: Optional[str], mode: str) -> Set[str]:
+        if not path or not os.path.exists(path):
+            return set()
+        with open(path) as f:
+            progress = json.load(f)
+        # Progresso de outro modo não vale para esta execução
+        if progress.get("mode") != mode:
+            return set()
+        return set(progress.get("done_users", []))
+
+    def _save_progress(self, path: Optional[str], mode: str, done: Set[str]) -> None:
+        if not path:
+            return
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"mode": mode, "done_users": sorted(done)}, f)
+        os.replace(tmp, path)
+
+    def rebuild_all(
+        self,
+        session_factory: Callable[[], Session],
+        mode: str = "daily",
+        chunk_size: int = 100,
+        workers: int = 4,
+        progress_path: Optional[str] = None,
+        on_chunk: Optional[Callable[[int, int, int], None]] = None
+    ) -> int:
+        """
+        Reconstrói o histórico de todos os usuários em lotes de `chunk_size`, com `workers`
+        sessões em paralelo. Usuários já registrados em `progress_path` são pulados.
+        on_chunk(lotes_concluídos, total_de_lotes, linhas_do_lote) é chamado a cada lote.
+        Retorna o total de linhas gravadas nesta execução.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo inválido: {mode}. Use um de {', '.join(MODES)}")
+
+        done = self._load_progress(progress_path, mode)
+        db = session_factory()
+        try:
+            user_ids = [u for u in db.scalars(select(User.id).order_by(User.id)) if str(u) not in done]
+        finally:
+            db.close()
+
+        chunks = [user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size)]
+        total_rows = 0
+        completed = 0
+
+        def run(chunk: List[UUID]) -> int:
+            session = session_factory()
+            try:
+                return self.rebuild_users(session, chunk, mode=mode)
+            except Exception:
+                session.rollback()
+                raise
+            finally:
+                session.close()
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(run, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                rows = future.result()
+                done.update(str(u) for u in futures[future])
+                self._save_progress(progress_path, mode, done)
+                total_rows += rows
+                completed += 1
+                if on_chunk:
+                    on_chunk(completed, len(chunks), rows)
+
+        return total_rows
+
+balance_history_rebuilder = BalanceHistoryRebuilder()
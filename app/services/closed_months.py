@@ -0,0 +1,134 @@
+import functools
+import inspect
+import logging
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List
+from uuid import UUID
+import pytz
+from pydantic import TypeAdapter
+from sqlalchemy import select, func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from app.core.database import dialect_insert
+from app.crud.data_version import data_version
+from app.crud.month_version import month_version
+from app.models.closed_month_cache import ClosedMonthCache
+
+logger = logging.getLogger(__name__)
+
+class ClosedMonthResults:
+    """
+    Cache persistente (tabela closed_month_cache) de resultados por (usuário, endpoint, mês)
+    para meses já encerrados, que quase nunca mudam.
+
+    Cada entrada guarda a versão do mês (month_versions) lida ANTES do cálculo; só é servida
+    enquanto a versão não mudou. Uma escrita com data no mês incrementa a versão na mesma
+    transação, então invalida apenas aquele mês. O mês corrente e os futuros nunca são gravados.
+    """
+
+    def current_month(self) -> date:
+        return datetime.now(pytz.timezone("America/Sao_Paulo")).date().replace(day=1)
+
+    def get_many(
+        self,
+        db: Session,
+        user_id: UUID,
+        endpoint: str,
+        months: List[date],
+        compute: Callable[[List[date]], Dict[date, Any]],
+        result_type: Any
+    ) -> Dict[date, Any]:
+        """
+        Resultado de cada mês de `months` (primeiros dias). `compute(faltantes)` calcula de uma
+        vez os meses sem entrada válida e devolve {mês: resultado}.
+        """
+        months = list(dict.fromkeys(months))
+        # Escritas ainda não confirmadas nesta sessão: nem lê nem grava
+        if data_version.has_pending(db):
+            return compute(months)
+
+        current = self.current_month()
+        closed = [month for month in months if month < current]
+        versions = month_version.get_many(db, user_id, closed)
+        adapter = TypeAdapter(result_type)
+
+        results = {}
+        if closed:
+            for month, version, payload in db.execute(
+                select(ClosedMonthCache.month, ClosedMonthCache.month_version, ClosedMonthCache.payload)
+                .where(
+                    ClosedMonthCache.user_id == user_id,
+                    ClosedMonthCache.endpoint == endpoint,
+                    ClosedMonthCache.month.in_(closed)
+                )
+            ):
+                if version == versions[month]:
+                    results[month] = adapter.validate_python(payload)
+
+        missing = [month for month in months if month not in results]
+        if missing:
+            computed = compute(missing)
+            results.update(computed)
+            self._store(db, [
+                {
+                    "user_id": user_id,
+                    "endpoint": endpoint,
+                    "month": month,
+                    "month_version": versions[month],
+                    "payload": adapter.dump_python(computed[month], mode="json")
+                }
+                for month in missing if month in versions
+            ])
+        return results
+
+    def _store(self, db: Session, rows: List[dict]) -> None:
+        # Sessão própria: a da requisição (GET) não faz commit
+        if not rows:
+            return
+        with Session(bind=db.get_bind()) as session:
+            try:
+                # executemany: a instrução compilada fica no cache do SQLAlchemy, ao contrário de
+                # um VALUES com N linhas, que recompila a cada quantidade diferente de meses. O
+                # RETURNING faz o SQLAlchemy juntar as linhas em um INSERT só (insertmanyvalues);
+                # sem ele, um upsert vira uma ida ao banco por linha no psycopg2
+                stmt = dialect_insert(session, ClosedMonthCache)
+                session.execute(stmt.on_conflict_do_update(
+                    index_elements=["user_id", "endpoint", "month"],
+                    set_={
+                        "month_version": stmt.excluded.month_version,
+                        "payload": stmt.excluded.payload,
+                        "created_at": func.now()
+                    }
+                ).returning(ClosedMonthCache.month), rows).all()
+                session.commit()
+            except SQLAlchemyError:
+                # O cache é só uma otimização: falhar ao gravar não quebra a leitura
+                session.rollback()
+                logger.exception("Falha ao gravar closed_month_cache")
+
+closed_month_results = ClosedMonthResults()
+
+def closed_month_cached(endpoint: str, result_type: Any) -> Callable:
+    """
+    Decora um método de serviço de um único mês, com assinatura (self, db, ..., year, month,
+    user_id, ...), para usar closed_month_results.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, db: Session, *args, **kwargs):
+            bound = signature.bind(self, db, *args, **kwargs)
+            bound.apply_defaults()
+            month = date(bound.arguments["year"], bound.arguments["month"], 1)
+            return closed_month_results.get_many(
+                db,
+                bound.arguments["user_id"],
+                endpoint,
+                [month],
+                lambda missing: {month: func(self, db, *args, **kwargs)},
+                result_type
+            )[month]
+
+        return wrapper
+    return decorator
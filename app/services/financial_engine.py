@@ -1,62 +1,246 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func, select
+from sqlalchemy import func, select, case, literal, union_all, or_, true, Date
 from app.models.transaction import Transaction, TransactionNature
 from app.models.account import Account, AccountType
+from app.models.account_balance import AccountBalance
+from app.models.balance_checkpoint import BalanceCheckpoint
+from app.models.monthly_rollup import MonthlyRollup
+from app.crud.balance_checkpoint import balance_checkpoint
 from decimal import Decimal
-from datetime import date, datetime
-from typing import Dict, Any, List
+from datetime import date, datetime, timedelta
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from uuid import UUID
 import pytz
+from dateutil.relativedelta import relativedelta
+from app.services.memo import request_memo
+from app.services.periods import in_month, months_between, as_date
 
 class FinancialEngine:
+    """
+    Cálculos financeiros centrais. As leituras são memoizadas por requisição
+    (app.services.memo): repetir a mesma chamada na mesma sessão não volta ao banco.
+    """
+    def _today(self) -> date:
+        tz = pytz.timezone("America/Sao_Paulo")
+        return datetime.now(tz).date()
+
+    def _balance_query(self, as_of: date):
+        """
+        SELECT (Account, saldo em as_of). Quando a conta tem linha em account_balances,
+        o saldo é ledger_balance menos as transações POSTERIORES a as_of (normalmente só
+        os lançamentos agendados), sem reler o histórico. Sem linha materializada,
+        cai no cálculo completo: initial_balance + SUM(amount) até as_of.
+        """
+        def transactions_total(*criteria):
+            return (
+                select(func.coalesce(func.sum(Transaction.amount), 0))
+                .where(
+                    Transaction.account_id == Account.id,
+                    Transaction.deleted_at == None,
+                    Transaction.date >= Account.initial_balance_date,
+                    *criteria
+                )
+                .correlate(Account)
+                .scalar_subquery()
+            )
+
+        balance = case(
+            (
+                AccountBalance.account_id == None,
+                Account.initial_balance + transactions_total(Transaction.date <= as_of)
+            ),
+            else_=AccountBalance.ledger_balance - transactions_total(Transaction.date > as_of)
+        )
+
+        return (
+            select(Account, balance.label("balance"))
+            .outerjoin(AccountBalance, AccountBalance.account_id == Account.id)
+        )
+
+    @request_memo
     def get_account_balance(self, db: Session, account_id: Any) -> Decimal:
         """
         Calcula o saldo atual de uma conta:
         initial_balance + SUM(Transaction.amount)
         Considera apenas transações até HOJE (America/Sao_Paulo).
         """
-        account = db.get(Account, account_id)
-        if not account:
+        row = db.execute(
+            self._balance_query(self._today()).filter(Account.id == account_id)
+        ).first()
+        if not row:
             return Decimal(0)
+        return Decimal(str(row.balance)).quantize(Decimal("0.01"))
 
-        tz = pytz.timezone("America/Sao_Paulo")
-        today = datetime.now(tz).date()
+    @request_memo
+    def get_accounts_with_balances(
+        self,
+        db: Session,
+        user_id: UUID,
+        as_of: Optional[date] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> List[Tuple[Account, Decimal]]:
+        """
+        Retorna as contas do usuário junto com o saldo de cada uma em UMA query,
+        em vez de um SELECT por conta. Sem as_of, considera transações até HOJE
+        (America/Sao_Paulo).
+        """
+        query = (
+            self._balance_query(as_of or self._today())
+            .filter(Account.user_id == user_id)
+            .offset(skip)
+        )
+        if limit is not None:
+            query = query.limit(limit)
 
-        initial_balance = account.initial_balance
-        start_date = account.initial_balance_date
+        return [
+            (acc, Decimal(str(balance)).quantize(Decimal("0.01")))
+            for acc, balance in db.execute(query).all()
+        ]
 
-        total_transactions = db.scalar(
-            select(func.sum(Transaction.amount))
-            .filter(
-                Transaction.account_id == account_id,
+    @request_memo
+    def get_balances(self, db: Session, user_id: UUID, as_of: Optional[date] = None) -> Dict[UUID, Decimal]:
+        """
+        Saldo de todas as contas do usuário ({account_id: saldo}) em uma única ida ao banco.
+        """
+        return {acc.id: balance for acc, balance in self.get_accounts_with_balances(db, user_id, as_of=as_of)}
+
+    @request_memo
+    def get_balances_for_accounts(
+        self,
+        db: Session,
+        account_ids: Sequence[UUID],
+        as_of: Optional[date] = None
+    ) -> Dict[UUID, Decimal]:
+        """
+        Saldo das contas informadas ({account_id: saldo}) em uma única ida ao banco.
+        """
+        rows = db.execute(
+            self._balance_query(as_of or self._today()).filter(Account.id.in_(list(account_ids)))
+        ).all()
+        return {acc.id: Decimal(str(balance)).quantize(Decimal("0.01")) for acc, balance in rows}
+
+    @request_memo
+    def balance_as_of(
+        self,
+        db: Session,
+        account_ids: Sequence[UUID],
+        dates: Sequence[date]
+    ) -> Dict[Tuple[UUID, date], Decimal]:
+        """
+        Saldo de cada conta em cada data ({(account_id, data): saldo}) em UMA query.
+        Parte do checkpoint de fim de mês mais recente anterior à data (balance_checkpoints)
+        e soma só as transações entre o checkpoint e a data, em vez de reler o histórico inteiro.
+        Antes de initial_balance_date a conta ainda não existia: saldo 0.
+        """
+        account_ids = list(dict.fromkeys(account_ids))
+        dates = sorted(set(dates))
+        if not account_ids or not dates:
+            return {}
+
+        # Checkpoints só existem para meses encerrados; gera os que faltarem
+        last_closed = self._today().replace(day=1) - timedelta(days=1)
+        balance_checkpoint.ensure(db, account_ids, through=min(last_closed, dates[-1]))
+
+        selects = [select(literal(d, Date).label("as_of")) for d in dates]
+        as_of_dates = (union_all(*selects) if len(selects) > 1 else selects[0]).subquery("as_of_dates")
+        as_of = as_of_dates.c.as_of
+
+        checkpoint_date = (
+            select(func.max(BalanceCheckpoint.month_end))
+            .where(BalanceCheckpoint.account_id == Account.id, BalanceCheckpoint.month_end <= as_of)
+            .correlate(Account, as_of_dates)
+            .scalar_subquery()
+        )
+        checkpoint_balance = (
+            select(BalanceCheckpoint.balance)
+            .where(BalanceCheckpoint.account_id == Account.id, BalanceCheckpoint.month_end == checkpoint_date)
+            .correlate(Account, as_of_dates)
+            .scalar_subquery()
+        )
+        delta = (
+            select(func.coalesce(func.sum(Transaction.amount), 0))
+            .where(
+                Transaction.account_id == Account.id,
                 Transaction.deleted_at == None,
-                Transaction.date >= start_date,
-                Transaction.date <= today
+                Transaction.date >= Account.initial_balance_date,
+                Transaction.date <= as_of,
+                or_(checkpoint_date == None, Transaction.date > checkpoint_date)
             )
-        ) or Decimal(0)
+            .correlate(Account, as_of_dates)
+            .scalar_subquery()
+        )
+        balance = case(
+            (as_of < Account.initial_balance_date, 0),
+            else_=func.coalesce(checkpoint_balance, Account.initial_balance) + delta
+        )
 
-        return initial_balance + total_transactions
+        rows = db.execute(
+            select(Account.id, as_of, balance.label("balance"))
+            .select_from(Account)
+            .join(as_of_dates, true())
+            .where(Account.id.in_(account_ids))
+        ).all()
 
+        return {
+            (acc_id, d): Decimal(str(value)).quantize(Decimal("0.01"))
+            for acc_id, d, value in rows
+        }
+
+    @request_memo
+    def get_net_worth_series(self, db: Session, user_id: UUID, end: date) -> List[Tuple[date, Decimal]]:
+        """
+        Patrimônio (soma dos saldos de todas as contas) em cada data em que ele muda, até `end`,
+        em UMA query: cada conta entra como um lançamento de initial_balance em
+        initial_balance_date e o acumulado sai de SUM(...) OVER (ORDER BY date).
+        Entre duas datas retornadas o valor é o da data anterior.
+        """
+        seeds = (
+            select(Account.initial_balance_date.label("date"), Account.initial_balance.label("amount"))
+            .where(Account.user_id == user_id, Account.initial_balance_date <= end)
+        )
+        moves = (
+            select(Transaction.date.label("date"), Transaction.amount.label("amount"))
+            .join(Account, Account.id == Transaction.account_id)
+            .where(
+                Account.user_id == user_id,
+                Transaction.deleted_at == None,
+                Transaction.date >= Account.initial_balance_date,
+                Transaction.date <= end
+            )
+        )
+        events = union_all(seeds, moves).subquery("events")
+
+        rows = db.execute(
+            select(
+                events.c.date,
+                func.sum(func.sum(events.c.amount)).over(order_by=events.c.date).label("net_worth")
+            )
+            .group_by(events.c.date)
+            .order_by(events.c.date)
+        ).all()
+
+        return [(d, Decimal(str(value)).quantize(Decimal("0.01"))) for d, value in rows]
+
+    @request_memo
     def calculate_available_balance(self, db: Session, user_id: UUID) -> Decimal:
         """
         Saldo Disponível (Liquidez): Somatório de contas Banco, Carteira e Poupança.
         """
-        accounts = db.scalars(select(Account).filter(Account.user_id == user_id)).all()
         total = Decimal(0)
         liquid_types = [AccountType.banco, AccountType.carteira, AccountType.poupanca]
-        for acc in accounts:
+        for acc, balance in self.get_accounts_with_balances(db, user_id):
             if acc.type in liquid_types:
-                total += self.get_account_balance(db, acc.id)
+                total += balance
         return total
 
+    @request_memo
     def calculate_net_worth(self, db: Session, user_id: UUID) -> Dict[str, Decimal]:
         """
         Patrimônio Total: Total Ativos - Total Passivos
         Ativos: Banco, Carteira, Poupança, Investimento, Outros Ativos
         Passivos: Cartão de Crédito, Outros Passivos
         """
-        accounts = db.scalars(select(Account).filter(Account.user_id == user_id)).all()
-
         assets = Decimal(0)
         liabilities = Decimal(0)
 
@@ -72,8 +256,7 @@ class FinancialEngine:
             AccountType.outros_passivos
         ]
 
-        for acc in accounts:
-            balance = self.get_account_balance(db, acc.id)
+        for acc, balance in self.get_accounts_with_balances(db, user_id):
             if acc.type in asset_types:
                 assets += balance
             elif acc.type in liability_types:
@@ -88,45 +271,68 @@ class FinancialEngine:
             "net_worth": assets - liabilities
         }
 
-    def get_monthly_totals(self, db: Session, year: int, month: int, user_id: UUID) -> Dict[str, Decimal]:
+    @request_memo
+    def get_monthly_totals_range(
+        self,
+        db: Session,
+        user_id: UUID,
+        start_month: date,
+        end_month: date
+    ) -> List[Dict[str, Any]]:
         """
-        Calcula Totais do Mês: Receitas, Despesas e Resultado.
-        Conforme Regras 4.3 e 4.4 da especificação.
+        Totais de cada mês entre start_month e end_month (inclusive), em UMA query agrupada
+        por mês sobre monthly_rollups. Meses sem movimento vêm zerados. Mesmas regras de
+        get_monthly_totals: income = SUM(INCOME), expense = |SUM(EXPENSE)|,
+        result = income + SUM(EXPENSE).
+        Retorna [{"month": date(primeiro dia), "income", "expense", "result"}].
         """
-        # Regra 4.3: Receitas (INCOME)
-        income = db.scalar(
-            select(func.sum(Transaction.amount))
-            .filter(
-                Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                extract('month', Transaction.date) == month,
-                Transaction.nature == TransactionNature.INCOME,
-                Transaction.deleted_at == None
-            )
-        ) or Decimal(0)
+        months = months_between(start_month, end_month)
+        if not months:
+            return []
 
-        # Regra 4.4: Despesas Operacionais (EXPENSE)
-        expense_sum = db.scalar(
-            select(func.sum(Transaction.amount))
+        net = MonthlyRollup.inflow + MonthlyRollup.outflow
+        rows = db.execute(
+            select(
+                MonthlyRollup.month,
+                func.sum(case((MonthlyRollup.nature == TransactionNature.INCOME, net), else_=0)).label("income"),
+                func.sum(case((MonthlyRollup.nature == TransactionNature.EXPENSE, net), else_=0)).label("expense")
+            )
             .filter(
-                Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                extract('month', Transaction.date) == month,
-                Transaction.nature == TransactionNature.EXPENSE,
-                Transaction.deleted_at == None
+                MonthlyRollup.user_id == user_id,
+                MonthlyRollup.month.between(months[0], months[-1]),
+                MonthlyRollup.nature.in_([TransactionNature.INCOME, TransactionNature.EXPENSE])
             )
-        ) or Decimal(0)
+            .group_by(MonthlyRollup.month)
+        ).all()
 
-        # Resultado do Mês: INCOME - EXPENSE (Exclui INVESTMENT, TRANSFER, SYSTEM_ADJUSTMENT)
-        # Como INCOME é positivo e EXPENSE é negativo no banco, a soma simples resolve.
-        monthly_result = income + expense_sum
-
-        return {
-            "income": income,
-            "expense": abs(expense_sum),
-            "result": monthly_result
+        totals = {
+            as_date(month): (Decimal(str(income or 0)), Decimal(str(expense or 0)))
+            for month, income, expense in rows
         }
 
+        results = []
+        for month in months:
+            income, expense_sum = totals.get(month, (Decimal(0), Decimal(0)))
+            results.append({
+                "month": month,
+                "income": income,
+                "expense": abs(expense_sum),
+                # INCOME é positivo e EXPENSE negativo no banco: a soma é o resultado
+                "result": income + expense_sum
+            })
+        return results
+
+    def get_monthly_totals(self, db: Session, year: int, month: int, user_id: UUID) -> Dict[str, Decimal]:
+        """
+        Calcula Totais do Mês: Receitas, Despesas e Resultado.
+        Conforme Regras 4.3 (INCOME) e 4.4 (EXPENSE) da especificação; INVESTMENT,
+        TRANSFER e SYSTEM_ADJUSTMENT ficam de fora.
+        """
+        first_day = date(year, month, 1)
+        totals = self.get_monthly_totals_range(db, user_id, first_day, first_day)[0]
+        return {key: totals[key] for key in ("income", "expense", "result")}
+
+    @request_memo
     def calculate_operational_expenses(self, db: Session, year: int, month: int, user_id: UUID) -> Decimal:
         """
         Despesa Operacional: Somatório apenas de nature == 'EXPENSE' (Regra 4.4)
@@ -135,33 +341,30 @@ class FinancialEngine:
             select(func.sum(Transaction.amount))
             .filter(
                 Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                extract('month', Transaction.date) == month,
+                in_month(Transaction.date, year, month),
                 Transaction.nature == TransactionNature.EXPENSE,
                 Transaction.deleted_at == None
             )
         ) or Decimal(0)
         return abs(expense)
 
+    @request_memo
     def get_cash_flow_evolution(self, db: Session, user_id: UUID, months: int = 6) -> List[Dict[str, Any]]:
         """
         Evolução do Fluxo de Caixa (Mês a Mês)
         Retorna: month, income, expense, net
         """
-        from dateutil.relativedelta import relativedelta
         today = date.today()
-        start_date = (today - relativedelta(months=months - 1)).replace(day=1)
+        start_month = today - relativedelta(months=months - 1)
 
-        results = []
-        for i in range(months - 1, -1, -1):
-            d = today - relativedelta(months=i)
-            totals = self.get_monthly_totals(db, d.year, d.month, user_id)
-            results.append({
-                "month": d.strftime("%Y-%m"),
+        return [
+            {
+                "month": totals["month"].strftime("%Y-%m"),
                 "income": totals["income"],
                 "expense": totals["expense"],
                 "net": totals["result"]
-            })
-        return results
+            }
+            for totals in self.get_monthly_totals_range(db, user_id, start_month, today)
+        ]
 
 financial_engine = FinancialEngine()
@@ -0,0 +1,138 @@
+from datetime import date, datetime
+from typing import Dict, Tuple
+from uuid import UUID
+import numpy as np
+import pytz
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import Session
+from app.models.transaction import Transaction, TransactionNature
+from app.schemas.forecast import ForecastSimulation, ForecastSimulationPoint
+from app.services.periods import month_start, as_date
+from app.services.projection_engine import projection_engine, to_cents, from_cents, SUBSCRIPTION, INSTALLMENT
+
+HISTORY_MONTHS = 12
+MIN_SIMULATION_MONTHS = 12
+MAX_SIMULATION_MONTHS = 60
+MAX_SIMULATION_PATHS = 10_000
+DEFAULT_SEED = 42
+PERCENTILES = (5, 25, 50, 75, 95)
+# Tamanho máximo da tabela de somas de um grupo de categorias (ver combined_tables)
+MAX_TABLE_SIZE = 1 << 16
+
+class ForecastSimulator:
+    """
+    Previsão de fluxo de caixa por Monte Carlo. Cada caminho sorteia, para cada mês e cada
+    categoria, o total de um mês do histórico recente (receitas e despesas variáveis, sem
+    recurring_expense_id), soma as recorrências agendadas (ProjectionEngine.expand) e acumula
+    o saldo a partir do disponível atual. Tudo em centavos int64; semente fixa, então o
+    resultado é reprodutível (e cacheável).
+    """
+
+    def history(self, db: Session, user_id: UUID, current_month: date) -> np.ndarray:
+        """
+        Matriz (meses do histórico x categorias) com o fluxo líquido em centavos de cada
+        categoria no mês (0 = nada lançado). O histórico começa no primeiro mês com dados
+        dentro dos últimos HISTORY_MONTHS meses fechados.
+        """
+        bucket = month_start(db, Transaction.date)
+        rows = db.execute(
+            select(bucket.label("month"), Transaction.category_id, Transaction.nature, func.sum(Transaction.amount).label("total"))
+            .filter(
+                Transaction.user_id == user_id,
+                Transaction.deleted_at == None,
+                Transaction.date >= current_month - relativedelta(months=HISTORY_MONTHS),
+                Transaction.date < current_month,
+                or_(
+                    Transaction.nature == TransactionNature.INCOME,
+                    (Transaction.nature == TransactionNature.EXPENSE) & (Transaction.recurring_expense_id == None)
+                )
+            )
+            .group_by(bucket, Transaction.category_id, Transaction.nature)
+        ).all()
+        if not rows:
+            return np.zeros((1, 1), dtype=np.int64)
+
+        totals: Dict[Tuple[date, object], int] = {}
+        for row in rows:
+            key = (as_date(row.month), (row.category_id, row.nature))
+            totals[key] = totals.get(key, 0) + to_cents(row.total)
+        first = min(month for month, _ in totals)
+        months = [first + relativedelta(months=i) for i in range((current_month.year - first.year) * 12 + current_month.month - first.month)]
+        columns = sorted({column for _, column in totals}, key=str)
+        month_index = {month: i for i, month in enumerate(months)}
+        column_index = {column: j for j, column in enumerate(columns)}
+
+        matrix = np.zeros((len(months), len(columns)), dtype=np.int64)
+        for (month, column), cents in totals.items():
+            matrix[month_index[month], column_index[column]] = cents
+        return matrix
+
+    def combined_tables(self, history: np.ndarray) -> list:
+        """
+        Agrupa as categorias em blocos de k colunas e devolve, por bloco, a tabela com a soma
+        de todas as combinações de meses (len = meses ** k). Sortear uma posição uniforme na
+        tabela equivale a sortear um mês independente para cada categoria do bloco, com um
+        único sorteio e uma única leitura por caminho/mês em vez de k.
+        """
+        n_months, n_columns = history.shape
+        k = 1
+        while k < n_columns and n_months ** (k + 1) <= MAX_TABLE_SIZE:
+            k += 1
+        tables = []
+        for first in range(0, n_columns, k):
+            table = history[:, first]
+            for column in history[:, first + 1:first + k].T:
+                table = np.add.outer(table, column).ravel()
+            tables.append(table)
+        return tables
+
+    def simulate(
+        self,
+        db: Session,
+        user_id: UUID,
+        months: int = MIN_SIMULATION_MONTHS,
+        paths: int = MAX_SIMULATION_PATHS,
+        seed: int = DEFAULT_SEED
+    ) -> ForecastSimulation:
+        from app.services.financial_engine import financial_engine
+
+        months = max(MIN_SIMULATION_MONTHS, min(months, MAX_SIMULATION_MONTHS))
+        paths = max(1, min(paths, MAX_SIMULATION_PATHS))
+        today = datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+        current_month = today.replace(day=1)
+        forecast_months = [current_month + relativedelta(months=i) for i in range(1, months + 1)]
+
+        start = to_cents(financial_engine.calculate_available_balance(db, user_id))
+        history = self.history(db, user_id, current_month)
+        schedule = projection_engine.expand(projection_engine.active_recurring(db, user_id), forecast_months)
+        scheduled = schedule.totals(SUBSCRIPTION) + schedule.totals(INSTALLMENT)
+
+        # Sorteio independente por categoria, acumulado bloco a bloco (memória paths x months)
+        rng = np.random.default_rng(seed)
+        net = np.zeros((paths, months), dtype=np.int64)
+        for table in self.combined_tables(history):
+            net += table[rng.integers(0, len(table), size=(paths, months), dtype=np.uint32)]
+
+        balances = start + np.cumsum(net - scheduled, axis=1)
+        bands = np.percentile(balances, PERCENTILES, axis=0)
+        negative = balances < 0
+
+        return ForecastSimulation(
+            months=months,
+            paths=paths,
+            seed=seed,
+            history_months=history.shape[0],
+            start_balance=from_cents(start),
+            probability_negative=float(negative.any(axis=1).mean()),
+            points=[
+                ForecastSimulationPoint(
+                    month=month,
+                    **{f"p{q}": from_cents(round(bands[k, i])) for k, q in enumerate(PERCENTILES)},
+                    probability_negative=float(negative[:, i].mean())
+                )
+                for i, month in enumerate(forecast_months)
+            ]
+        )
+
+forecast_simulator = ForecastSimulator()
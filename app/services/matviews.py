@@ -0,0 +1,233 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from uuid import UUID
+import pytz
+from sqlalchemy import event, text, func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.crud.data_version import data_version, ALL_USERS
+from app.models.matview_refresh import MatviewRefresh
+
+logger = logging.getLogger(__name__)
+
+# View normal -> materializada (criadas na migration f2c9d81e6b04, só no PostgreSQL)
+MATVIEWS = {
+    "v_savings_rate": "mv_savings_rate",
+    "v_account_balances": "mv_account_balances",
+    "v_net_worth": "mv_net_worth",
+    "v_assets_liabilities": "mv_assets_liabilities",
+    "v_goal_progress": "mv_goal_progress",
+    "v_financial_forecast": "mv_financial_forecast",
+}
+
+# View normal -> função por usuário (migration a7d3e5c1f920, só no PostgreSQL): filtra o
+# usuário antes de agregar. Parâmetros: :user_id e, em f_savings_rate, :from_date/:to_date
+# (período semiaberto; NULL = sem limite).
+USER_FUNCTIONS = {
+    "v_savings_rate": "f_savings_rate(:user_id, :from_date, :to_date)",
+    "v_account_balances": "f_account_balances(:user_id)",
+    "v_net_worth": "f_net_worth(:user_id)",
+    "v_assets_liabilities": "f_assets_liabilities(:user_id)",
+    "v_goal_progress": "f_goal_progress(:user_id)",
+    "v_financial_forecast": "f_financial_forecast(:user_id)",
+}
+
+class MatviewRefresher:
+    """
+    Atualiza as views materializadas em segundo plano depois das escritas.
+
+    Cada commit marca os usuários alterados (mark); o REFRESH ... CONCURRENTLY roda quando o
+    usuário fica `debounce` segundos sem escrever (ou no máximo `max_delay` após a primeira
+    escrita pendente). O REFRESH é sempre da view inteira: um ciclo atende todos os usuários
+    pendentes. Enquanto um usuário está pendente, is_pending() é True e o AnalyticsService lê
+    a função por usuário. Escritas de outros processos são detectadas por last_refreshed.
+
+    Há também um REFRESH ao iniciar e logo após cada meia-noite de São Paulo: as views usam
+    CURRENT_DATE e is_fresh só aceita refresh do mesmo dia, então sem ele as materializadas
+    ficariam sem uso até a primeira escrita do dia.
+    """
+
+    def __init__(
+        self,
+        debounce: float = settings.MATVIEW_REFRESH_DEBOUNCE_SECONDS,
+        max_delay: float = settings.MATVIEW_REFRESH_MAX_DELAY_SECONDS,
+        refresh: Optional[Callable[[], None]] = None,
+        clock: Optional[Callable[[], datetime]] = None
+    ):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self._refresh = refresh
+        self._clock = clock or (lambda: datetime.now(pytz.timezone("America/Sao_Paulo")))
+        self._session_factory = None
+        # usuário -> (primeira, última) marcação pendente, em time.monotonic()
+        self._pending: Dict[object, Tuple[float, float]] = {}
+        # Próximo REFRESH diário, em time.monotonic()
+        self._daily_due: Optional[float] = None
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, session_factory=None) -> None:
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._stopping = False
+        self._daily_due = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="matview-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+        self._thread = None
+
+    def mark(self, user_ids: Iterable[object]) -> None:
+        if not self.running:
+            return
+        now = time.monotonic()
+        with self._condition:
+            for user_id in user_ids:
+                first, _ = self._pending.get(user_id, (now, now))
+                self._pending[user_id] = (first, now)
+            self._condition.notify_all()
+
+    def is_pending(self, user_id: UUID) -> bool:
+        with self._condition:
+            return user_id in self._pending or ALL_USERS in self._pending
+
+    def _next_due(self) -> Optional[float]:
+        dues = [min(last + self.debounce, first + self.max_delay) for first, last in self._pending.values()]
+        if self._daily_due is not None:
+            dues.append(self._daily_due)
+        return min(dues) if dues else None
+
+    def _next_midnight(self) -> float:
+        tz = pytz.timezone("America/Sao_Paulo")
+        now = self._clock().astimezone(tz)
+        midnight = tz.localize(datetime.combine(now.date() + timedelta(days=1), datetime.min.time()))
+        return time.monotonic() + (midnight - now).total_seconds()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while not self._stopping:
+                    due = self._next_due()
+                    if due is not None and due <= time.monotonic():
+                        break
+                    self._condition.wait(None if due is None else due - time.monotonic())
+                if self._stopping:
+                    return
+                started = time.monotonic()
+
+            try:
+                self.refresh_all()
+            except Exception:
+                logger.exception("Falha ao atualizar as views materializadas")
+                with self._condition:
+                    # Tenta de novo após outro intervalo de debounce
+                    self._condition.wait(self.debounce)
+                continue
+
+            with self._condition:
+                if self._daily_due is not None and self._daily_due <= started:
+                    self._daily_due = self._next_midnight()
+                # Escritas feitas durante o REFRESH continuam pendentes para o próximo ciclo
+                for user_id, (_, last) in list(self._pending.items()):
+                    if last <= started:
+                        del self._pending[user_id]
+
+    def refresh_all(self) -> None:
+        if self._refresh is not None:
+            self._refresh()
+            return
+        db = self._session_factory()
+        try:
+            for matview in MATVIEWS.values():
+                refresh_matview(db, matview)
+        finally:
+            db.close()
+
+def refresh_matview(db: Session, matview: str) -> None:
+    """
+    REFRESH CONCURRENTLY (não bloqueia leituras) e grava last_refreshed_at e o snapshot de
+    transações, na mesma transação. O snapshot é tirado antes do REFRESH: toda transação
+    visível nele foi confirmada antes e está na view.
+    """
+    snapshot = db.scalar(text("SELECT txid_current_snapshot()::text"))
+    db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {matview}"))
+    stmt = dialect_insert(db, MatviewRefresh).values(
+        view_name=matview, last_refreshed_at=func.now(), snapshot=snapshot
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=["view_name"],
+        set_={"last_refreshed_at": stmt.excluded.last_refreshed_at, "snapshot": stmt.excluded.snapshot}
+    ))
+    db.commit()
+
+matview_refresher = MatviewRefresher()
+
+def last_refreshed(db: Session, user_id: UUID) -> Dict[str, datetime]:
+    """
+    last_refreshed_at das materializadas que já contêm a última escrita do usuário: a
+    transação gravada em users.data_xid (app.crud.data_version) é visível no snapshot do
+    REFRESH. Vale para escritas de qualquer processo; as demais ficam de fora.
+    """
+    rows = db.execute(text("""
+        SELECT r.view_name, r.last_refreshed_at
+        FROM matview_refreshes r
+        LEFT JOIN users u ON u.id = :user_id
+        WHERE r.snapshot IS NOT NULL
+          AND (u.data_xid IS NULL OR txid_visible_in_snapshot(u.data_xid, r.snapshot::txid_snapshot))
+    """), {"user_id": user_id})
+    return {row.view_name: row.last_refreshed_at for row in rows}
+
+def is_fresh(
+    last_refreshed_at: Optional[datetime],
+    user_id: UUID,
+    refresher: MatviewRefresher = matview_refresher,
+    now: Optional[datetime] = None
+) -> bool:
+    """
+    A materializada está em dia para o usuário quando: já foi atualizada depois da última
+    escrita dele (last_refreshed_at vem de last_refreshed), hoje (as views usam CURRENT_DATE;
+    o MatviewRefresher atualiza todas logo após a meia-noite) e sem escrita do usuário
+    pendente neste processo.
+    """
+    if last_refreshed_at is None:
+        return False
+    tz = pytz.timezone("America/Sao_Paulo")
+    now = now or datetime.now(tz)
+    if last_refreshed_at.tzinfo is None:
+        last_refreshed_at = pytz.utc.localize(last_refreshed_at)
+    if last_refreshed_at.astimezone(tz).date() != now.astimezone(tz).date():
+        return False
+    return not refresher.is_pending(user_id)
+
+def source_for(db: Session, view: str, user_id: UUID, refreshed: Dict[str, datetime]) -> str:
+    """
+    Item do FROM para `view`: a materializada se is_fresh, senão a função por usuário
+    (USER_FUNCTIONS). Fora do PostgreSQL, a própria view.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return view
+    matview = MATVIEWS.get(view)
+    if matview is not None and is_fresh(refreshed.get(matview), user_id):
+        return matview
+    return USER_FUNCTIONS.get(view, view)
+
+@event.listens_for(Session, "after_commit")
+def _schedule_refresh(session: Session) -> None:
+    bumped = data_version.pop_bumped(session)
+    if bumped:
+        matview_refresher.mark(bumped)
@@ -0,0 +1,87 @@
+import copy
+import functools
+import inspect
+from typing import Any, Callable, Dict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+MEMO_KEY = "request_memo"
+STATS_KEY = "request_memo_stats"
+
+# Totais do processo (todas as requisições), para acompanhar a economia
+totals = {"hits": 0, "misses": 0}
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    return value
+
+def _copy(db: Session, value: Any) -> Any:
+    """
+    Cópia profunda (quem chamou pode alterar listas/dicts aninhados sem afetar o memo), exceto
+    as instâncias ORM da sessão, que continuam sendo os próprios objetos do identity map.
+    """
+    shared = {id(obj): obj for obj in db.identity_map.values()}
+    return copy.deepcopy(value, shared)
+
+def request_memo(func: Callable) -> Callable:
+    """
+    Memoiza um método de serviço por requisição. A sessão (`db`, uma por requisição via
+    get_db) guarda os resultados em session.info, indexados pelo método e pelos demais
+    argumentos; qualquer escrita na sessão (flush, INSERT/UPDATE/DELETE, commit, rollback)
+    descarta tudo.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(self, db: Session, *args, **kwargs):
+        bound = signature.bind(self, db, *args, **kwargs)
+        bound.apply_defaults()
+        key = (func.__qualname__,) + tuple(
+            (name, freeze(value))
+            for name, value in bound.arguments.items()
+            if name not in ("self", "db")
+        )
+
+        memo = db.info.setdefault(MEMO_KEY, {})
+        stats = db.info.setdefault(STATS_KEY, {"hits": 0, "misses": 0})
+        if key in memo:
+            stats["hits"] += 1
+            totals["hits"] += 1
+            return _copy(db, memo[key])
+
+        stats["misses"] += 1
+        totals["misses"] += 1
+        result = func(self, db, *args, **kwargs)
+        memo[key] = _copy(db, result)
+        return result
+
+    return wrapper
+
+def memo_stats(db: Session) -> Dict[str, int]:
+    """Acertos e faltas do memo nesta sessão/requisição."""
+    return dict(db.info.get(STATS_KEY, {"hits": 0, "misses": 0}))
+
+def clear(db: Session) -> None:
+    db.info.pop(MEMO_KEY, None)
+
+@event.listens_for(Session, "after_flush")
+def _clear_after_flush(session: Session, flush_context) -> None:
+    clear(session)
+
+@event.listens_for(Session, "after_commit")
+def _clear_after_commit(session: Session) -> None:
+    clear(session)
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session: Session) -> None:
+    clear(session)
+
+@event.listens_for(Session, "do_orm_execute")
+def _clear_on_write(orm_execute_state) -> None:
+    if not orm_execute_state.is_select:
+        clear(orm_execute_state.session)
@@ -0,0 +1,60 @@
+from datetime import date, datetime
+from typing import List, Tuple, Union
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import and_, cast, func, literal_column, Date
+from sqlalchemy.orm import Session
+
+# Períodos sempre semiabertos [início, fim): "date >= início AND date < fim".
+# Diferente de EXTRACT(YEAR/MONTH FROM date) = ..., a comparação direta com a coluna
+# permite range scan em ix_transactions_user_date_deleted (user_id, date, deleted_at).
+# transactions.date já é a data local (DATE, America/Sao_Paulo): não converter com
+# AT TIME ZONE, que trata o DATE como meia-noite UTC e recua o dia 1 para o mês anterior.
+# Agregados por mês leem monthly_rollups.month, o mês local já calculado e indexado em
+# ix_monthly_rollups_user_nature_month.
+
+def month_range(year: int, month: int) -> Tuple[date, date]:
+    start = date(year, month, 1)
+    return start, start + relativedelta(months=1)
+
+def months_range(start_year: int, start_month: int, end_year: int, end_month: int) -> Tuple[date, date]:
+    """Do primeiro dia de start_month até o fim de end_month (inclusive)."""
+    return date(start_year, start_month, 1), month_range(end_year, end_month)[1]
+
+def year_range(year: int) -> Tuple[date, date]:
+    return date(year, 1, 1), date(year + 1, 1, 1)
+
+def in_period(column, start: date, end: date):
+    return and_(column >= start, column < end)
+
+def in_month(column, year: int, month: int):
+    return in_period(column, *month_range(year, month))
+
+def in_year(column, year: int):
+    return in_period(column, *year_range(year))
+
+def months_between(start_month: date, end_month: date) -> List[date]:
+    """Primeiro dia de cada mês de start_month a end_month (inclusive)."""
+    first = start_month.year * 12 + start_month.month - 1
+    last = end_month.year * 12 + end_month.month - 1
+    # Aritmética de inteiros: relativedelta a cada mês pesava em períodos longos
+    return [date(index // 12, index % 12 + 1, 1) for index in range(first, last + 1)]
+
+# Agrupamento por mês em SQL: date_trunc no PostgreSQL, date(..., modificadores) no SQLite
+
+def month_start(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc("month", column), Date)
+    return func.date(column, "start of month")
+
+def month_end(db: Session, column):
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc("month", column) + literal_column("INTERVAL '1 month - 1 day'"), Date)
+    return func.date(column, "start of month", "+1 month", "-1 day")
+
+def as_date(value: Union[date, datetime, str]) -> date:
+    """Normaliza o valor de month_start/month_end (o SQLite devolve texto)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
@@ -0,0 +1,277 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Tuple
+from uuid import UUID
+import numpy as np
+import pytz
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import select, func, case
+from sqlalchemy.orm import Session
+from app.models.category import Category, CategoryType
+from app.models.recurring_expense import RecurringExpense, RecurringType
+from app.models.transaction import Transaction, TransactionNature
+from app.schemas.analytics import (
+    ProjectionResponse, MonthlyProjection, ProjectionItem,
+    ProjectionScenario, ScenarioRecurring, ScenarioProjection, ProjectionScenariosResponse
+)
+from app.services.periods import month_start
+
+MAX_PROJECTION_MONTHS = 360
+MAX_SCENARIOS = 20
+
+# Grupo de cada item do cronograma
+INCOME, SUBSCRIPTION, INSTALLMENT = 0, 1, 2
+
+def to_cents(value: Decimal) -> int:
+    return int((Decimal(str(value)) * 100).quantize(Decimal(1)))
+
+def from_cents(value) -> Decimal:
+    return Decimal(int(value)).scaleb(-2)
+
+class ProjectionSchedule:
+    """
+    Recorrências expandidas mês a mês: active[mês, item] diz se o item vale no mês e
+    values[mês, item] é o valor em centavos (int64), 0 quando inativo.
+    """
+
+    def __init__(self, months: List[date], ids: List, descriptions: List[str], groups: np.ndarray, active: np.ndarray, values: np.ndarray):
+        self.months = months
+        self.ids = ids
+        self.descriptions = descriptions
+        self.groups = groups
+        self.active = active
+        self.values = values
+
+    def totals(self, group: int) -> np.ndarray:
+        return self.values[:, self.groups == group].sum(axis=1)
+
+    def batch_totals(self, group: int, include: np.ndarray) -> np.ndarray:
+        """Totais do grupo por cenário: include[cenário, item] (0/1) -> (cenários x meses)."""
+        mask = self.groups == group
+        return include[:, mask] @ self.values[:, mask].T
+
+class ProjectionEngine:
+    """
+    Projeção de saldo vetorizada: recorrências, parcelas e médias viram arrays de centavos
+    (meses x itens) e o saldo é uma soma acumulada. O custo é dominado pelas duas consultas,
+    não pelo horizonte (até MAX_PROJECTION_MONTHS meses).
+    """
+
+    def averages(self, db: Session, user_id: UUID, current_month: date) -> Tuple[Decimal, Decimal]:
+        """
+        Médias mensais dos 3 meses fechados: receitas e despesas variáveis (sem
+        recurring_expense_id, em valor absoluto). Meses sem lançamentos da natureza não
+        entram na média (SUM sem linhas = NULL, ignorado pelo AVG).
+        """
+        bucket = month_start(db, Transaction.date)
+        monthly = (
+            select(
+                func.sum(case((Transaction.nature == TransactionNature.INCOME, Transaction.amount))).label("income"),
+                func.sum(case((
+                    (Transaction.nature == TransactionNature.EXPENSE) & (Transaction.recurring_expense_id == None),
+                    Transaction.amount
+                ))).label("variable")
+            )
+            .filter(
+                Transaction.user_id == user_id,
+                Transaction.deleted_at == None,
+                Transaction.date >= current_month - relativedelta(months=3),
+                Transaction.date < current_month
+            )
+            .group_by(bucket)
+            .subquery()
+        )
+        avg_income, avg_variable = db.execute(
+            select(func.avg(monthly.c.income), func.avg(monthly.c.variable))
+        ).one()
+        return Decimal(str(avg_income or 0)), abs(Decimal(str(avg_variable or 0)))
+
+    def active_recurring(self, db: Session, user_id: UUID) -> List:
+        return db.execute(
+            select(RecurringExpense, Category.type.label("cat_type"))
+            .join(Category)
+            .filter(RecurringExpense.user_id == user_id, RecurringExpense.active == True)
+        ).all()
+
+    def expand(self, recurring: List, months: List[date]) -> ProjectionSchedule:
+        """
+        Item ativo no mês quando start_date <= mês e (sem end_date ou end_date >= mês). Parcelas
+        valem amount / total_installments; receitas mantêm o sinal, despesas entram em valor absoluto.
+        """
+        ids, descriptions, groups, cents, starts, ends = [], [], [], [], [], []
+        for rec, cat_type in recurring:
+            amount = rec.amount if cat_type == CategoryType.income else abs(rec.amount)
+            if rec.type == RecurringType.installment and rec.total_installments and rec.total_installments > 0:
+                amount = (amount / Decimal(str(rec.total_installments))).quantize(Decimal("0.01"))
+            ids.append(rec.id)
+            descriptions.append(rec.description)
+            if cat_type == CategoryType.income:
+                groups.append(INCOME)
+            else:
+                groups.append(SUBSCRIPTION if rec.type == RecurringType.subscription else INSTALLMENT)
+            cents.append(to_cents(amount))
+            starts.append(rec.start_date.toordinal())
+            ends.append(rec.end_date.toordinal() if rec.end_date else date.max.toordinal())
+
+        month_ordinals = np.array([m.toordinal() for m in months], dtype=np.int64)[:, None]
+        active = (
+            (np.array(starts, dtype=np.int64)[None, :] <= month_ordinals)
+            & (np.array(ends, dtype=np.int64)[None, :] >= month_ordinals)
+        )
+        values = np.where(active, np.array(cents, dtype=np.int64)[None, :], 0)
+        return ProjectionSchedule(months, ids, descriptions, np.array(groups, dtype=np.int64), active, values)
+
+    def base(self, db: Session, user_id: UUID, months: int) -> Tuple[List[date], int, int, int, List]:
+        """Meses projetados, saldo disponível, médias (centavos) e recorrências ativas."""
+        from app.services.financial_engine import financial_engine
+
+        months = max(1, min(months, MAX_PROJECTION_MONTHS))
+        today = datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+        projection_months = [(today + relativedelta(months=i)).replace(day=1) for i in range(1, months + 1)]
+
+        # Saldo disponível (banco, carteira, poupança) e médias dos 3 meses fechados
+        start = to_cents(financial_engine.calculate_available_balance(db, user_id))
+        avg_income, avg_variable = (to_cents(avg) for avg in self.averages(db, user_id, today.replace(day=1)))
+        return projection_months, start, avg_income, avg_variable, self.active_recurring(db, user_id)
+
+    def balances(self, start, deltas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Saldos inicial e final de cada mês (último eixo = meses) a partir dos resultados mensais."""
+        projected = np.asarray(start)[..., None] + np.cumsum(deltas, axis=-1)
+        initial = np.concatenate((np.broadcast_to(np.asarray(start)[..., None], projected[..., :1].shape), projected[..., :-1]), axis=-1)
+        return initial, projected
+
+    def monthly(
+        self,
+        months: List[date],
+        initial: np.ndarray,
+        projected: np.ndarray,
+        subscriptions: np.ndarray,
+        installments: np.ndarray,
+        income,
+        variable,
+        items: List[dict] = None
+    ) -> List[MonthlyProjection]:
+        income, variable = np.broadcast_to(income, len(months)), np.broadcast_to(variable, len(months))
+        return [
+            MonthlyProjection(
+                month=month,
+                initial_balance=from_cents(initial[i]),
+                recurring_expenses=from_cents(subscriptions[i]),
+                installments=from_cents(installments[i]),
+                variable_expenses=from_cents(variable[i]),
+                income=from_cents(income[i]),
+                projected_balance=from_cents(projected[i]),
+                recurring_items=items[i][SUBSCRIPTION] if items else [],
+                installment_items=items[i][INSTALLMENT] if items else [],
+                income_items=items[i][INCOME] if items else []
+            )
+            for i, month in enumerate(months)
+        ]
+
+    def project(
+        self,
+        db: Session,
+        user_id: UUID,
+        months: int,
+        include_items: bool = False
+    ) -> ProjectionResponse:
+        projection_months, start, avg_income, avg_variable, recurring = self.base(db, user_id, months)
+        schedule = self.expand(recurring, projection_months)
+
+        # Saldo no fim do mês: início + receita média - recorrentes - parcelas - variáveis
+        subscriptions = schedule.totals(SUBSCRIPTION)
+        installments = schedule.totals(INSTALLMENT)
+        initial, projected = self.balances(start, avg_income - subscriptions - installments - avg_variable)
+
+        items = None
+        if include_items:
+            items = []
+            for i in range(len(projection_months)):
+                month_items = {INCOME: [], SUBSCRIPTION: [], INSTALLMENT: []}
+                for j in np.flatnonzero(schedule.active[i]):
+                    month_items[int(schedule.groups[j])].append(
+                        ProjectionItem(description=schedule.descriptions[j], amount=from_cents(schedule.values[i, j]))
+                    )
+                items.append(month_items)
+
+        return ProjectionResponse(
+            projections=self.monthly(projection_months, initial, projected, subscriptions, installments, avg_income, avg_variable, items),
+            has_recurring_income=any(row.cat_type == CategoryType.income for row in recurring)
+        )
+
+    def scenarios(
+        self,
+        db: Session,
+        user_id: UUID,
+        months: int,
+        scenarios: List[ProjectionScenario]
+    ) -> ProjectionScenariosResponse:
+        """
+        Projeção atual mais uma por cenário (cancelar recorrências, incluir novas, ajustar receita
+        e despesas variáveis), com os dados carregados uma vez. Todas as recorrências (atuais e
+        novas) entram no mesmo cronograma; cada cenário é uma linha 0/1 de inclusão dos itens e
+        os totais saem de um produto de matrizes, então o custo quase não cresce com N.
+        """
+        if len(scenarios) > MAX_SCENARIOS:
+            raise ValueError(f"No máximo {MAX_SCENARIOS} cenários por consulta")
+        projection_months, start, avg_income, avg_variable, recurring = self.base(db, user_id, months)
+        active_ids = {rec.id for rec, _ in recurring}
+
+        added = []
+        for scenario in scenarios:
+            unknown = set(scenario.cancel_recurring_ids) - active_ids
+            if unknown:
+                raise ValueError(f"Recorrências não encontradas: {', '.join(sorted(str(i) for i in unknown))}")
+            added.append([self.transient(item, projection_months[0]) for item in scenario.add_recurring])
+
+        schedule = self.expand(recurring + [row for rows in added for row in rows], projection_months)
+
+        # Linha 0 = projeção atual; linha s + 1 = cenário s
+        include = np.zeros((len(scenarios) + 1, len(schedule.ids)), dtype=np.int64)
+        include[:, :len(recurring)] = 1
+        offset = len(recurring)
+        for s, scenario in enumerate(scenarios, start=1):
+            cancelled = set(scenario.cancel_recurring_ids)
+            include[s, :len(recurring)] = [rec.id not in cancelled for rec, _ in recurring]
+            include[s, offset:offset + len(added[s - 1])] = 1
+            offset += len(added[s - 1])
+
+        income = np.array([avg_income] + [avg_income + to_cents(sc.income_delta) for sc in scenarios], dtype=np.int64)
+        variable = np.array([avg_variable] + [avg_variable + to_cents(sc.variable_expense_delta) for sc in scenarios], dtype=np.int64)
+        subscriptions = schedule.batch_totals(SUBSCRIPTION, include)
+        installments = schedule.batch_totals(INSTALLMENT, include)
+        initial, projected = self.balances(
+            np.full(len(income), start, dtype=np.int64),
+            income[:, None] - subscriptions - installments - variable[:, None]
+        )
+
+        results = [
+            ScenarioProjection(
+                name=name,
+                projections=self.monthly(projection_months, initial[s], projected[s], subscriptions[s], installments[s], income[s], variable[s]),
+                final_balance=from_cents(projected[s, -1]),
+                min_balance=from_cents(projected[s].min()),
+                difference_from_current=from_cents(projected[s, -1] - projected[0, -1])
+            )
+            for s, name in enumerate(["Atual"] + [scenario.name for scenario in scenarios])
+        ]
+        return ProjectionScenariosResponse(current=results[0], scenarios=results[1:])
+
+    def transient(self, item: ScenarioRecurring, first_month: date) -> Tuple[RecurringExpense, CategoryType]:
+        """Recorrência hipotética (não vai para a sessão) no formato de active_recurring."""
+        start_date = item.start_date or first_month
+        end_date = item.end_date
+        if item.type == RecurringType.installment and end_date is None and item.total_installments:
+            end_date = start_date + relativedelta(months=item.total_installments - 1)
+        rec = RecurringExpense(
+            description=item.description,
+            amount=item.amount,
+            type=item.type,
+            frequency=item.frequency,
+            total_installments=item.total_installments,
+            start_date=start_date,
+            end_date=end_date
+        )
+        return rec, CategoryType.income if item.is_income else CategoryType.expense
+
+projection_engine = ProjectionEngine()
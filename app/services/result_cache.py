@@ -0,0 +1,93 @@
+import copy
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable
+import pytz
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.data_version import data_version
+from app.services.memo import freeze
+
+class ResultCache:
+    """
+    Cache LRU limitado de resultados de summary_service/analytics_service, indexado por
+    (user_id, versão dos dados, endpoint, parâmetros, dia de hoje).
+
+    A versão (users.data_version) muda a cada escrita nos dados do usuário, então uma
+    entrada nunca é servida depois de uma alteração: não há TTL. O dia entra na chave
+    porque vários resultados dependem de "hoje" (mês corrente, saldos até hoje).
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key], True
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+result_cache = ResultCache(settings.RESULT_CACHE_SIZE)
+
+def cached_result(endpoint: str) -> Callable:
+    """
+    Decora um método de serviço com assinatura (self, db, ..., user_id, ...). O resultado
+    é copiado na entrada e na saída do cache, para que quem chamou possa alterá-lo.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, db: Session, *args, **kwargs):
+            # Escritas ainda não confirmadas nesta sessão: não lê nem grava no cache
+            if data_version.has_pending(db):
+                return func(self, db, *args, **kwargs)
+
+            bound = signature.bind(self, db, *args, **kwargs)
+            bound.apply_defaults()
+            user_id = bound.arguments["user_id"]
+            params = tuple(
+                (name, freeze(value))
+                for name, value in bound.arguments.items()
+                if name not in ("self", "db", "user_id")
+            )
+            today = datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+            key = (user_id, data_version.get(db, user_id), endpoint, params, today)
+
+            value, found = result_cache.get(key)
+            if found:
+                return copy.deepcopy(value)
+
+            result = func(self, db, *args, **kwargs)
+            result_cache.set(key, copy.deepcopy(result))
+            return result
+
+        return wrapper
+    return decorator
@@ -2,10 +2,11 @@ from typing import List
 from uuid import UUID
 from difflib import SequenceMatcher
 from sqlalchemy.orm import Session
-from sqlalchemy import select, func
+from sqlalchemy import select
 from app.models.transaction import Transaction as TransactionModel, TransactionNature
 from app.models.recurring_expense import RecurringExpense
 from app.models.category import Category, CategoryType
+from app.services.periods import in_month
 
 def detect_recurring_matches(db: Session, user_id: UUID, transactions: List[TransactionModel]):
     # Get active recurring expenses for the user with their categories
@@ -64,8 +65,7 @@ def detect_recurring_matches(db: Session, user_id: UUID, transactions: List[Tran
                 .filter(
                     TransactionModel.user_id == user_id,
                     TransactionModel.recurring_expense_id == re.id,
-                    func.extract('month', TransactionModel.date) == tx_month,
-                    func.extract('year', TransactionModel.date) == tx_year,
+                    in_month(TransactionModel.date, tx_year, tx_month),
                     TransactionModel.deleted_at == None
                 )
             ).scalar()
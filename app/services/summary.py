@@ -1,64 +1,72 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func, select
+from sqlalchemy import func, select, case, or_
 from app.models.transaction import Transaction, TransactionNature
 from app.models.account import Account, AccountType
-from app.models.balance_history import BalanceHistory
 from app.models.category import Category, CategoryType
-from app.crud.account import account as crud_account
+from app.models.monthly_rollup import MonthlyRollup
 from app.services.financial_engine import financial_engine
-from app.schemas.summary import MonthlySummary, YearlySummary, DashboardData, DashboardChartData, CashFlowDay, TopTransaction, NetWorthData, NetWorthHistory, CashFlowSummary
+from app.schemas.summary import MonthlySummary, YearlySummary, DashboardData, DashboardChartData, CashFlowDay, TopTransaction, NetWorthData, NetWorthHistory, CashFlowSummary, NetWorthGranularity, NetWorthPoint, NetWorthSeries, YearSummary, YearMonthSummary, YearCategoryComparison
 from decimal import Decimal
 from datetime import date, timedelta, datetime
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 from dateutil.relativedelta import relativedelta
 import pytz
+from app.services.result_cache import cached_result
+from app.services.closed_months import closed_month_cached
+from app.services.periods import in_month, in_year
+from bisect import bisect_right
 
 class SummaryService:
-    def get_monthly_summary(self, db: Session, year: int, month: int, user_id: UUID) -> MonthlySummary:
-        totals = financial_engine.get_monthly_totals(db, year, month, user_id=user_id)
-        total_income = totals["income"]
-        total_expenses = totals["expense"]
+    # Limite de pontos de /summary/net-worth/history (~5 anos diários)
+    MAX_NET_WORTH_POINTS = 2000
 
-        total_invested = db.scalar(
-            select(func.sum(Transaction.amount))
-            .filter(
-                Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                extract('month', Transaction.date) == month,
-                Transaction.nature == TransactionNature.INVESTMENT,
-                Transaction.amount > 0,
-                Transaction.deleted_at == None
+    @cached_result("summary.monthly_summary")
+    @closed_month_cached("summary.monthly_summary", MonthlySummary)
+    def get_monthly_summary(self, db: Session, year: int, month: int, user_id: UUID) -> MonthlySummary:
+        # Uma única passada sobre monthly_rollups do mês: totais, investido e despesas por
+        # categoria saem do mesmo agrupamento (natureza, categoria)
+        rows = db.execute(
+            select(
+                MonthlyRollup.nature,
+                Category.name,
+                func.sum(MonthlyRollup.inflow).label("inflow"),
+                func.sum(MonthlyRollup.outflow).label("outflow")
             )
-        ) or Decimal(0)
-
-        expenses_by_cat = db.execute(
-            select(Category.name, func.sum(Transaction.amount))
-            .join(Category)
+            .outerjoin(Category, Category.id == MonthlyRollup.category_id)
             .filter(
-                Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                extract('month', Transaction.date) == month,
-                Transaction.amount < 0,
-                Transaction.nature.notin_([
-                    TransactionNature.TRANSFER,
-                    TransactionNature.INVESTMENT,
-                    TransactionNature.SYSTEM_ADJUSTMENT
-                ]),
-                Transaction.deleted_at == None
+                MonthlyRollup.user_id == user_id,
+                MonthlyRollup.month == date(year, month, 1)
             )
-            .group_by(Category.name)
+            .group_by(MonthlyRollup.nature, Category.name)
         ).all()
 
-        expenses_by_category = {name: abs(amount) for name, amount in expenses_by_cat}
+        income_sum = Decimal(0)
+        expense_sum = Decimal(0)
+        total_invested = Decimal(0)
+        expenses_by_category = {}
+        for nature, category_name, inflow, outflow in rows:
+            inflow, outflow = Decimal(str(inflow)), Decimal(str(outflow))
+            if nature == TransactionNature.INCOME:
+                income_sum += inflow + outflow
+            elif nature == TransactionNature.EXPENSE:
+                expense_sum += inflow + outflow
+            elif nature == TransactionNature.INVESTMENT:
+                total_invested += inflow
+
+            if nature in (TransactionNature.INCOME, TransactionNature.EXPENSE) and category_name is not None and outflow < 0:
+                expenses_by_category[category_name] = expenses_by_category.get(category_name, Decimal(0)) + abs(outflow)
+
+        # Mesmas regras de FinancialEngine.get_monthly_totals
+        total_income = income_sum
+        total_expenses = abs(expense_sum)
 
         top_trans_query = (
             select(Transaction, Category.name.label('cat_name'))
             .join(Category)
             .filter(
                 Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                extract('month', Transaction.date) == month,
+                in_month(Transaction.date, year, month),
                 Transaction.amount < 0,
                 Transaction.nature.notin_([
                     TransactionNature.TRANSFER,
@@ -80,7 +88,7 @@ class SummaryService:
             ) for row in top_trans_results
         ]
 
-        balance = totals["result"]
+        balance = income_sum + expense_sum
 
         return MonthlySummary(
             total_income=total_income,
@@ -91,12 +99,12 @@ class SummaryService:
             top_transactions=top_transactions
         )
 
+    @cached_result("summary.dashboard_data")
     def get_dashboard_data(self, db: Session, user_id: UUID) -> DashboardData:
         tz = pytz.timezone("America/Sao_Paulo")
         today = datetime.now(tz).date()
         prev_month_date = today - relativedelta(months=1)
 
-        accounts = crud_account.get_multi_with_balance(db, user_id=user_id)
         available_balance = financial_engine.calculate_available_balance(db, user_id=user_id)
 
         net_worth_data = financial_engine.calculate_net_worth(db, user_id=user_id)
@@ -117,12 +125,10 @@ class SummaryService:
         chart_data = []
         month_names_pt = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
 
-        for i in range(5, -1, -1):
-            d = today - relativedelta(months=i)
-            month_name = month_names_pt[d.month - 1]
-            m_totals = financial_engine.get_monthly_totals(db, d.year, d.month, user_id=user_id)
+        # Últimos 6 meses numa única query agrupada por mês
+        for m_totals in financial_engine.get_monthly_totals_range(db, user_id, today - relativedelta(months=5), today):
             chart_data.append(DashboardChartData(
-                month=month_name,
+                month=month_names_pt[m_totals["month"].month - 1],
                 income=abs(m_totals["income"]),
                 expenses=abs(m_totals["expense"])
             ))
@@ -139,8 +145,9 @@ class SummaryService:
             chart_data=chart_data
         )
 
+    @cached_result("summary.net_worth")
     def get_net_worth(self, db: Session, user_id: UUID) -> NetWorthData:
-        accounts = crud_account.get_multi_with_balance(db, user_id=user_id)
+        accounts = financial_engine.get_accounts_with_balances(db, user_id=user_id)
 
         total_accounts = Decimal(0)
         total_investments = Decimal(0)
@@ -150,49 +157,43 @@ class SummaryService:
 
         allocation = {}
 
-        for acc in accounts:
+        for acc, balance in accounts:
             type_label = acc.type.value
-            allocation[type_label] = allocation.get(type_label, Decimal(0)) + acc.balance
+            allocation[type_label] = allocation.get(type_label, Decimal(0)) + balance
 
             if acc.type in [AccountType.banco, AccountType.carteira, AccountType.poupanca]:
-                total_accounts += acc.balance
+                total_accounts += balance
             elif acc.type == AccountType.investimento:
-                total_investments += acc.balance
+                total_investments += balance
             elif acc.type == AccountType.cartao_credito:
-                total_debts += acc.balance
+                total_debts += balance
 
-            if acc.balance > 0:
-                total_assets += acc.balance
+            if balance > 0:
+                total_assets += balance
             else:
-                total_liabilities += abs(acc.balance)
+                total_liabilities += abs(balance)
 
         history = []
         month_names_pt = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
         tz = pytz.timezone("America/Sao_Paulo")
         today = datetime.now(tz).date()
 
-        all_accounts = db.scalars(select(Account).filter(Account.user_id == user_id)).all()
-
+        # Fim de cada um dos últimos 6 meses (o mês corrente vai até hoje)
+        dates = []
         for i in range(5, -1, -1):
             d = today - relativedelta(months=i)
             last_day_of_month = (d + relativedelta(months=1)).replace(day=1) - timedelta(days=1)
+            dates.append(min(last_day_of_month, today))
 
-            total_at_date = Decimal(0)
-            for acc in all_accounts:
-                balance_at_date = db.scalar(
-                    select(BalanceHistory.balance)
-                    .filter(BalanceHistory.account_id == acc.id, BalanceHistory.date <= last_day_of_month)
-                    .order_by(BalanceHistory.date.desc())
-                    .limit(1)
-                )
-
-                if balance_at_date is None:
-                    balance_at_date = Decimal(0)
-
-                total_at_date += balance_at_date
+        balances = financial_engine.balance_as_of(db, [acc.id for acc, _ in accounts], dates)
 
+        for as_of in dates:
+            total_at_date = sum(
+                (balances[(acc.id, as_of)] for acc, _ in accounts),
+                Decimal(0)
+            )
             history.append(NetWorthHistory(
-                month=month_names_pt[last_day_of_month.month - 1],
+                month=month_names_pt[as_of.month - 1],
                 value=total_at_date
             ))
 
@@ -207,14 +208,68 @@ class SummaryService:
             history=history
         )
 
+    @cached_result("summary.net_worth_history")
+    def get_net_worth_history(
+        self,
+        db: Session,
+        user_id: UUID,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        granularity: NetWorthGranularity = NetWorthGranularity.month
+    ) -> NetWorthSeries:
+        """
+        Série do patrimônio entre start e end (padrão: últimos 12 meses até hoje): um ponto
+        por dia, ou no último dia de cada semana (domingo) / mês, limitado a end.
+        """
+        if end is None:
+            end = datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+        if start is None:
+            start = end - relativedelta(months=12)
+
+        if granularity == NetWorthGranularity.week:
+            # Semanas (segunda a domingo) tocadas pelo intervalo
+            point_count = ((end - start).days + start.weekday()) // 7 + 1
+        elif granularity == NetWorthGranularity.month:
+            point_count = (end.year - start.year) * 12 + end.month - start.month + 1
+        else:
+            point_count = (end - start).days + 1
+        if point_count > self.MAX_NET_WORTH_POINTS:
+            raise ValueError(
+                f"O intervalo gera {point_count} pontos ({granularity.value}); o máximo é "
+                f"{self.MAX_NET_WORTH_POINTS}. Reduza o período ou use uma granularidade maior"
+            )
+
+        changes = financial_engine.get_net_worth_series(db, user_id=user_id, end=end)
+        change_dates = [d for d, _ in changes]
+
+        points = []
+        current = start
+        while current <= end:
+            if granularity == NetWorthGranularity.week:
+                point = current + timedelta(days=6 - current.weekday())
+            elif granularity == NetWorthGranularity.month:
+                point = (current + relativedelta(months=1)).replace(day=1) - timedelta(days=1)
+            else:
+                point = current
+            point = min(point, end)
+
+            # Último valor conhecido até o ponto (0 antes da primeira conta existir)
+            idx = bisect_right(change_dates, point)
+            value = changes[idx - 1][1] if idx else Decimal(0)
+            points.append(NetWorthPoint(date=point, value=value))
+            current = point + timedelta(days=1)
+
+        return NetWorthSeries(start=start, end=end, granularity=granularity, points=points)
+
+    @cached_result("summary.cash_flow")
     def get_cash_flow(self, db: Session, user_id: UUID) -> List[CashFlowDay]:
         tz = pytz.timezone("America/Sao_Paulo")
         today = datetime.now(tz).date()
         end_of_month = (today + relativedelta(months=1)).replace(day=1) - timedelta(days=1)
 
-        accounts = crud_account.get_multi_with_balance(db, user_id=user_id)
+        balances = financial_engine.get_balances(db, user_id=user_id)
         # Saldo atual já considera apenas transações até hoje (conforme alteração no FinancialEngine)
-        total_actual_balance = sum((acc.balance for acc in accounts), Decimal(0))
+        total_actual_balance = sum(balances.values(), Decimal(0))
 
         # Para o fluxo de caixa, precisamos do saldo ao FINAL DE ONTEM como ponto de partida,
         # pois o loop abaixo adicionará as transações de hoje.
@@ -284,51 +339,91 @@ class SummaryService:
 
         return cash_flow
 
+    @cached_result("summary.yearly_summary")
     def get_yearly_summary(self, db: Session, year: int, user_id: UUID) -> YearlySummary:
-        total_income = db.scalar(
-            select(func.sum(Transaction.amount))
-            .filter(
-                Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                Transaction.amount > 0,
-                Transaction.nature.notin_([TransactionNature.TRANSFER, TransactionNature.INVESTMENT, TransactionNature.SYSTEM_ADJUSTMENT]),
-                Transaction.deleted_at == None
+        return self.get_year_summary(db, user_id=user_id, year=year).totals
+
+    @cached_result("summary.year_summary")
+    def get_year_summary(self, db: Session, user_id: UUID, year: int, compare_to: Optional[int] = None) -> YearSummary:
+        """
+        Totais do ano, um resumo por mês (1..12) e, com compare_to, os mesmos números do outro
+        ano e a variação das despesas por categoria. Tudo sai de UMA query de agregação
+        condicional sobre monthly_rollups, agrupada por (mês, categoria).
+        Regras de get_yearly_summary: receitas/despesas = valores positivos/negativos de
+        INCOME e EXPENSE; investido = aportes (positivos) de INVESTMENT.
+        """
+        years = [year] if compare_to is None or compare_to == year else [year, compare_to]
+        operational = MonthlyRollup.nature.in_([TransactionNature.INCOME, TransactionNature.EXPENSE])
+        category_name = func.coalesce(Category.name, "Sem Categoria")
+        rows = db.execute(
+            select(
+                MonthlyRollup.month,
+                category_name.label("category_name"),
+                func.sum(case((operational, MonthlyRollup.inflow), else_=0)).label("income"),
+                func.sum(case((operational, MonthlyRollup.outflow), else_=0)).label("expenses"),
+                func.sum(case((MonthlyRollup.nature == TransactionNature.INVESTMENT, MonthlyRollup.inflow), else_=0)).label("invested")
             )
-        ) or Decimal(0)
-
-        total_expenses_signed = db.scalar(
-            select(func.sum(Transaction.amount))
+            .outerjoin(Category, Category.id == MonthlyRollup.category_id)
             .filter(
-                Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                Transaction.amount < 0,
-                Transaction.nature.notin_([TransactionNature.TRANSFER, TransactionNature.INVESTMENT, TransactionNature.SYSTEM_ADJUSTMENT]),
-                Transaction.deleted_at == None
+                MonthlyRollup.user_id == user_id,
+                or_(*[in_year(MonthlyRollup.month, y) for y in years])
             )
-        ) or Decimal(0)
-
-        total_expenses = abs(total_expenses_signed)
+            .group_by(MonthlyRollup.month, category_name)
+        ).all()
 
-        total_invested = db.scalar(
-            select(func.sum(Transaction.amount))
-            .filter(
-                Transaction.user_id == user_id,
-                extract('year', Transaction.date) == year,
-                Transaction.nature == TransactionNature.INVESTMENT,
-                Transaction.amount > 0,
-                Transaction.deleted_at == None
+        # {ano: {mês: [receitas, despesas (com sinal), investido]}} e {ano: {categoria: despesas}}
+        monthly = {y: {m: [Decimal(0)] * 3 for m in range(1, 13)} for y in years}
+        by_category = {y: {} for y in years}
+        for row in rows:
+            month = row.month
+            values = [Decimal(str(v or 0)) for v in (row.income, row.expenses, row.invested)]
+            bucket = monthly[month.year][month.month]
+            for i, value in enumerate(values):
+                bucket[i] += value
+            if values[1]:
+                categories = by_category[month.year]
+                categories[row.category_name] = categories.get(row.category_name, Decimal(0)) + abs(values[1])
+
+        def summary(income, expenses, invested, **extra):
+            return dict(
+                total_income=income,
+                total_expenses=abs(expenses),
+                total_invested=invested,
+                balance=income + expenses,
+                **extra
             )
-        ) or Decimal(0)
-
-        balance = total_income + total_expenses_signed
 
-        return YearlySummary(
-            total_income=total_income,
-            total_expenses=total_expenses,
-            total_invested=total_invested,
-            balance=balance
-        )
+        def months_of(y):
+            return [YearMonthSummary(**summary(*monthly[y][m], month=m)) for m in range(1, 13)]
+
+        def totals_of(y):
+            return YearlySummary(**summary(*[sum(col, Decimal(0)) for col in zip(*monthly[y].values())]))
+
+        result = YearSummary(year=year, totals=totals_of(year), months=months_of(year))
+        if len(years) == 1:
+            result.categories = [
+                YearCategoryComparison(category_name=name, total=total)
+                for name, total in sorted(by_category[year].items(), key=lambda item: item[1], reverse=True)
+            ]
+            return result
+
+        result.compare_to = compare_to
+        result.compare_totals = totals_of(compare_to)
+        result.compare_months = months_of(compare_to)
+        current, previous = by_category[year], by_category[compare_to]
+        for name in sorted(current.keys() | previous.keys(), key=lambda n: current.get(n, Decimal(0)), reverse=True):
+            total = current.get(name, Decimal(0))
+            compare_total = previous.get(name, Decimal(0))
+            result.categories.append(YearCategoryComparison(
+                category_name=name,
+                total=total,
+                compare_total=compare_total,
+                delta=total - compare_total,
+                delta_percentage=float((total - compare_total) / compare_total * 100) if compare_total else None
+            ))
+        return result
 
+    @cached_result("summary.cash_flow_summary")
     def get_cash_flow_summary(self, db: Session, user_id: UUID, months: int = 6) -> List[CashFlowSummary]:
         results = financial_engine.get_cash_flow_evolution(db, user_id=user_id, months=months)
         return [
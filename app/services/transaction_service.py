@@ -5,7 +5,7 @@ from decimal import Decimal
 import uuid
 from app.crud.transaction import transaction as crud_transaction
 from app.crud.recurring_expense import recurring_expense as crud_recurring_expense
-from app.crud.account import account as crud_account
+from app.crud.ledger import ledger
 from app.schemas.transaction import UnifiedTransactionCreate, TransactionCreate
 from app.schemas.recurring_expense import RecurringExpenseCreate
 from app.models.recurring_expense import RecurringExpense, RecurringType
@@ -145,6 +145,7 @@ def create_unified_transaction(db: Session, obj_in: UnifiedTransactionCreate, us
             transactions_to_create.append(db_transaction)
 
         db.add_all(transactions_to_create)
+        ledger.apply(db, Transaction.recurring_expense_id == db_recurring.id)
         db.commit()
 
         # Refresh only what's needed
@@ -152,10 +153,6 @@ def create_unified_transaction(db: Session, obj_in: UnifiedTransactionCreate, us
         first_transaction = transactions_to_create[0]
         db.refresh(first_transaction)
 
-        # Update balance history once
-        balance = crud_account.get_balance(db, obj_in.account_id)
-        crud_account._record_history(db, obj_in.account_id, balance)
-
         return first_transaction
     else:
         # Subscription: Preserve existing behavior
@@ -11,8 +11,16 @@ const analyticsApi = {
   getForecast: () => api.get('/analytics/forecast'),
   getDailyExpenses: (year, month) => api.get(`/analytics/daily-expenses?year=${year}&month=${month}`),
   getSankeyData: (year, month) => api.get(`/analytics/sankey?year=${year}&month=${month}`),
-  getProjection: (months = 6) => api.get(`/analytics/projection?months=${months}`),
+  // start/end no formato YYYY-MM, inclusive (ex.: trimestre ou ano)
+  getSankeyRange: (start, end) => api.get(`/analytics/sankey?start=${start}&end=${end}`),
+  getProjection: (months = 6, includeItems = false) =>
+    api.get(`/analytics/projection?months=${months}&include_items=${includeItems}`),
   getMonthlyCommitment: () => api.get('/analytics/monthly-commitment'),
+  // Matriz categoria x mês em colunas: values[i * months.length + j]
+  getCategoryMatrix: (start, end, nature = 'EXPENSE') =>
+    api.get(`/analytics/category-matrix?start=${start}&end=${end}&nature=${nature}`),
+  // Várias partes numa requisição só (ex.: ['net_worth', 'burn_rate'])
+  getBundle: (parts) => api.get(`/analytics/bundle?parts=${parts.join(',')}`),
   getPeriodSummary: (startYear, startMonth, endYear, endMonth) =>
     api.get(`/analytics/period-summary?start_year=${startYear}&start_month=${startMonth}&end_year=${endYear}&end_month=${endMonth}`),
 };
@@ -62,30 +62,30 @@ const Dashboard = () => {
       const month = now.getMonth() + 1;
 
       const results = await Promise.allSettled([
-        analyticsApi.getNetWorth(),           // 0
-        analyticsApi.getAssetsLiabilities(),  // 1
-        analyticsApi.getOperationalMonthly(), // 2
-        analyticsApi.getSavingsRate(),        // 3
-        analyticsApi.getBurnRate(),           // 4
-        analyticsApi.getGoalsProgress(),      // 5
-        analyticsApi.getForecast(),           // 6
-        analyticsApi.getDailyExpenses(year, month), // 7
-        api.get('/categories/'),              // 8
-        api.get('/accounts/'),                // 9
-        analyticsApi.getMonthlyCommitment()   // 10
+        analyticsApi.getBundle([
+          'net_worth', 'assets_liabilities', 'operational_monthly', 'savings_rate',
+          'burn_rate', 'goals_progress', 'forecast', 'monthly_commitment'
+        ]),                                   // 0
+        analyticsApi.getDailyExpenses(year, month), // 1
+        api.get('/categories/'),              // 2
+        api.get('/accounts/')                 // 3
       ]);
 
-      if (results[0].status === 'fulfilled') setNetWorth(results[0].value.data.net_worth);
-      if (results[1].status === 'fulfilled') setAssetsLiabilities(results[1].value.data);
-      if (results[2].status === 'fulfilled') setOperationalMonthly(results[2].value.data);
-      if (results[3].status === 'fulfilled') setSavingsRate(results[3].value.data);
-      if (results[4].status === 'fulfilled') setBurnRate(results[4].value.data);
-      if (results[5].status === 'fulfilled') setGoals(results[5].value.data);
-      if (results[6].status === 'fulfilled') setForecast(results[6].value.data);
-      if (results[7].status === 'fulfilled') setDailyExpenses(results[7].value.data);
-      if (results[8].status === 'fulfilled') setCategories(results[8].value.data);
-      if (results[9].status === 'fulfilled') setAccounts(results[9].value.data);
-      if (results[10].status === 'fulfilled') setMonthlyCommitment(results[10].value.data);
+      if (results[0].status === 'fulfilled') {
+        const bundle = results[0].value.data;
+        // Parte que falhou vem nula (motivo em bundle.errors): mantém o valor inicial
+        if (bundle.net_worth) setNetWorth(bundle.net_worth.net_worth);
+        if (bundle.assets_liabilities) setAssetsLiabilities(bundle.assets_liabilities);
+        if (bundle.operational_monthly) setOperationalMonthly(bundle.operational_monthly);
+        if (bundle.savings_rate) setSavingsRate(bundle.savings_rate);
+        if (bundle.burn_rate) setBurnRate(bundle.burn_rate);
+        if (bundle.goals_progress) setGoals(bundle.goals_progress);
+        if (bundle.forecast) setForecast(bundle.forecast);
+        if (bundle.monthly_commitment) setMonthlyCommitment(bundle.monthly_commitment);
+      }
+      if (results[1].status === 'fulfilled') setDailyExpenses(results[1].value.data);
+      if (results[2].status === 'fulfilled') setCategories(results[2].value.data);
+      if (results[3].status === 'fulfilled') setAccounts(results[3].value.data);
 
       results.forEach((result, index) => {
         if (result.status === 'rejected') {
@@ -93,8 +93,11 @@ const Dashboard = () => {
         }
       });
 
-      const criticalFailed = [0, 2, 4].some(i => results[i].status === 'rejected');
-      if (criticalFailed) {
+      const bundleErrors = results[0].status === 'fulfilled' ? results[0].value.data.errors || {} : {};
+      if (Object.keys(bundleErrors).length > 0) {
+        console.error('fetchData: bundle parts failed', bundleErrors);
+      }
+      if (results[0].status === 'rejected' || Object.keys(bundleErrors).length > 0) {
         toast.error('Alguns dados não puderam ser carregados.');
       }
     } catch (error) {
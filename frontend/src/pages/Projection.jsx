@@ -51,7 +51,7 @@ const Projection = () => {
   const fetchProjection = async (m) => {
     try {
       setLoading(true);
-      const res = await analyticsApi.getProjection(m);
+      const res = await analyticsApi.getProjection(m, true);
       setData(res.data);
     } catch (error) {
       console.error('Error fetching projection:', error);
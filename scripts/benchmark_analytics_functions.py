@@ -0,0 +1,101 @@
+"""
+Compara as views analíticas globais filtradas por usuário (SELECT ... FROM v_x WHERE user_id = ...)
+com as funções por usuário (SELECT ... FROM f_x(user_id)), que filtram antes de agregar.
+
+Só PostgreSQL. Os dados sintéticos são gerados dentro de uma transação que é desfeita no fim.
+
+    python -m scripts.benchmark_analytics_functions --users 100 --transactions 100000
+"""
+import argparse
+import random
+import time
+from sqlalchemy import text
+from app.core.database import SessionLocal
+
+# (view filtrada, função equivalente)
+QUERIES = [
+    ("SELECT * FROM v_savings_rate WHERE user_id = :user_id", "SELECT * FROM f_savings_rate(:user_id)"),
+    ("SELECT * FROM v_account_balances WHERE user_id = :user_id", "SELECT * FROM f_account_balances(:user_id)"),
+    ("SELECT * FROM v_net_worth WHERE user_id = :user_id", "SELECT * FROM f_net_worth(:user_id)"),
+    ("SELECT * FROM v_assets_liabilities WHERE user_id = :user_id", "SELECT * FROM f_assets_liabilities(:user_id)"),
+    ("SELECT * FROM v_goal_progress WHERE user_id = :user_id", "SELECT * FROM f_goal_progress(:user_id)"),
+    ("SELECT * FROM v_financial_forecast WHERE user_id = :user_id", "SELECT * FROM f_financial_forecast(:user_id)"),
+]
+
+def generate_data(db, users: int, transactions: int) -> None:
+    db.execute(text("""
+        INSERT INTO users (id, username, hashed_password)
+        SELECT gen_random_uuid(), 'bench_' || n, 'x'
+        FROM generate_series(1, :users) n
+    """), {"users": users})
+    db.execute(text("""
+        INSERT INTO accounts (id, name, type, initial_balance, initial_balance_date, user_id, is_default)
+        SELECT gen_random_uuid(), 'Conta ' || t, t::accounttype, 1000, CURRENT_DATE - 730, u.id, false
+        FROM users u
+        CROSS JOIN unnest(ARRAY['banco', 'carteira', 'cartao_credito']) t
+        WHERE u.username LIKE 'bench\\_%'
+    """))
+    db.execute(text("""
+        INSERT INTO financial_goals (id, user_id, name, target_amount, goal_type, start_date, target_date)
+        SELECT gen_random_uuid(), u.id, 'Meta', 50000, 'SAVINGS', CURRENT_DATE - 90, CURRENT_DATE + 365
+        FROM users u
+        WHERE u.username LIKE 'bench\\_%'
+    """))
+    db.execute(text("""
+        WITH accs AS (
+            SELECT a.id, a.user_id, row_number() OVER (ORDER BY a.id) - 1 AS rn, count(*) OVER () AS total
+            FROM accounts a
+            JOIN users u ON u.id = a.user_id
+            WHERE u.username LIKE 'bench\\_%'
+        )
+        INSERT INTO transactions (id, description, amount, nature, date, account_id, user_id)
+        SELECT
+            gen_random_uuid(),
+            'Bench ' || n,
+            CASE WHEN n % 5 = 0 THEN round((random() * 5000)::numeric, 2) ELSE -round((random() * 300)::numeric, 2) END,
+            CASE WHEN n % 5 = 0 THEN 'INCOME' ELSE 'EXPENSE' END::transactionnature,
+            CURRENT_DATE - (random() * 720)::int,
+            accs.id,
+            accs.user_id
+        FROM generate_series(1, :transactions) n
+        JOIN accs ON accs.rn = n % accs.total
+    """), {"transactions": transactions})
+    db.execute(text("ANALYZE users, accounts, financial_goals, transactions"))
+
+def timed(db, sql: str, user_id, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db.execute(text(sql), {"user_id": user_id}).all()
+        times.append((time.perf_counter() - start) * 1000)
+    return sum(times) / len(times)
+
+def benchmark(users: int, transactions: int, samples: int, repeat: int) -> None:
+    db = SessionLocal()
+    if db.get_bind().dialect.name != "postgresql":
+        raise SystemExit("As funções por usuário só existem no PostgreSQL.")
+    try:
+        generate_data(db, users, transactions)
+        user_ids = [row[0] for row in db.execute(text("SELECT id FROM users WHERE username LIKE 'bench\\_%'"))]
+        sample = random.sample(user_ids, min(samples, len(user_ids)))
+
+        print(f"{users} usuários, {transactions} transações, média de {len(sample)} usuários x {repeat} execuções\n")
+        print("| Consulta | View + WHERE (ms) | Função (ms) | Ganho |")
+        print("| --- | --- | --- | --- |")
+        for view_sql, function_sql in QUERIES:
+            view_ms = sum(timed(db, view_sql, user_id, repeat) for user_id in sample) / len(sample)
+            function_ms = sum(timed(db, function_sql, user_id, repeat) for user_id in sample) / len(sample)
+            name = function_sql.split("FROM ")[1].split("(")[0]
+            print(f"| {name} | {view_ms:.2f} | {function_ms:.2f} | {view_ms / function_ms:.1f}x |")
+    finally:
+        db.rollback()
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--transactions", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=10, help="usuários medidos")
+    parser.add_argument("--repeat", type=int, default=5, help="execuções por usuário")
+    args = parser.parse_args()
+    benchmark(args.users, args.transactions, args.samples, args.repeat)
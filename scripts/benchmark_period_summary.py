@@ -0,0 +1,116 @@
+"""
+Mede o resumo de período (/analytics/period-summary) de 5 anos sobre um banco descartável.
+
+Gera um usuário com --transactions transações espalhadas por --years anos, reconstrói
+monthly_rollups e cronometra o resumo do período inteiro (mais o período anterior, usado na
+comparação por categoria) em três situações: sem cache, com o cache de meses encerrados
+(closed_month_cache) e com o cache em memória (result_cache).
+
+    python -m scripts.benchmark_period_summary --database-url sqlite:///./benchmark.db
+
+O banco informado deve estar vazio: as tabelas são criadas e removidas pelo script.
+
+Meta: 20 ms com cache (closed_month_cache ou result_cache). Sem cache a meta é relaxada para
+50 ms: além das consultas, essa execução monta e grava no closed_month_cache os parciais de
+todos os meses encerrados do período e do período anterior.
+"""
+import argparse
+import random
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+from sqlalchemy import create_engine, delete, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.category import Category, CategoryType
+from app.models.closed_month_cache import ClosedMonthCache
+from app.models.transaction import Transaction, TransactionNature
+from app.crud.monthly_rollup import monthly_rollup
+from app.services.analytics import analytics_service
+from app.services.result_cache import result_cache
+
+def generate(db, years: int, transactions: int):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username=f"bench-{user_id}", hashed_password="x"))
+    account_ids = [uuid.uuid4() for _ in range(3)]
+    for account_id in account_ids:
+        db.add(Account(id=account_id, name="Conta", type=AccountType.banco, initial_balance=0, initial_balance_date=date(2000, 1, 1), user_id=user_id))
+    expense_ids = [uuid.uuid4() for _ in range(12)]
+    income_ids = [uuid.uuid4() for _ in range(3)]
+    for i, category_id in enumerate(expense_ids):
+        db.add(Category(id=category_id, name=f"Despesa {i}", type=CategoryType.expense, user_id=user_id))
+    for i, category_id in enumerate(income_ids):
+        db.add(Category(id=category_id, name=f"Receita {i}", type=CategoryType.income, user_id=user_id))
+    db.flush()
+
+    end = date.today().replace(day=1) - timedelta(days=1)
+    start = date(end.year - years + 1, end.month, 1)
+    days = (end - start).days
+    rows = []
+    for _ in range(transactions):
+        income = random.random() < 0.1
+        rows.append({
+            "id": uuid.uuid4(),
+            "description": "Bench",
+            "amount": round(random.uniform(1000, 8000), 2) if income else -round(random.uniform(5, 500), 2),
+            "nature": TransactionNature.INCOME if income else TransactionNature.EXPENSE,
+            "date": start + timedelta(days=random.randint(0, days)),
+            "category_id": random.choice(income_ids if income else expense_ids),
+            "account_id": random.choice(account_ids),
+            "user_id": user_id,
+        })
+    db.execute(insert(Transaction), rows)
+    monthly_rollup.rebuild(db, [user_id])
+    db.commit()
+    return user_id, start, end
+
+def timed(fn, repeat: int, setup=None) -> float:
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        begin = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(times)
+
+def benchmark(database_url: str, years: int, transactions: int, repeat: int) -> None:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        user_id, start, end = generate(db, years, transactions)
+
+        def summary():
+            return analytics_service.get_period_summary(
+                db, user_id=user_id, start_year=start.year, start_month=start.month, end_year=end.year, end_month=end.month
+            )
+
+        def clear_all():
+            result_cache.clear()
+            db.execute(delete(ClosedMonthCache))
+            db.commit()
+
+        print(f"{transactions} transações em {years} anos ({engine.dialect.name}), mediana de {repeat} execuções\n")
+        print("| Situação | Tempo (ms) |")
+        print("| --- | --- |")
+        print(f"| Sem cache (monthly_rollups) | {timed(summary, repeat, clear_all):.2f} |")
+        summary()
+        print(f"| closed_month_cache | {timed(summary, repeat, result_cache.clear):.2f} |")
+        print(f"| result_cache | {timed(summary, repeat):.2f} |")
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--transactions", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    benchmark(args.database_url, args.years, args.transactions, args.repeat)
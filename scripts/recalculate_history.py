@@ -1,38 +1,46 @@
 import sys
 import os
-from sqlalchemy import select
+import argparse
+import time
 
 # Adiciona o diretório raiz ao path para importar os módulos do app
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.core.database import SessionLocal
-from app.models.account import Account
-from app.crud.account import account as crud_account
+from app.services.balance_history_rebuild import balance_history_rebuilder, MODES
+
+def recalculate_history(mode: str = "daily", chunk_size: int = 100, workers: int = 4, progress_path: str = None) -> int:
+    start = time.perf_counter()
+
+    def report(done: int, total: int, rows: int):
+        print(f"Lote {done}/{total} concluído ({rows} linhas).")
 
-def recalculate_history():
-    db = SessionLocal()
     try:
-        # Busca todas as contas de todos os usuários
-        accounts = db.scalars(select(Account)).all()
-        print(f"Encontradas {len(accounts)} contas para recalcular.")
-
-        for acc in accounts:
-            try:
-                # Calcula o saldo atual da conta
-                balance = crud_account.get_balance(db, acc.id)
-                # Registra no balance_history para a data de hoje
-                crud_account._record_history(db, acc.id, balance)
-                print(f"Conta '{acc.name}' (ID: {acc.id}) recalculada. Saldo: {balance}")
-            except Exception as e:
-                print(f"Erro ao recalcular conta {acc.id}: {e}")
-
-        db.commit()
-        print("Recalculo concluído com sucesso.")
+        total_rows = balance_history_rebuilder.rebuild_all(
+            SessionLocal,
+            mode=mode,
+            chunk_size=chunk_size,
+            workers=workers,
+            progress_path=progress_path,
+            on_chunk=report
+        )
     except Exception as e:
         print(f"Erro geral durante o recalculo: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        if progress_path:
+            print(f"Rode novamente com --progress {progress_path} para continuar de onde parou.")
+        raise
+
+    print(f"Recalculo concluído com sucesso: {total_rows} linhas em {time.perf_counter() - start:.1f}s.")
+    if progress_path and os.path.exists(progress_path):
+        os.remove(progress_path)
+    return total_rows
 
 if __name__ == "__main__":
-    recalculate_history()
+    parser = argparse.ArgumentParser(description="Reconstrói balance_history de todas as contas.")
+    parser.add_argument("--mode", choices=MODES, default="daily", help="daily: uma linha por dia com movimento; month-end: uma por fim de mês")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Usuários por lote")
+    parser.add_argument("--workers", type=int, default=4, help="Lotes processados em paralelo")
+    parser.add_argument("--progress", default="recalculate_history.progress.json", help="Arquivo de progresso para retomar uma execução interrompida")
+    args = parser.parse_args()
+
+    recalculate_history(mode=args.mode, chunk_size=args.chunk_size, workers=args.workers, progress_path=args.progress)
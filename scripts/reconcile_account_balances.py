@@ -0,0 +1,39 @@
+import sys
+import os
+import argparse
+
+# Adiciona o diretório raiz ao path para importar os módulos do app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.crud.ledger import ledger
+
+def reconcile_account_balances(fix: bool = False) -> int:
+    db = SessionLocal()
+    try:
+        mismatches = ledger.reconcile(db, fix=fix)
+        for m in mismatches:
+            stored = "ausente" if m["stored"] is None else m["stored"]
+            print(f"Conta {m['account_id']}: materializado={stored} recalculado={m['expected']}")
+
+        if not mismatches:
+            print("account_balances consistente com o recálculo completo.")
+        elif fix:
+            print(f"{len(mismatches)} conta(s) corrigida(s).")
+        else:
+            print(f"{len(mismatches)} divergência(s) encontrada(s). Rode com --fix para corrigir.")
+        return len(mismatches)
+    except Exception as e:
+        print(f"Erro durante a reconciliação: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Confere account_balances contra o recálculo completo dos saldos.")
+    parser.add_argument("--fix", action="store_true", help="Recalcula as contas divergentes")
+    args = parser.parse_args()
+
+    mismatches = reconcile_account_balances(fix=args.fix)
+    sys.exit(1 if mismatches and not args.fix else 0)
@@ -0,0 +1,142 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import AccountType
+from app.models.account_balance import AccountBalance
+from app.models.category import Category, CategoryType
+from app.models.transaction import Transaction, TransactionNature
+from app.models.recurring_expense import RecurringType
+from app.schemas.account import AccountCreate, AccountUpdate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate, UnifiedTransactionCreate
+from app.crud.account import account as crud_account
+from app.crud.transaction import transaction as crud_transaction
+from app.crud.recurring_expense import recurring_expense as crud_recurring_expense
+from app.crud.ledger import ledger
+from app.services.transaction_service import create_unified_transaction
+from app.services.financial_engine import financial_engine
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_account_balances.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_account_balances.db"):
+        os.remove("./test_account_balances.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def setup(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    cat = Category(id=uuid.uuid4(), name="Compra", type=CategoryType.expense, user_id=user_id)
+    db.add(cat)
+    db.commit()
+
+    acc = crud_account.create_with_user(
+        db,
+        obj_in=AccountCreate(name="Main", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2024, 1, 1)),
+        user_id=user_id
+    )
+    return user_id, acc, cat
+
+def stored(db, account_id):
+    db.expire_all()
+    return db.scalar(select(AccountBalance.ledger_balance).where(AccountBalance.account_id == account_id))
+
+def test_account_creation_materializes_balance(db, setup):
+    _, acc, _ = setup
+    assert stored(db, acc.id) == Decimal("1000.00")
+
+def test_create_update_delete_keep_table_in_sync(db, setup):
+    user_id, acc, cat = setup
+    tx = crud_transaction.create_with_user(
+        db,
+        obj_in=TransactionCreate(description="Mercado", amount=Decimal("-200.00"), nature=TransactionNature.EXPENSE, date=date(2024, 2, 1), account_id=acc.id, category_id=cat.id),
+        user_id=user_id
+    )
+    assert stored(db, acc.id) == Decimal("800.00")
+
+    crud_transaction.update(db, db_obj=tx, obj_in=TransactionUpdate(amount=Decimal("-150.00")))
+    assert stored(db, acc.id) == Decimal("850.00")
+
+    # Moving before initial_balance_date removes its contribution
+    crud_transaction.update(db, db_obj=tx, obj_in=TransactionUpdate(date=date(2023, 12, 1)))
+    assert stored(db, acc.id) == Decimal("1000.00")
+
+    crud_transaction.update(db, db_obj=tx, obj_in=TransactionUpdate(date=date(2024, 3, 1)))
+    crud_transaction.remove_by_user(db, id=tx.id, user_id=user_id)
+    assert stored(db, acc.id) == Decimal("1000.00")
+    assert ledger.reconcile(db) == []
+
+def test_installments_and_propagation(db, setup):
+    user_id, acc, cat = setup
+    first = create_unified_transaction(db, UnifiedTransactionCreate(
+        description="Notebook",
+        category_id=cat.id,
+        amount=Decimal("3000.00"),
+        nature=TransactionNature.EXPENSE,
+        date=date(2024, 1, 10),
+        account_id=acc.id,
+        is_recurring=True,
+        recurring_type=RecurringType.installment,
+        total_installments=3
+    ), user_id)
+    assert stored(db, acc.id) == Decimal("-2000.00")
+
+    rec = crud_recurring_expense.get_by_user(db, first.recurring_expense_id, user_id)
+    rec.amount = Decimal("1500.00")
+    db.commit()
+    crud_recurring_expense.propagate_changes(db, db_obj=rec, apply_from=date(2024, 2, 1), user_id=user_id)
+    # 1000 - 1000 (1/3) - 500 - 500
+    assert stored(db, acc.id) == Decimal("-1000.00")
+    assert ledger.reconcile(db) == []
+
+    crud_recurring_expense.remove_by_user(db, id=rec.id, user_id=user_id)
+    assert stored(db, acc.id) == Decimal("1000.00")
+
+def test_future_transactions_excluded_from_current_balance(db, setup):
+    user_id, acc, cat = setup
+    crud_transaction.create_with_user(
+        db,
+        obj_in=TransactionCreate(description="Agendada", amount=Decimal("-300.00"), nature=TransactionNature.EXPENSE, date=date(2999, 1, 1), account_id=acc.id, category_id=cat.id),
+        user_id=user_id
+    )
+    assert stored(db, acc.id) == Decimal("700.00")
+    assert financial_engine.get_account_balance(db, acc.id) == Decimal("1000.00")
+    assert financial_engine.get_balances(db, user_id, as_of=date(2999, 1, 1)) == {acc.id: Decimal("700.00")}
+
+def test_initial_balance_change_and_reconcile_fix(db, setup):
+    user_id, acc, _ = setup
+    crud_account.update(db, db_obj=acc, obj_in=AccountUpdate(initial_balance=Decimal("50.00")))
+    assert stored(db, acc.id) == Decimal("50.00")
+
+    # Simulate drift (e.g. a write that bypassed the CRUD layer)
+    db.add(Transaction(description="Bypass", amount=Decimal("25.00"), nature=TransactionNature.INCOME, date=date(2024, 5, 1), account_id=acc.id, user_id=user_id))
+    db.commit()
+
+    mismatches = ledger.reconcile(db)
+    assert len(mismatches) == 1
+    assert mismatches[0]["expected"] == Decimal("75.00")
+
+    ledger.reconcile(db, fix=True)
+    assert stored(db, acc.id) == Decimal("75.00")
+    assert ledger.reconcile(db) == []
@@ -0,0 +1,200 @@
+import pytest
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+import pytz
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.goal import Goal
+from app.models.transaction import Transaction, TransactionNature
+from app.crud.monthly_rollup import monthly_rollup
+from app.services.result_cache import result_cache
+from app.services.analytics import analytics_service
+from app.services.analytics_bundle import analytics_bundle
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_analytics_bundle.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_analytics_bundle.db"):
+        os.remove("./test_analytics_bundle.db")
+
+def hyphenated(column: str) -> str:
+    # user_id com hífens, no formato do parâmetro :user_id (o SQLite guarda o UUID como 32 dígitos hex)
+    return (
+        f"substr({column}, 1, 8) || '-' || substr({column}, 9, 4) || '-' || substr({column}, 13, 4)"
+        f" || '-' || substr({column}, 17, 4) || '-' || substr({column}, 21)"
+    )
+
+# Versões SQLite das views lidas pelas partes testadas (v_account_balances sem o corte em CURRENT_DATE)
+VIEWS = {
+    "v_account_balances": f"""
+        CREATE VIEW v_account_balances AS
+        SELECT a.id, a.type, {hyphenated("a.user_id")} AS user_id,
+            a.initial_balance + COALESCE(SUM(CASE
+                WHEN t.date >= a.initial_balance_date AND t.deleted_at IS NULL THEN t.amount ELSE 0
+            END), 0) AS current_balance
+        FROM accounts a
+        LEFT JOIN transactions t ON a.id = t.account_id
+        GROUP BY a.id, a.type, a.user_id, a.initial_balance, a.initial_balance_date
+    """,
+    "v_net_worth": """
+        CREATE VIEW v_net_worth AS
+        SELECT user_id, COALESCE(SUM(current_balance), 0) AS net_worth
+        FROM v_account_balances
+        GROUP BY user_id
+    """,
+    "v_goal_progress": f"""
+        CREATE VIEW v_goal_progress AS
+        SELECT
+            g.id,
+            {hyphenated("g.user_id")} AS user_id,
+            g.name,
+            g.target_amount,
+            g.goal_type,
+            g.start_date,
+            g.target_date,
+            nw.net_worth AS current_amount,
+            CASE
+                WHEN date('now') < g.start_date THEN 0
+                WHEN g.target_amount > 0 THEN ROUND((CAST(nw.net_worth AS FLOAT) / CAST(g.target_amount AS FLOAT)) * 100, 2)
+                ELSE 0
+            END AS percentage_completed,
+            CASE WHEN g.target_amount - nw.net_worth > 0 THEN g.target_amount - nw.net_worth ELSE 0 END AS remaining_amount,
+            CASE WHEN julianday(g.target_date) - julianday('now', 'start of day') > 0 THEN CAST(julianday(g.target_date) - julianday('now', 'start of day') AS INTEGER) ELSE 0 END AS days_remaining,
+            CASE
+                WHEN date('now') < g.start_date THEN 1
+                WHEN date('now') > g.target_date THEN nw.net_worth >= g.target_amount
+                ELSE
+                    nw.net_worth >= (
+                        g.target_amount * (
+                            (julianday('now', 'start of day') - julianday(g.start_date)) /
+                            NULLIF((julianday(g.target_date) - julianday(g.start_date)), 0)
+                        )
+                    )
+            END AS on_track
+        FROM financial_goals g
+        JOIN v_net_worth nw ON {hyphenated("g.user_id")} = nw.user_id
+        WHERE g.deleted_at IS NULL
+    """,
+}
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for ddl in VIEWS.values():
+            conn.execute(text(ddl))
+    result_cache.clear()
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        result_cache.clear()
+        with engine.begin() as conn:
+            for view in reversed(list(VIEWS)):
+                conn.execute(text(f"DROP VIEW {view}"))
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_id(db):
+    user_id = uuid.uuid4()
+    bank_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    db.add(Account(id=bank_id, name="Banco", type=AccountType.banco, initial_balance=Decimal("1000"), initial_balance_date=date(2020, 1, 1), user_id=user_id))
+    db.add(Account(id=uuid.uuid4(), name="Cartão", type=AccountType.cartao_credito, initial_balance=Decimal("-200"), initial_balance_date=date(2020, 1, 1), user_id=user_id))
+    db.add(Goal(id=uuid.uuid4(), name="Reserva", target_amount=Decimal("10000"), start_date=date(2020, 1, 1), target_date=date(2099, 1, 1), user_id=user_id))
+
+    last_month = datetime.now(pytz.timezone("America/Sao_Paulo")).date().replace(day=1) - relativedelta(months=1)
+    for amount, nature in (("3000", TransactionNature.INCOME), ("-1000", TransactionNature.EXPENSE)):
+        db.add(Transaction(
+            id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=nature,
+            date=last_month + relativedelta(days=4), account_id=bank_id, user_id=user_id
+        ))
+    db.flush()
+    monthly_rollup.rebuild(db, [user_id])
+    db.commit()
+    return user_id
+
+def today():
+    return datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+
+def test_shared_reads_happen_once(db, user_id):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        bundle = analytics_bundle.get_bundle(
+            db, user_id=user_id,
+            parts=["net_worth", "assets_liabilities", "account_balances", "forecast", "goals_progress", "savings_rate"]
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len([s for s in statements if "v_account_balances" in s]) == 1
+    assert len([s for s in statements if "monthly_rollups" in s]) == 1
+
+    assert bundle.errors == {}
+    assert bundle.net_worth.net_worth == Decimal("2800")
+    assert bundle.account_balances == analytics_service.get_account_balances(db, user_id=user_id)
+    assert {a.classification: a.total for a in bundle.assets_liabilities} == {"asset": Decimal("3000"), "liability": Decimal("200")}
+    assert bundle.forecast.avg_monthly_result_last_3m == Decimal("2000")
+    assert bundle.forecast.projected_3m == Decimal("8800")
+    assert bundle.forecast.months_until_zero is None
+    assert bundle.savings_rate[-1].savings_rate == pytest.approx(0.6667)
+    goal = bundle.goals_progress[0]
+    assert goal.current_amount == Decimal("2800")
+    assert goal.percentage_completed == 28.0
+    assert goal.remaining_amount == Decimal("7200")
+    assert goal == analytics_service.get_goals_progress(db, user_id=user_id)[0]
+    assert bundle.burn_rate is None and bundle.operational_monthly is None
+
+def test_failing_part_rolls_back_only_its_savepoint(db, user_id, monkeypatch):
+    def broken(db, user_id):
+        db.execute(text("SELECT * FROM tabela_inexistente"))
+    monkeypatch.setattr(analytics_service, "get_burn_rate", broken)
+    user = db.get(User, user_id)
+
+    bundle = analytics_bundle.get_bundle(db, user_id=user_id, parts=["burn_rate", "net_worth", "operational_monthly"])
+
+    assert list(bundle.errors) == ["burn_rate"]
+    assert bundle.burn_rate is None
+    assert bundle.net_worth.net_worth == Decimal("2800")
+    assert bundle.operational_monthly[-1].net_result == Decimal("2000")
+    # A transação de quem chamou continua: nada foi expirado
+    assert "username" in user.__dict__
+
+def test_zero_length_goal(db, user_id):
+    db.add(Goal(id=uuid.uuid4(), name="Hoje", target_amount=Decimal("1000"), start_date=today(), target_date=today(), user_id=user_id))
+    db.commit()
+
+    bundle = analytics_bundle.get_bundle(db, user_id=user_id, parts=["goals_progress"])
+
+    assert bundle.errors == {}
+    goal = next(g for g in bundle.goals_progress if g.name == "Hoje")
+    assert goal.days_remaining == 0
+    assert goal.on_track is True
+
+def test_zero_length_goal_in_goal_progress_view(db, user_id):
+    # Início e prazo no mesmo dia (o de date('now'), usado pela view)
+    view_today = date.fromisoformat(db.execute(text("SELECT date('now')")).scalar())
+    db.add(Goal(id=uuid.uuid4(), name="Hoje", target_amount=Decimal("1000"), start_date=view_today, target_date=view_today, user_id=user_id))
+    db.commit()
+
+    goal = next(g for g in analytics_service.get_goals_progress(db, user_id=user_id) if g.name == "Hoje")
+    assert goal.on_track is True
+
+def test_unknown_part_is_rejected(db, user_id):
+    with pytest.raises(ValueError):
+        analytics_bundle.get_bundle(db, user_id=user_id, parts=["net_worth", "unknown"])
@@ -0,0 +1,187 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event, select, func
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.balance_checkpoint import BalanceCheckpoint
+from app.models.category import Category, CategoryType
+from app.models.transaction import TransactionNature
+from app.schemas.account import AccountCreate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.crud.account import account as crud_account
+from app.crud.transaction import transaction as crud_transaction
+from app.crud import balance_checkpoint as checkpoint_module
+from app.crud.balance_checkpoint import balance_checkpoint
+from app.services.financial_engine import financial_engine
+from app.services import memo
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_balance_as_of.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_balance_as_of.db"):
+        os.remove("./test_balance_as_of.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def setup(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    cat = Category(id=uuid.uuid4(), name="Compra", type=CategoryType.expense, user_id=user_id)
+    db.add(cat)
+    db.commit()
+
+    accounts = [
+        crud_account.create_with_user(
+            db,
+            obj_in=AccountCreate(name=f"Conta {i}", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2024, 1, 1)),
+            user_id=user_id
+        )
+        for i in range(2)
+    ]
+    return user_id, accounts, cat
+
+def add(db, user_id, acc, cat, amount, tx_date):
+    return crud_transaction.create_with_user(
+        db,
+        obj_in=TransactionCreate(description="T", amount=Decimal(amount), nature=TransactionNature.EXPENSE, date=tx_date, account_id=acc.id, category_id=cat.id),
+        user_id=user_id
+    )
+
+def checkpoints(db):
+    db.expire_all()
+    return db.scalar(select(func.count()).select_from(BalanceCheckpoint))
+
+def test_balance_as_of_matches_full_recalculation(db, setup):
+    user_id, accounts, cat = setup
+    add(db, user_id, accounts[0], cat, "-100.00", date(2024, 1, 15))
+    add(db, user_id, accounts[0], cat, "-50.00", date(2024, 3, 31))
+    add(db, user_id, accounts[1], cat, "-10.00", date(2024, 4, 1))
+
+    dates = [date(2023, 12, 31), date(2024, 1, 31), date(2024, 3, 30), date(2024, 3, 31), date(2024, 6, 15)]
+    result = financial_engine.balance_as_of(db, [acc.id for acc in accounts], dates)
+
+    assert checkpoints(db) > 0
+    for acc in accounts:
+        for d in dates:
+            expected = Decimal(0) if d < date(2024, 1, 1) else financial_engine.get_balances(db, user_id, as_of=d)[acc.id]
+            assert result[(acc.id, d)] == expected
+    assert result[(accounts[0].id, date(2024, 3, 31))] == Decimal("850.00")
+
+def test_backdated_write_invalidates_checkpoints(db, setup):
+    user_id, accounts, cat = setup
+    tx = add(db, user_id, accounts[0], cat, "-100.00", date(2024, 2, 10))
+    financial_engine.balance_as_of(db, [accounts[0].id], [date(2024, 5, 31)])
+    assert checkpoints(db) > 0
+
+    add(db, user_id, accounts[0], cat, "-40.00", date(2024, 1, 20))
+    crud_transaction.update(db, db_obj=tx, obj_in=TransactionUpdate(amount=Decimal("-60.00")))
+    result = financial_engine.balance_as_of(db, [accounts[0].id], [date(2024, 1, 31), date(2024, 5, 31)])
+
+    assert result[(accounts[0].id, date(2024, 1, 31))] == Decimal("960.00")
+    assert result[(accounts[0].id, date(2024, 5, 31))] == Decimal("900.00")
+
+def test_ensure_extends_from_latest_checkpoint(db, setup):
+    user_id, accounts, cat = setup
+    add(db, user_id, accounts[0], cat, "-100.00", date(2024, 2, 10))
+    balance_checkpoint.ensure(db, [accounts[0].id], through=date(2024, 2, 29))
+    assert checkpoints(db) == 2
+
+    add(db, user_id, accounts[0], cat, "-25.00", date(2024, 4, 5))
+    assert balance_checkpoint.ensure(db, [accounts[0].id], through=date(2024, 4, 30)) == 2
+    stored = db.scalar(
+        select(BalanceCheckpoint.balance).where(
+            BalanceCheckpoint.account_id == accounts[0].id,
+            BalanceCheckpoint.month_end == date(2024, 4, 30)
+        )
+    )
+    assert stored == Decimal("875.00")
+
+def test_balance_as_of_single_query(db, setup):
+    user_id, accounts, cat = setup
+    add(db, user_id, accounts[0], cat, "-100.00", date(2024, 2, 10))
+    dates = [date(2024, m, 1) for m in range(1, 13)]
+    financial_engine.balance_as_of(db, [acc.id for acc in accounts], dates)
+    # Nova requisição: sem o memo da chamada anterior
+    memo.clear(db)
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        result = financial_engine.balance_as_of(db, [acc.id for acc in accounts], dates)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(result) == 24
+    selects = [s for s in statements if "balance_checkpoints" in s and "transactions" in s]
+    assert len(selects) == 1
+
+def test_read_path_never_commits_request_session(db, setup):
+    user_id, accounts, cat = setup
+    add(db, user_id, accounts[0], cat, "-100.00", date(2024, 2, 10))
+    commits = []
+
+    def count(session):
+        commits.append(session)
+
+    event.listen(db, "after_commit", count)
+    try:
+        financial_engine.balance_as_of(db, [accounts[0].id], [date(2024, 5, 31)])
+        # Gravados pela sessão própria de ensure()
+        assert checkpoints(db) > 0
+
+        # Escrita pendente: a leitura não grava checkpoints nem confirma a sessão
+        db.add(Category(id=uuid.uuid4(), name="Pendente", type=CategoryType.expense, user_id=user_id))
+        assert balance_checkpoint.ensure(db, [accounts[1].id], through=date(2024, 5, 31)) == 0
+        assert len(db.new) == 1
+    finally:
+        event.remove(db, "after_commit", count)
+    assert commits == []
+    db.rollback()
+
+def test_concurrent_backdated_write_between_read_and_insert(db, setup, monkeypatch):
+    user_id, accounts, cat = setup
+    add(db, user_id, accounts[0], cat, "-100.00", date(2024, 2, 10))
+    real_session = checkpoint_module.Session
+
+    def session_after_concurrent_write(*args, **kwargs):
+        # Outra requisição confirma uma escrita retroativa (invalidate + commit) depois das
+        # leituras de ensure() e antes do insert dos checkpoints
+        other = TestingSessionLocal()
+        try:
+            add(other, user_id, other.get(Account, accounts[0].id), other.get(Category, cat.id), "-40.00", date(2024, 1, 20))
+        finally:
+            other.close()
+        return real_session(*args, **kwargs)
+
+    monkeypatch.setattr(checkpoint_module, "Session", session_after_concurrent_write)
+    assert balance_checkpoint.ensure(db, [accounts[0].id], through=date(2024, 5, 31)) == 0
+    monkeypatch.setattr(checkpoint_module, "Session", real_session)
+    assert checkpoints(db) == 0
+
+    memo.clear(db)
+    result = financial_engine.balance_as_of(db, [accounts[0].id], [date(2024, 5, 31)])
+    assert result[(accounts[0].id, date(2024, 5, 31))] == Decimal("860.00")
@@ -0,0 +1,110 @@
+import json
+import pytest
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.balance_history import BalanceHistory
+from app.models.transaction import Transaction, TransactionNature
+from app.services.balance_history_rebuild import balance_history_rebuilder
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_balance_history_rebuild.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+TODAY = date(2024, 3, 20)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_balance_history_rebuild.db"):
+        os.remove("./test_balance_history_rebuild.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        with patch.object(balance_history_rebuilder, "_today", return_value=TODAY):
+            yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+def create_user(db, n):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username=f"user_{n}", hashed_password="pw"))
+    acc = Account(id=uuid.uuid4(), name="Main", type=AccountType.banco, initial_balance=Decimal("100.00"), initial_balance_date=date(2024, 1, 5), user_id=user_id)
+    db.add(acc)
+
+    def add(amount, tx_date, **kwargs):
+        db.add(Transaction(id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=TransactionNature.EXPENSE, date=tx_date, account_id=acc.id, user_id=user_id, **kwargs))
+
+    add("-10.00", date(2024, 1, 10))
+    add("-5.00", date(2024, 1, 10))
+    add("-20.00", date(2024, 2, 3))
+    add("-999.00", date(2024, 2, 4), deleted_at=datetime(2024, 2, 5))
+    add("50.00", date(2024, 3, 1))
+    add("-999.00", date(2024, 4, 1))  # futura
+    db.commit()
+    return acc
+
+def history(db, account_id):
+    db.expire_all()
+    return [
+        (h.date, h.balance)
+        for h in db.scalars(select(BalanceHistory).where(BalanceHistory.account_id == account_id).order_by(BalanceHistory.date))
+    ]
+
+def test_daily_rebuild(db):
+    acc = create_user(db, 0)
+    # Linha antiga (mesmo dia) é substituída; nada fica duplicado
+    db.add(BalanceHistory(account_id=acc.id, balance=Decimal("1.00"), date=date(2024, 1, 10)))
+    db.commit()
+
+    balance_history_rebuilder.rebuild_all(TestingSessionLocal, mode="daily", workers=1)
+
+    assert history(db, acc.id) == [
+        (date(2024, 1, 5), Decimal("100.00")),
+        (date(2024, 1, 10), Decimal("85.00")),
+        (date(2024, 2, 3), Decimal("65.00")),
+        (date(2024, 3, 1), Decimal("115.00")),
+    ]
+
+def test_month_end_rebuild(db):
+    acc = create_user(db, 0)
+    balance_history_rebuilder.rebuild_all(TestingSessionLocal, mode="month-end", workers=1)
+
+    assert history(db, acc.id) == [
+        (date(2024, 1, 31), Decimal("85.00")),
+        (date(2024, 2, 29), Decimal("65.00")),
+        (TODAY, Decimal("115.00")),
+    ]
+
+def test_parallel_chunks_and_resume(db, tmp_path):
+    accounts = [create_user(db, n) for n in range(5)]
+    users = sorted(str(acc.user_id) for acc in accounts)
+    progress = tmp_path / "progress.json"
+    # Execução anterior interrompida depois de processar os dois primeiros usuários
+    progress.write_text(json.dumps({"mode": "daily", "done_users": users[:2]}))
+
+    chunks = []
+    total = balance_history_rebuilder.rebuild_all(
+        TestingSessionLocal, mode="daily", chunk_size=2, workers=2,
+        progress_path=str(progress), on_chunk=lambda done, n, rows: chunks.append(rows)
+    )
+
+    assert len(chunks) == 2
+    assert total == 3 * 4
+    assert sorted(json.loads(progress.read_text())["done_users"]) == users
+    for acc in accounts:
+        expected = 4 if str(acc.user_id) in users[2:] else 0
+        assert len(history(db, acc.id)) == expected
@@ -0,0 +1,139 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import AccountType
+from app.models.balance_history import BalanceHistory
+from app.models.category import Category, CategoryType
+from app.models.transaction import Transaction, TransactionNature
+from app.schemas.account import AccountCreate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.crud.account import account as crud_account
+from app.crud.transaction import transaction as crud_transaction
+from app.crud.balance_history import balance_history
+from app.crud.ledger import ledger
+from app.services.financial_engine import financial_engine
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_balance_history_recording.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_balance_history_recording.db"):
+        os.remove("./test_balance_history_recording.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def setup(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    cat = Category(id=uuid.uuid4(), name="Compra", type=CategoryType.expense, user_id=user_id)
+    db.add(cat)
+    db.commit()
+
+    accounts = [
+        crud_account.create_with_user(
+            db,
+            obj_in=AccountCreate(name=f"Conta {i}", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2024, 1, 1)),
+            user_id=user_id
+        )
+        for i in range(2)
+    ]
+    return user_id, accounts, cat
+
+def today_history(db, account_id):
+    db.expire_all()
+    return db.scalars(
+        select(BalanceHistory.balance).where(
+            BalanceHistory.account_id == account_id,
+            BalanceHistory.date == financial_engine._today()
+        )
+    ).all()
+
+class Counter:
+    def __init__(self):
+        self.commits = 0
+        self.history_writes = 0
+
+    def __enter__(self):
+        event.listen(engine, "commit", self.on_commit)
+        event.listen(engine, "before_cursor_execute", self.on_execute)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(engine, "commit", self.on_commit)
+        event.remove(engine, "before_cursor_execute", self.on_execute)
+
+    def on_commit(self, conn):
+        self.commits += 1
+
+    def on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO balance_history"):
+            self.history_writes += 1
+
+def test_account_creation_records_history(db, setup):
+    _, accounts, _ = setup
+    assert today_history(db, accounts[0].id) == [Decimal("1000.00")]
+
+def test_write_records_history_in_same_commit(db, setup):
+    user_id, accounts, cat = setup
+    with Counter() as counter:
+        tx = crud_transaction.create_with_user(
+            db,
+            obj_in=TransactionCreate(description="Mercado", amount=Decimal("-200.00"), nature=TransactionNature.EXPENSE, date=date(2024, 2, 1), account_id=accounts[0].id, category_id=cat.id),
+            user_id=user_id
+        )
+    assert counter.commits == 1
+    assert counter.history_writes == 1
+    assert today_history(db, accounts[0].id) == [Decimal("800.00")]
+
+    # Mudança de conta atualiza as duas contas, ainda com um único commit
+    with Counter() as counter:
+        crud_transaction.update(db, db_obj=tx, obj_in=TransactionUpdate(account_id=accounts[1].id))
+    assert counter.commits == 1
+    assert counter.history_writes == 1
+    assert today_history(db, accounts[0].id) == [Decimal("1000.00")]
+    assert today_history(db, accounts[1].id) == [Decimal("800.00")]
+
+def test_transfer_writes_both_accounts_in_one_statement(db, setup):
+    user_id, accounts, _ = setup
+    group = uuid.uuid4()
+    for acc, amount in [(accounts[0], "-300.00"), (accounts[1], "300.00")]:
+        db.add(Transaction(description="Transf", amount=Decimal(amount), date=date(2024, 3, 1), account_id=acc.id, nature=TransactionNature.TRANSFER, transfer_group_id=group, user_id=user_id))
+    ledger.apply(db, Transaction.transfer_group_id == group)
+
+    with Counter() as counter:
+        db.commit()
+    assert counter.commits == 1
+    assert counter.history_writes == 1
+    assert today_history(db, accounts[0].id) == [Decimal("700.00")]
+    assert today_history(db, accounts[1].id) == [Decimal("1300.00")]
+
+def test_rollback_discards_pending_accounts(db, setup):
+    user_id, accounts, _ = setup
+    db.add(Transaction(description="X", amount=Decimal("-1.00"), date=date(2024, 3, 1), account_id=accounts[0].id, nature=TransactionNature.EXPENSE, user_id=user_id))
+    db.flush()
+    ledger.apply(db, Transaction.account_id == accounts[0].id)
+    assert balance_history.pending(db) == {accounts[0].id}
+
+    db.rollback()
+    assert balance_history.pending(db) == set()
+    assert today_history(db, accounts[0].id) == [Decimal("1000.00")]
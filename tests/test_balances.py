@@ -0,0 +1,130 @@
+import pytest
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.transaction import Transaction, TransactionNature
+from app.services.financial_engine import financial_engine
+from app.crud.account import account as crud_account
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_balances.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def setup_database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+    import os
+    if os.path.exists("./test_balances.db"):
+        os.remove("./test_balances.db")
+
+@pytest.fixture
+def db():
+    session = TestingSessionLocal()
+    session.query(Transaction).delete()
+    session.query(Account).delete()
+    session.query(User).delete()
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+
+def create_user_with_accounts(db, n_accounts=3):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username=f"user_{user_id}", hashed_password="pw"))
+
+    accounts = []
+    for i in range(n_accounts):
+        acc = Account(
+            id=uuid.uuid4(),
+            name=f"Conta {i}",
+            type=AccountType.banco if i % 2 == 0 else AccountType.cartao_credito,
+            initial_balance=Decimal("100.00") * (i + 1),
+            initial_balance_date=date(2024, 1, 1),
+            user_id=user_id
+        )
+        accounts.append(acc)
+    db.add_all(accounts)
+    db.commit()
+    return user_id, accounts
+
+def add_tx(db, account, user_id, amount, tx_date, **kwargs):
+    db.add(Transaction(
+        id=uuid.uuid4(),
+        description="T",
+        amount=Decimal(amount),
+        nature=TransactionNature.EXPENSE if Decimal(amount) < 0 else TransactionNature.INCOME,
+        date=tx_date,
+        account_id=account.id,
+        user_id=user_id,
+        **kwargs
+    ))
+
+def test_get_balances_matches_per_account_balance(db):
+    user_id, accounts = create_user_with_accounts(db)
+    add_tx(db, accounts[0], user_id, "50.00", date(2024, 2, 1))
+    add_tx(db, accounts[0], user_id, "-20.00", date(2024, 3, 1))
+    add_tx(db, accounts[1], user_id, "-75.50", date(2024, 2, 10))
+    # Before initial_balance_date, deleted and future transactions are ignored
+    add_tx(db, accounts[2], user_id, "999.00", date(2023, 12, 31))
+    add_tx(db, accounts[2], user_id, "999.00", date(2024, 2, 1), deleted_at=datetime(2024, 2, 2))
+    add_tx(db, accounts[2], user_id, "999.00", date.today() + timedelta(days=400))
+    db.commit()
+
+    balances = financial_engine.get_balances(db, user_id)
+
+    assert balances == {
+        acc.id: financial_engine.get_account_balance(db, acc.id) for acc in accounts
+    }
+    assert balances[accounts[0].id] == Decimal("130.00")
+    assert balances[accounts[1].id] == Decimal("124.50")
+    assert balances[accounts[2].id] == Decimal("300.00")
+
+def test_get_balances_as_of(db):
+    user_id, accounts = create_user_with_accounts(db, n_accounts=1)
+    add_tx(db, accounts[0], user_id, "50.00", date(2024, 2, 1))
+    add_tx(db, accounts[0], user_id, "-20.00", date(2024, 3, 1))
+    db.commit()
+
+    assert financial_engine.get_balances(db, user_id, as_of=date(2024, 2, 15)) == {accounts[0].id: Decimal("150.00")}
+
+def test_get_balances_single_round_trip(db):
+    user_id, accounts = create_user_with_accounts(db, n_accounts=15)
+    for acc in accounts:
+        add_tx(db, acc, user_id, "-10.00", date(2024, 2, 1))
+    db.commit()
+    db.expunge_all()
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        result = crud_account.get_multi_with_balance(db, user_id=user_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(result) == 15
+    assert len(statements) == 1
+
+def test_net_worth_and_available_balance(db):
+    user_id, accounts = create_user_with_accounts(db)
+    add_tx(db, accounts[1], user_id, "-300.00", date(2024, 2, 10))
+    db.commit()
+
+    # banco: 100 + 300 ; cartao_credito: 200 - 300 = -100 (passivo de 100)
+    assert financial_engine.calculate_available_balance(db, user_id) == Decimal("400.00")
+    net_worth = financial_engine.calculate_net_worth(db, user_id)
+    assert net_worth["assets"] == Decimal("400.00")
+    assert net_worth["liabilities"] == Decimal("100.00")
+    assert net_worth["net_worth"] == Decimal("300.00")
@@ -0,0 +1,107 @@
+import pytest
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+import pytz
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.transaction import Transaction, TransactionNature
+from app.crud.monthly_rollup import monthly_rollup
+from app.services.analytics import analytics_service
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_burn_rate.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_burn_rate.db"):
+        os.remove("./test_burn_rate.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_id(db):
+    user_id = uuid.uuid4()
+    acc_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    db.add(Account(id=acc_id, name="Main", type=AccountType.banco, initial_balance=Decimal("0"), initial_balance_date=date(2020, 1, 1), user_id=user_id))
+
+    current_month = datetime.now(pytz.timezone("America/Sao_Paulo")).date().replace(day=1)
+    # Mês fechado k (1 = mês passado) gasta 100 * k; o mês atual não entra
+    for k in range(0, 13):
+        db.add(Transaction(
+            id=uuid.uuid4(), description=f"M{k}", amount=Decimal(-100 * k if k else -5000),
+            nature=TransactionNature.EXPENSE, date=current_month - relativedelta(months=k) + relativedelta(days=4),
+            account_id=acc_id, user_id=user_id
+        ))
+    db.add(Transaction(
+        id=uuid.uuid4(), description="Salário", amount=Decimal("3000"), nature=TransactionNature.INCOME,
+        date=current_month - relativedelta(months=1), account_id=acc_id, user_id=user_id
+    ))
+    db.flush()
+    monthly_rollup.rebuild(db, [user_id])
+    db.commit()
+    return user_id
+
+def test_default_window_keeps_legacy_fields(db, user_id):
+    data = analytics_service.get_burn_rate(db, user_id=user_id)
+    assert data["window_months"] == 3
+    assert data["avg_monthly_expense_last_3m"] == Decimal("200")  # meses 1..3
+    assert data["previous_3m_avg"] == Decimal("500")  # meses 4..6
+    assert data["trend"] == "DOWN"
+    assert data["avg_monthly_expense"] == data["avg_monthly_expense_last_3m"]
+    assert len(data["series"]) == 1
+
+def test_rolling_series_in_one_statement(db, user_id):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        data = analytics_service.get_burn_rate(db, user_id=user_id, window=6, points=3)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len([s for s in statements if "monthly_rollups" in s]) == 1
+    current_month = datetime.now(pytz.timezone("America/Sao_Paulo")).date().replace(day=1)
+    series = data["series"]
+    assert [p["month"] for p in series] == [current_month - relativedelta(months=k) for k in (3, 2, 1)]
+    # Ponto mais recente: meses 1..6 contra 7..12
+    assert series[-1]["avg_monthly_expense"] == Decimal("350")
+    assert series[-1]["previous_avg"] == Decimal("950")
+    # Ponto mais antigo: meses 3..8 contra 9..12 (só há dados até o mês 12)
+    assert series[0]["avg_monthly_expense"] == Decimal("550")
+    assert series[0]["previous_avg"] == Decimal("1050")
+    assert data["avg_monthly_expense"] == series[-1]["avg_monthly_expense"]
+    assert data["previous_avg"] == series[-1]["previous_avg"]
+    assert data["window_trend"] == "DOWN"
+
+def test_legacy_fields_stay_three_months_for_other_windows(db, user_id):
+    data = analytics_service.get_burn_rate(db, user_id=user_id, window=12)
+    assert data["avg_monthly_expense_last_3m"] == Decimal("200")
+    assert data["previous_3m_avg"] == Decimal("500")
+    assert data["trend"] == "DOWN"
+    # Meses 1..12; a janela anterior (13..24) não tem dados
+    assert data["avg_monthly_expense"] == Decimal("650")
+    assert data["previous_avg"] == Decimal("0")
+    assert data["window_trend"] == "STABLE"
+
+def test_rejects_unknown_window(db, user_id):
+    with pytest.raises(ValueError):
+        analytics_service.get_burn_rate(db, user_id=user_id, window=5)
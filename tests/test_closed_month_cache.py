@@ -0,0 +1,149 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import AccountType
+from app.models.category import Category, CategoryType
+from app.models.closed_month_cache import ClosedMonthCache
+from app.models.transaction import TransactionNature
+from app.schemas.account import AccountCreate
+from app.schemas.transaction import TransactionCreate
+from app.crud.account import account as crud_account
+from app.crud.transaction import transaction as crud_transaction
+from app.services.result_cache import result_cache
+from app.services.closed_months import closed_month_results
+from app.services.analytics import analytics_service
+from app.services.summary import summary_service
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_closed_month_cache.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_closed_month_cache.db"):
+        os.remove("./test_closed_month_cache.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    result_cache.clear()
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        result_cache.clear()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def setup(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    food = Category(id=uuid.uuid4(), name="Mercado", type=CategoryType.expense, user_id=user_id)
+    db.add(food)
+    db.commit()
+    acc = crud_account.create_with_user(
+        db,
+        obj_in=AccountCreate(name="Main", type=AccountType.banco, initial_balance=Decimal("0"), initial_balance_date=date(2024, 1, 1)),
+        user_id=user_id
+    )
+    for tx_date in (date(2024, 3, 8), date(2024, 4, 8)):
+        create(db, user_id, "-300.00", tx_date, category_id=food.id, account_id=acc.id)
+    return user_id, acc, food
+
+def create(db, user_id, amount, tx_date, **kwargs):
+    return crud_transaction.create_with_user(
+        db,
+        obj_in=TransactionCreate(description="T", amount=Decimal(amount), nature=TransactionNature.EXPENSE, date=tx_date, **kwargs),
+        user_id=user_id
+    )
+
+def rollup_reads(fn):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, len([s for s in statements if "monthly_rollups" in s])
+
+def cached_months(db, user_id, endpoint):
+    db.expire_all()
+    return {row.month for row in db.scalars(select(ClosedMonthCache).where(
+        ClosedMonthCache.user_id == user_id, ClosedMonthCache.endpoint == endpoint
+    ))}
+
+def test_closed_month_served_from_table(db, setup):
+    user_id, _, _ = setup
+    first, reads = rollup_reads(lambda: analytics_service.get_sankey_data(db, user_id=user_id, year=2024, month=3))
+    assert reads == 1
+    assert cached_months(db, user_id, "analytics.sankey_month") == {date(2024, 3, 1)}
+
+    result_cache.clear()
+    again, reads = rollup_reads(lambda: analytics_service.get_sankey_data(db, user_id=user_id, year=2024, month=3))
+    assert reads == 0
+    assert again == first
+
+def test_backdated_write_invalidates_only_its_month(db, setup, monkeypatch):
+    user_id, acc, food = setup
+    analytics_service.get_period_summary(db, user_id=user_id, start_year=2024, start_month=3, end_year=2024, end_month=4)
+
+    create(db, user_id, "-50.00", date(2024, 3, 20), category_id=food.id, account_id=acc.id)
+    result_cache.clear()
+
+    computed = []
+    original = analytics_service._period_month_partials
+    monkeypatch.setattr(analytics_service, "_period_month_partials", lambda db, user_id, months: computed.append(months) or original(db, user_id, months))
+    summary = analytics_service.get_period_summary(db, user_id=user_id, start_year=2024, start_month=3, end_year=2024, end_month=4)
+
+    assert computed == [[date(2024, 3, 1)]]
+    assert [m.total_expense for m in summary.months] == [Decimal("350.00"), Decimal("300.00")]
+    assert summary.top_categories[0].total == Decimal("650.00")
+
+def test_category_rename_invalidates_user_months(db, setup):
+    user_id, _, food = setup
+    summary_service.get_monthly_summary(db, 2024, 3, user_id=user_id)
+
+    food.name = "Supermercado"
+    db.commit()
+    result_cache.clear()
+
+    monthly = summary_service.get_monthly_summary(db, 2024, 3, user_id=user_id)
+    assert list(monthly.expenses_by_category) == ["Supermercado"]
+
+def test_open_month_is_never_stored(db, setup):
+    user_id, _, _ = setup
+    current = closed_month_results.current_month()
+    analytics_service.get_sankey_data(db, user_id=user_id, year=current.year, month=current.month)
+    assert cached_months(db, user_id, "analytics.sankey_month") == set()
+
+def test_sankey_range_merges_cached_months(db, setup):
+    user_id, acc, food = setup
+    analytics_service.get_sankey_data(db, user_id=user_id, year=2024, month=3)
+    result_cache.clear()
+
+    sankey, reads = rollup_reads(lambda: analytics_service.get_sankey_range(db, user_id=user_id, start=date(2024, 1, 1), end=date(2024, 4, 1)))
+    # Só os meses que faltavam (jan, fev, abr) vão a monthly_rollups, numa única consulta
+    assert reads == 1
+    assert cached_months(db, user_id, "analytics.sankey_month") == {date(2024, m, 1) for m in range(1, 5)}
+
+    names = [n.name for n in sankey.nodes]
+    link = next(l for l in sankey.links if l.target == names.index("Mercado"))
+    assert link.value == Decimal("600.00")
+
+def test_sankey_range_validates_months(db, setup):
+    user_id, _, _ = setup
+    with pytest.raises(ValueError):
+        analytics_service.get_sankey_range(db, user_id=user_id, start=date(2024, 4, 1), end=date(2024, 3, 1))
+    with pytest.raises(ValueError):
+        analytics_service.get_sankey_range(db, user_id=user_id, start=date(2019, 1, 1), end=date(2024, 3, 1))
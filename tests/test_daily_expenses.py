@@ -0,0 +1,92 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.transaction import Transaction, TransactionNature
+from app.services.analytics import analytics_service
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_daily_expenses.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_daily_expenses.db"):
+        os.remove("./test_daily_expenses.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_id(db):
+    user_id = uuid.uuid4()
+    acc_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    db.add(Account(id=acc_id, name="Main", type=AccountType.banco, initial_balance=Decimal("0"), initial_balance_date=date(2020, 1, 1), user_id=user_id))
+
+    def expense(day, amount, nature=TransactionNature.EXPENSE):
+        db.add(Transaction(
+            id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=nature,
+            date=day, account_id=acc_id, user_id=user_id
+        ))
+
+    expense(date(2024, 3, 1), "-10")
+    expense(date(2024, 3, 1), "-5")
+    expense(date(2024, 3, 31), "-20")
+    expense(date(2024, 3, 15), "1000", TransactionNature.INCOME)
+    expense(date(2024, 2, 29), "-7")
+    expense(date(2024, 1, 10), "-99")
+    expense(date(2023, 3, 2), "-30")
+    db.commit()
+    return user_id
+
+def test_current_and_previous_month_in_one_query(db, user_id):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        data = analytics_service.get_daily_expenses(db, user_id=user_id, year=2024, month=3)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert len([s for s in statements if "FROM transactions" in s]) == 1
+    current, previous = data["current_month"], data["previous_month"]
+    assert len(current) == 31 and len(previous) == 29
+    assert (current[0].day, current[0].cumulative) == (1, Decimal("15"))
+    assert current[29].cumulative == Decimal("15")
+    assert current[30].cumulative == Decimal("35")
+    assert previous[27].cumulative == Decimal("0")
+    assert previous[28].cumulative == Decimal("7")
+
+def test_overlay_keeps_requested_order(db, user_id):
+    series = analytics_service.get_daily_expenses_overlay(
+        db, user_id=user_id, months=[date(2024, 3, 1), date(2023, 3, 1), date(2022, 3, 1)]
+    )
+    assert [(s["year"], s["month"]) for s in series] == [(2024, 3), (2023, 3), (2022, 3)]
+    assert series[0]["days"][-1].cumulative == Decimal("35")
+    assert series[1]["days"][1].cumulative == Decimal("30")
+    assert all(d.cumulative == 0 for d in series[2]["days"])
+
+def test_overlay_limits_months(db, user_id):
+    with pytest.raises(ValueError):
+        analytics_service.get_daily_expenses_overlay(db, user_id=user_id, months=[])
+    with pytest.raises(ValueError):
+        analytics_service.get_daily_expenses_overlay(
+            db, user_id=user_id, months=[date(2000 + i // 12, i % 12 + 1, 1) for i in range(25)]
+        )
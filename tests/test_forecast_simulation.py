@@ -0,0 +1,125 @@
+import pytest
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+import numpy as np
+import pytz
+from dateutil.relativedelta import relativedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, get_db
+from app.main import app
+from app.routers.auth import get_current_user
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.category import Category, CategoryType
+from app.models.transaction import Transaction, TransactionNature
+from app.models.recurring_expense import RecurringExpense, RecurringType, FrequencyType
+from app.services.forecast_simulation import forecast_simulator
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_forecast_simulation.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_forecast_simulation.db"):
+        os.remove("./test_forecast_simulation.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+def make_user(db, monthly):
+    """monthly: lista (meses atrás, categoria, valor) de lançamentos do histórico."""
+    user_id = uuid.uuid4()
+    acc_id = uuid.uuid4()
+    db.add(User(id=user_id, username=f"user-{user_id}", hashed_password="pw"))
+    db.add(Account(id=acc_id, name="Main", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2020, 1, 1), user_id=user_id))
+    categories = {
+        "Salário": Category(id=uuid.uuid4(), name="Salário", type=CategoryType.income, user_id=user_id),
+        "Mercado": Category(id=uuid.uuid4(), name="Mercado", type=CategoryType.expense, user_id=user_id),
+        "Lazer": Category(id=uuid.uuid4(), name="Lazer", type=CategoryType.expense, user_id=user_id),
+    }
+    db.add_all(categories.values())
+    current_month = datetime.now(pytz.timezone("America/Sao_Paulo")).date().replace(day=1)
+    for months_ago, name, amount in monthly:
+        nature = TransactionNature.INCOME if amount > 0 else TransactionNature.EXPENSE
+        db.add(Transaction(id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=nature, category_id=categories[name].id,
+                           date=current_month - relativedelta(months=months_ago) + relativedelta(days=2), account_id=acc_id, user_id=user_id))
+    db.commit()
+    return user_id, categories
+
+def test_constant_history_has_no_spread(db):
+    # O saldo inicial inclui o histórico: 1000 + 3 x (1000 - 400) = 2800
+    user_id, categories = make_user(db, [(k, name, amount) for k in (1, 2, 3) for name, amount in (("Salário", 1000), ("Mercado", -400))])
+    db.add(RecurringExpense(description="Internet", category_id=categories["Mercado"].id, amount=Decimal("-100.00"),
+                            type=RecurringType.subscription, frequency=FrequencyType.monthly, start_date=date(2020, 1, 1), user_id=user_id))
+    db.commit()
+
+    result = forecast_simulator.simulate(db, user_id, months=12, paths=500)
+    assert result.history_months == 3
+    assert result.start_balance == Decimal("2800.00")
+    for k, point in enumerate(result.points, start=1):
+        expected = Decimal("2800.00") + k * Decimal("500.00")
+        assert point.p5 == point.p50 == point.p95 == expected
+        assert point.probability_negative == 0
+    assert result.probability_negative == 0
+
+def test_same_seed_same_bands(db):
+    user_id, _ = make_user(db, [
+        (1, "Salário", 3000), (1, "Mercado", -900), (1, "Lazer", -2500),
+        (2, "Salário", 3000), (2, "Mercado", -1500),
+        (3, "Salário", 3000), (3, "Mercado", -700), (3, "Lazer", -4000),
+    ])
+    first = forecast_simulator.simulate(db, user_id, months=24, paths=2000, seed=7)
+    again = forecast_simulator.simulate(db, user_id, months=24, paths=2000, seed=7)
+    other = forecast_simulator.simulate(db, user_id, months=24, paths=2000, seed=8)
+
+    assert first == again
+    assert first != other
+    last = first.points[-1]
+    assert last.p5 < last.p25 < last.p50 < last.p75 < last.p95
+    assert 0 < first.probability_negative < 1
+    assert first.probability_negative >= max(p.probability_negative for p in first.points)
+
+def test_bounds_and_speed(db):
+    user_id, _ = make_user(db, [(k, "Mercado", -100 * k) for k in range(1, 13)] + [(k, "Salário", 1000) for k in range(1, 13)])
+    start = time.perf_counter()
+    result = forecast_simulator.simulate(db, user_id, months=600, paths=10**6)
+    elapsed = time.perf_counter() - start
+
+    assert result.months == 60 and result.paths == 10_000
+    assert len(result.points) == 60
+    assert elapsed < 1
+
+def test_combined_tables_cover_every_combination():
+    history = np.array([[1, 10, 100], [2, 20, 200]], dtype=np.int64)
+    tables = forecast_simulator.combined_tables(history)
+
+    assert len(tables) == 1
+    assert sorted(tables[0].tolist()) == sorted(a + b + c for a in (1, 2) for b in (10, 20) for c in (100, 200))
+
+def test_negative_seed_is_rejected(db):
+    user_id, _ = make_user(db, [])
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, user_id)
+    try:
+        client = TestClient(app)
+        # np.random.default_rng não aceita semente negativa: 422 em vez de erro 500
+        assert client.get("/analytics/forecast/simulate", params={"seed": -1}).status_code == 422
+        assert client.get("/analytics/forecast/simulate", params={"seed": 0, "paths": 100}).status_code == 200
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,148 @@
+import pytest
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import pytz
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.services import matviews
+from app.services.matviews import MatviewRefresher, is_fresh, ALL_USERS
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_matviews.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+TZ = pytz.timezone("America/Sao_Paulo")
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_matviews.db"):
+        os.remove("./test_matviews.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def refresher():
+    calls = []
+    refresher = MatviewRefresher(debounce=0.05, max_delay=0.2, refresh=lambda: calls.append(time.monotonic()))
+    refresher.calls = calls
+    refresher.start()
+    try:
+        # REFRESH inicial, fora das contagens dos testes
+        assert wait_for(lambda: calls)
+        calls.clear()
+        yield refresher
+    finally:
+        refresher.stop()
+
+def test_burst_of_writes_refreshes_once(refresher):
+    user_id = uuid.uuid4()
+    for _ in range(5):
+        refresher.mark([user_id])
+        time.sleep(0.01)
+
+    assert refresher.is_pending(user_id)
+    assert wait_for(lambda: not refresher.is_pending(user_id))
+    time.sleep(0.1)
+    assert len(refresher.calls) == 1
+
+def test_continuous_writes_capped_by_max_delay(refresher):
+    user_id = uuid.uuid4()
+    start = time.monotonic()
+    while time.monotonic() - start < 0.5:
+        refresher.mark([user_id])
+        time.sleep(0.02)
+
+    # Sem o teto, o debounce adiaria o REFRESH até as escritas pararem
+    assert refresher.calls and refresher.calls[0] - start < 0.4
+
+def test_refreshes_on_start_and_after_midnight():
+    calls = []
+    # Começa 0,1 s antes da meia-noite em São Paulo
+    start = time.monotonic()
+    clock = lambda: TZ.localize(datetime(2024, 3, 10, 23, 59, 59, 900000)) + timedelta(seconds=time.monotonic() - start)
+    refresher = MatviewRefresher(debounce=60, max_delay=60, refresh=lambda: calls.append(time.monotonic()), clock=clock)
+    refresher.start()
+    try:
+        assert wait_for(lambda: len(calls) == 1)
+        # Sem escritas: o REFRESH diário torna as materializadas do novo dia utilizáveis
+        assert wait_for(lambda: len(calls) == 2)
+        assert calls[1] - calls[0] >= 0.09
+        time.sleep(0.1)
+        assert len(calls) == 2
+    finally:
+        refresher.stop()
+
+def test_freshness_rules(refresher):
+    user_id = uuid.uuid4()
+    now = TZ.localize(datetime(2024, 3, 10, 12, 0))
+
+    assert not is_fresh(None, user_id, refresher, now)
+    assert is_fresh(now - timedelta(minutes=1), user_id, refresher, now)
+    # Refresh de ontem: CURRENT_DATE das views mudou
+    assert not is_fresh(TZ.localize(datetime(2024, 3, 9, 23, 59)), user_id, refresher, TZ.localize(datetime(2024, 3, 10, 0, 1)))
+    # A idade não importa: last_refreshed já descartou os refresh anteriores à última escrita
+    assert is_fresh(now - timedelta(hours=2), user_id, refresher, now)
+
+    refresher.mark([user_id])
+    assert not is_fresh(now - timedelta(minutes=1), user_id, refresher, now)
+    refresher.mark([ALL_USERS])
+    assert not is_fresh(now - timedelta(minutes=1), uuid.uuid4(), refresher, now)
+
+def test_commit_schedules_refresh_for_the_writer(db, monkeypatch):
+    refresher = MatviewRefresher(debounce=60, max_delay=60, refresh=lambda: None)
+    refresher.start()
+    monkeypatch.setattr(matviews, "matview_refresher", refresher)
+    try:
+        user_id = uuid.uuid4()
+        db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+        db.commit()
+        assert not refresher.is_pending(user_id)
+
+        db.add(Account(id=uuid.uuid4(), name="Main", type=AccountType.banco, initial_balance=Decimal("0"), initial_balance_date=date(2024, 1, 1), user_id=user_id))
+        db.commit()
+        assert refresher.is_pending(user_id)
+    finally:
+        refresher.stop()
+
+def test_source_for_prefers_fresh_matview_then_user_function(monkeypatch):
+    class Bind:
+        class dialect:
+            name = "postgresql"
+
+    class FakeDb:
+        def get_bind(self):
+            return Bind()
+
+    monkeypatch.setattr(matviews, "is_fresh", lambda last, user_id: last is not None)
+    user_id = uuid.uuid4()
+    refreshed = {"mv_net_worth": datetime.now(TZ)}
+
+    assert matviews.source_for(FakeDb(), "v_net_worth", user_id, refreshed) == "mv_net_worth"
+    # Sem refresh em dia: função por usuário no lugar da view global
+    assert matviews.source_for(FakeDb(), "v_goal_progress", user_id, refreshed) == "f_goal_progress(:user_id)"
+    assert matviews.source_for(FakeDb(), "v_burn_rate", user_id, refreshed) == "v_burn_rate"
@@ -0,0 +1,237 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import AccountType
+from app.models.category import Category, CategoryType
+from app.models.monthly_rollup import MonthlyRollup, UNASSIGNED
+from app.models.recurring_expense import RecurringExpense, RecurringType
+from app.models.transaction import Transaction, TransactionNature
+from app.schemas.account import AccountCreate
+from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.crud.account import account as crud_account
+from app.crud.transaction import transaction as crud_transaction
+from app.crud.recurring_expense import recurring_expense as crud_recurring
+from app.crud.monthly_rollup import monthly_rollup
+from app.crud.ledger import ledger
+from app.services.summary import summary_service
+from app.services.analytics import analytics_service
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_monthly_rollups.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_monthly_rollups.db"):
+        os.remove("./test_monthly_rollups.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def setup(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    food = Category(id=uuid.uuid4(), name="Mercado", type=CategoryType.expense, user_id=user_id)
+    rent = Category(id=uuid.uuid4(), name="Aluguel", type=CategoryType.expense, user_id=user_id)
+    db.add_all([food, rent])
+    db.commit()
+    acc = crud_account.create_with_user(
+        db,
+        obj_in=AccountCreate(name="Main", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2024, 1, 1)),
+        user_id=user_id
+    )
+    return user_id, acc, food, rent
+
+def stored(db, user_id):
+    db.expire_all()
+    return {
+        (r.month, r.nature, r.category_id, r.account_id): (r.inflow, r.outflow, r.tx_count)
+        for r in db.scalars(select(MonthlyRollup).where(MonthlyRollup.user_id == user_id))
+    }
+
+def expected(db, user_id):
+    return {
+        (r["month"], r["nature"], r["category_id"], r["account_id"]): (r["inflow"], r["outflow"], r["tx_count"])
+        for r in monthly_rollup._contributions(db, [Transaction.user_id == user_id])
+    }
+
+def create(db, user_id, amount, tx_date, nature=TransactionNature.EXPENSE, **kwargs):
+    return crud_transaction.create_with_user(
+        db,
+        obj_in=TransactionCreate(description="T", amount=Decimal(amount), nature=nature, date=tx_date, **kwargs),
+        user_id=user_id
+    )
+
+def test_rollups_follow_every_write(db, setup):
+    user_id, acc, food, rent = setup
+
+    tx = create(db, user_id, "-100.00", date(2024, 2, 10), category_id=food.id, account_id=acc.id)
+    create(db, user_id, "-40.00", date(2024, 2, 20), category_id=food.id, account_id=acc.id)
+    income = create(db, user_id, "3000.00", date(2024, 2, 5), nature=TransactionNature.INCOME)
+    assert stored(db, user_id) == expected(db, user_id)
+    assert stored(db, user_id)[(date(2024, 2, 1), TransactionNature.EXPENSE, food.id, acc.id)] == (Decimal("0"), Decimal("-140.00"), 2)
+    assert (date(2024, 2, 1), TransactionNature.INCOME, UNASSIGNED, UNASSIGNED) in stored(db, user_id)
+
+    # Edição retroativa: muda de mês, categoria e valor
+    crud_transaction.update(db, db_obj=tx, obj_in=TransactionUpdate(date=date(2024, 1, 31), category_id=rent.id, amount=Decimal("-70.00")))
+    assert stored(db, user_id) == expected(db, user_id)
+    assert stored(db, user_id)[(date(2024, 2, 1), TransactionNature.EXPENSE, food.id, acc.id)] == (Decimal("0"), Decimal("-40.00"), 1)
+
+    # Exclusão lógica: a chave sem transações some
+    crud_transaction.remove_by_user(db, id=income.id, user_id=user_id)
+    assert stored(db, user_id) == expected(db, user_id)
+    assert (date(2024, 2, 1), TransactionNature.INCOME, UNASSIGNED, UNASSIGNED) not in stored(db, user_id)
+
+def test_propagate_changes_moves_rollups(db, setup):
+    user_id, acc, food, rent = setup
+    recurring = RecurringExpense(id=uuid.uuid4(), description="Academia", category_id=food.id, amount=Decimal("100.00"), type=RecurringType.subscription, start_date=date(2024, 1, 5), account_id=acc.id, user_id=user_id)
+    db.add(recurring)
+    db.flush()
+    for month in (1, 2, 3):
+        db.add(Transaction(id=uuid.uuid4(), description="Academia", amount=Decimal("-100.00"), nature=TransactionNature.EXPENSE, date=date(2024, month, 5), category_id=food.id, account_id=acc.id, recurring_expense_id=recurring.id, user_id=user_id))
+    db.flush()
+    ledger.apply(db, Transaction.recurring_expense_id == recurring.id)
+    db.commit()
+
+    recurring.amount = Decimal("120.00")
+    recurring.category_id = rent.id
+    db.commit()
+    crud_recurring.propagate_changes(db, db_obj=recurring, apply_from=date(2024, 2, 15), user_id=user_id)
+
+    rollups = stored(db, user_id)
+    assert rollups == expected(db, user_id)
+    assert rollups[(date(2024, 1, 1), TransactionNature.EXPENSE, food.id, acc.id)] == (Decimal("0"), Decimal("-100.00"), 1)
+    assert rollups[(date(2024, 2, 1), TransactionNature.EXPENSE, rent.id, acc.id)] == (Decimal("0"), Decimal("-120.00"), 1)
+
+def test_rebuild_matches_incremental(db, setup):
+    user_id, acc, food, _ = setup
+    create(db, user_id, "-10.00", date(2024, 3, 1), category_id=food.id, account_id=acc.id)
+    create(db, user_id, "500.00", date(2024, 3, 2), nature=TransactionNature.INVESTMENT, account_id=acc.id)
+    before = stored(db, user_id)
+
+    monthly_rollup.rebuild(db, [user_id])
+    db.commit()
+
+    assert stored(db, user_id) == before
+
+def test_endpoints_read_rollups(db, setup):
+    user_id, acc, food, rent = setup
+    create(db, user_id, "5000.00", date(2024, 3, 5), nature=TransactionNature.INCOME, account_id=acc.id)
+    create(db, user_id, "-300.00", date(2024, 3, 8), category_id=food.id, account_id=acc.id)
+    create(db, user_id, "-1200.00", date(2024, 3, 10), category_id=rent.id, account_id=acc.id)
+    create(db, user_id, "800.00", date(2024, 3, 12), nature=TransactionNature.INVESTMENT, account_id=acc.id)
+    gone = create(db, user_id, "-999.00", date(2024, 3, 15), category_id=food.id, account_id=acc.id)
+    crud_transaction.remove_by_user(db, id=gone.id, user_id=user_id)
+
+    monthly = summary_service.get_monthly_summary(db, 2024, 3, user_id=user_id)
+    assert (monthly.total_income, monthly.total_expenses, monthly.total_invested) == (Decimal("5000.00"), Decimal("1500.00"), Decimal("800.00"))
+    assert monthly.expenses_by_category == {"Mercado": Decimal("300.00"), "Aluguel": Decimal("1200.00")}
+
+    yearly = summary_service.get_yearly_summary(db, 2024, user_id=user_id)
+    assert (yearly.total_income, yearly.total_expenses, yearly.balance) == (Decimal("5000.00"), Decimal("1500.00"), Decimal("3500.00"))
+
+    period = analytics_service.get_period_summary(db, user_id, 2024, 2, 2024, 3)
+    assert [(m.month, m.total_income, m.total_expense) for m in period.months] == [
+        (2, Decimal(0), Decimal(0)), (3, Decimal("5000.00"), Decimal("1500.00"))
+    ]
+    assert [(c.category_name, c.total) for c in period.top_categories] == [("Aluguel", Decimal("1200.00")), ("Mercado", Decimal("300.00"))]
+
+    sankey = analytics_service.get_sankey_data(db, user_id, 2024, 3)
+    names = [n.name for n in sankey.nodes]
+    economizado = next(l for l in sankey.links if l.target == names.index("Economizado"))
+    assert economizado.value == Decimal("2700.00")
+
+def test_period_summary_merges_uncategorized_expenses(db, setup):
+    user_id, acc, food, _ = setup
+    other = crud_account.create_with_user(
+        db,
+        obj_in=AccountCreate(name="Outra", type=AccountType.carteira, initial_balance=Decimal("0"), initial_balance_date=date(2024, 1, 1)),
+        user_id=user_id
+    )
+    create(db, user_id, "-100.00", date(2024, 3, 5), account_id=acc.id)
+    create(db, user_id, "-50.00", date(2024, 3, 6), account_id=other.id)
+    create(db, user_id, "-30.00", date(2024, 3, 7), category_id=food.id, account_id=acc.id)
+    create(db, user_id, "-20.00", date(2024, 3, 8), category_id=food.id, account_id=other.id)
+
+    period = analytics_service.get_period_summary(db, user_id, 2024, 3, 2024, 3)
+    assert [(c.category_id, c.category_name, c.total) for c in period.top_categories] == [
+        (None, "Sem Categoria", Decimal("150.00")), (str(food.id), "Mercado", Decimal("50.00"))
+    ]
+
+def test_monthly_summary_two_statements(db, setup):
+    user_id, acc, food, _ = setup
+    create(db, user_id, "5000.00", date(2024, 3, 5), nature=TransactionNature.INCOME, account_id=acc.id)
+    create(db, user_id, "-300.00", date(2024, 3, 8), category_id=food.id, account_id=acc.id)
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        monthly = summary_service.get_monthly_summary(db, 2024, 3, user_id=user_id)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert monthly.balance == Decimal("4700.00")
+    assert [t.amount for t in monthly.top_transactions] == [Decimal("-300.00")]
+    # Agregado do mês + top 5 (data_version, month_versions e closed_month_cache são dos caches)
+    cache_tables = ("data_version", "month_versions", "closed_month_cache")
+    assert len([s for s in statements if not any(table in s for table in cache_tables)]) == 2
+
+def test_category_matrix_is_dense_and_columnar(db, setup):
+    user_id, acc, food, rent = setup
+    create(db, user_id, "-300.00", date(2024, 1, 8), category_id=food.id, account_id=acc.id)
+    create(db, user_id, "-1200.00", date(2024, 3, 10), category_id=rent.id, account_id=acc.id)
+    create(db, user_id, "-50.00", date(2024, 3, 11), account_id=acc.id)
+    create(db, user_id, "5000.00", date(2024, 3, 5), nature=TransactionNature.INCOME, account_id=acc.id)
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        matrix = analytics_service.get_category_matrix(db, user_id, date(2024, 1, 1), date(2024, 3, 1))
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len([s for s in statements if "monthly_rollups" in s]) == 1
+    assert matrix.months == ["2024-01", "2024-02", "2024-03"]
+    assert matrix.category_ids == [rent.id, food.id, None]
+    assert matrix.category_names == ["Aluguel", "Mercado", "Sem Categoria"]
+    assert matrix.values == [0, 0, 1200.0, 300.0, 0, 0, 0, 0, 50.0]
+
+    with pytest.raises(ValueError):
+        analytics_service.get_category_matrix(db, user_id, date(2024, 3, 1), date(2024, 1, 1))
+
+def test_account_delete_moves_rollups_to_unassigned(db, setup):
+    user_id, acc, food, _ = setup
+    tx = create(db, user_id, "-100.00", date(2024, 3, 8), category_id=food.id, account_id=acc.id)
+
+    crud_account.remove_by_user(db, id=acc.id, user_id=user_id)
+    assert stored(db, user_id) == expected(db, user_id)
+    assert {key[3] for key in stored(db, user_id)} == {UNASSIGNED}
+
+    db.refresh(tx)
+    crud_transaction.update(db, db_obj=tx, obj_in=TransactionUpdate(amount=Decimal("-30.00")))
+    assert stored(db, user_id) == expected(db, user_id)
+    monthly = summary_service.get_monthly_summary(db, 2024, 3, user_id=user_id)
+    assert monthly.total_expenses == Decimal("30.00")
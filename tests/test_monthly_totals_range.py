@@ -0,0 +1,92 @@
+import pytest
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.transaction import Transaction, TransactionNature
+from app.services.financial_engine import financial_engine
+from app.crud.monthly_rollup import monthly_rollup
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_monthly_totals_range.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_monthly_totals_range.db"):
+        os.remove("./test_monthly_totals_range.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_data(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    acc = Account(id=uuid.uuid4(), name="Main", type=AccountType.banco, initial_balance=Decimal("0"), initial_balance_date=date(2023, 1, 1), user_id=user_id)
+    db.add(acc)
+
+    def add(amount, nature, tx_date, **kwargs):
+        db.add(Transaction(id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=nature, date=tx_date, account_id=acc.id, user_id=user_id, **kwargs))
+
+    add("5000.00", TransactionNature.INCOME, date(2023, 12, 5))
+    add("-1200.00", TransactionNature.EXPENSE, date(2023, 12, 31))
+    add("-300.00", TransactionNature.EXPENSE, date(2024, 1, 1))
+    add("-800.00", TransactionNature.INVESTMENT, date(2024, 1, 10))
+    add("-999.00", TransactionNature.EXPENSE, date(2024, 1, 15), deleted_at=datetime(2024, 1, 16))
+    add("2500.00", TransactionNature.INCOME, date(2024, 3, 31))
+    # Inserções diretas não passam pelo ledger: materializa os agregados como o backfill
+    monthly_rollup.rebuild(db, [user_id])
+    db.commit()
+    return user_id
+
+def test_range_matches_single_month_totals(db, user_data):
+    totals = financial_engine.get_monthly_totals_range(db, user_data, date(2023, 11, 20), date(2024, 3, 2))
+
+    assert [t["month"] for t in totals] == [
+        date(2023, 11, 1), date(2023, 12, 1), date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)
+    ]
+    assert [(t["income"], t["expense"], t["result"]) for t in totals] == [
+        (Decimal(0), Decimal(0), Decimal(0)),
+        (Decimal("5000.00"), Decimal("1200.00"), Decimal("3800.00")),
+        (Decimal(0), Decimal("300.00"), Decimal("-300.00")),
+        (Decimal(0), Decimal(0), Decimal(0)),
+        (Decimal("2500.00"), Decimal(0), Decimal("2500.00")),
+    ]
+    for t in totals:
+        single = financial_engine.get_monthly_totals(db, t["month"].year, t["month"].month, user_data)
+        assert single == {key: t[key] for key in ("income", "expense", "result")}
+
+def test_empty_range(db, user_data):
+    assert financial_engine.get_monthly_totals_range(db, user_data, date(2024, 3, 1), date(2024, 1, 1)) == []
+
+def test_two_years_in_one_statement(db, user_data):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        totals = financial_engine.get_monthly_totals_range(db, user_data, date(2022, 4, 1), date(2024, 3, 1))
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(totals) == 24
+    assert sum((t["result"] for t in totals), Decimal(0)) == Decimal("6000.00")
+    assert len(statements) == 1
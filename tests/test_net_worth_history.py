@@ -0,0 +1,128 @@
+import pytest
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, get_db
+from app.main import app
+from app.routers.auth import get_current_user
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.transaction import Transaction, TransactionNature
+from app.schemas.summary import NetWorthGranularity
+from app.services.summary import summary_service
+from app.services.financial_engine import financial_engine
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_net_worth_history.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_net_worth_history.db"):
+        os.remove("./test_net_worth_history.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_data(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    main = Account(id=uuid.uuid4(), name="Main", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2024, 1, 1), user_id=user_id)
+    card = Account(id=uuid.uuid4(), name="Card", type=AccountType.cartao_credito, initial_balance=Decimal("0.00"), initial_balance_date=date(2024, 2, 15), user_id=user_id)
+    db.add_all([main, card])
+
+    def add(acc, amount, tx_date, **kwargs):
+        db.add(Transaction(id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=TransactionNature.EXPENSE, date=tx_date, account_id=acc.id, user_id=user_id, **kwargs))
+
+    add(main, "-100.00", date(2024, 1, 10))
+    add(main, "-50.00", date(2024, 1, 10))
+    add(card, "-200.00", date(2024, 2, 20))
+    add(card, "-999.00", date(2024, 2, 1))  # antes de initial_balance_date
+    add(main, "-999.00", date(2024, 3, 5), deleted_at=datetime(2024, 3, 6))
+    add(main, "300.00", date(2024, 3, 31))
+    db.commit()
+    return user_id
+
+def expected(db, user_id, d):
+    return sum(financial_engine.balance_as_of(db, [a.id for a in db.query(Account).all()], [d]).values(), Decimal(0))
+
+def test_monthly_series_matches_balance_as_of(db, user_data):
+    series = summary_service.get_net_worth_history(db, user_data, start=date(2023, 12, 1), end=date(2024, 4, 10))
+
+    assert [p.date for p in series.points] == [
+        date(2023, 12, 31), date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 10)
+    ]
+    assert [p.value for p in series.points] == [
+        Decimal("0"), Decimal("850.00"), Decimal("650.00"), Decimal("950.00"), Decimal("950.00")
+    ]
+    for p in series.points:
+        assert p.value == expected(db, user_data, p.date)
+
+def test_daily_and_weekly_granularity(db, user_data):
+    daily = summary_service.get_net_worth_history(db, user_data, start=date(2024, 1, 9), end=date(2024, 1, 11), granularity=NetWorthGranularity.day)
+    assert [(p.date, p.value) for p in daily.points] == [
+        (date(2024, 1, 9), Decimal("1000.00")),
+        (date(2024, 1, 10), Decimal("850.00")),
+        (date(2024, 1, 11), Decimal("850.00")),
+    ]
+
+    # 2024-02-14 é quarta-feira: pontos nos domingos e no end
+    weekly = summary_service.get_net_worth_history(db, user_data, start=date(2024, 2, 14), end=date(2024, 2, 27), granularity=NetWorthGranularity.week)
+    assert [(p.date, p.value) for p in weekly.points] == [
+        (date(2024, 2, 18), Decimal("850.00")),
+        (date(2024, 2, 25), Decimal("650.00")),
+        (date(2024, 2, 27), Decimal("650.00")),
+    ]
+
+def test_series_single_query(db, user_data):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        series = summary_service.get_net_worth_history(db, user_data, start=date(2020, 1, 1), end=date(2024, 12, 31), granularity=NetWorthGranularity.day)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len(series.points) == (date(2024, 12, 31) - date(2020, 1, 1)).days + 1
+    assert series.points[-1].value == Decimal("950.00")
+    assert len([s for s in statements if "transactions" in s]) == 1
+
+def test_point_limit(db, user_data):
+    with pytest.raises(ValueError):
+        summary_service.get_net_worth_history(db, user_data, start=date(2010, 1, 1), end=date(2024, 12, 31), granularity=NetWorthGranularity.day)
+
+    # O mesmo intervalo em semanas cabe no limite: uma por semana tocada
+    weekly = summary_service.get_net_worth_history(db, user_data, start=date(2010, 1, 1), end=date(2024, 12, 31), granularity=NetWorthGranularity.week)
+    assert len(weekly.points) == ((date(2024, 12, 31) - date(2010, 1, 1)).days + date(2010, 1, 1).weekday()) // 7 + 1
+
+def test_point_limit_is_a_bad_request(db, user_data):
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: db.get(User, user_data)
+    try:
+        client = TestClient(app)
+        # Mesmo status dos demais erros de parâmetro dos routers
+        response = client.get("/summary/net-worth/history", params={"start": "2010-01-01", "end": "2024-12-31", "granularity": "day"})
+        assert response.status_code == 400
+        assert "máximo é 2000" in response.json()["detail"]
+        response = client.get("/summary/net-worth/history", params={"start": "2024-12-31", "end": "2010-01-01"})
+        assert response.status_code == 400
+    finally:
+        app.dependency_overrides.clear()
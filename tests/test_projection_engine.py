@@ -0,0 +1,144 @@
+import pytest
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+import pytz
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.category import Category, CategoryType
+from app.models.transaction import Transaction, TransactionNature
+from app.models.recurring_expense import RecurringExpense, RecurringType, FrequencyType
+from app.schemas.analytics import ProjectionScenariosRequest, ProjectionScenario, ScenarioRecurring
+from app.services.analytics import analytics_service
+from app.services.projection_engine import projection_engine, MAX_PROJECTION_MONTHS
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_projection_engine.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_projection_engine.db"):
+        os.remove("./test_projection_engine.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_id(db):
+    user_id = uuid.uuid4()
+    acc_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    db.add(Account(id=acc_id, name="Main", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2020, 1, 1), user_id=user_id))
+    expense = Category(id=uuid.uuid4(), name="Casa", type=CategoryType.expense, user_id=user_id)
+    income = Category(id=uuid.uuid4(), name="Salário", type=CategoryType.income, user_id=user_id)
+    db.add_all([expense, income])
+
+    next_month = (today() + relativedelta(months=1)).replace(day=1)
+    db.add_all([
+        RecurringExpense(description="Internet", category_id=expense.id, amount=Decimal("-100.00"), type=RecurringType.subscription,
+                         frequency=FrequencyType.monthly, start_date=date(2020, 1, 10), user_id=user_id),
+        RecurringExpense(description="Notebook", category_id=expense.id, amount=Decimal("-1000.00"), type=RecurringType.installment,
+                         total_installments=3, start_date=next_month, end_date=next_month + relativedelta(months=2), user_id=user_id),
+        RecurringExpense(description="IPVA", category_id=expense.id, amount=Decimal("-1200.00"), type=RecurringType.subscription,
+                         frequency=FrequencyType.yearly, start_date=next_month.replace(year=next_month.year - 1), user_id=user_id),
+        RecurringExpense(description="Salário", category_id=income.id, amount=Decimal("5000.00"), type=RecurringType.subscription,
+                         frequency=FrequencyType.monthly, start_date=date(2020, 1, 5), user_id=user_id),
+    ])
+
+    # Últimos 3 meses fechados: receita 3000 em dois meses, despesas variáveis 600 em um
+    current_month = today().replace(day=1)
+    for months_ago, amount, nature in [(1, "3000", TransactionNature.INCOME), (2, "3000", TransactionNature.INCOME), (1, "-600", TransactionNature.EXPENSE)]:
+        db.add(Transaction(id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=nature,
+                           date=current_month - relativedelta(months=months_ago), account_id=acc_id, user_id=user_id))
+    db.commit()
+    return user_id
+
+def today():
+    return datetime.now(pytz.timezone("America/Sao_Paulo")).date()
+
+def test_projection_matches_month_by_month_rules(db, user_id):
+    result = analytics_service.get_projection(db, user_id=user_id, months=14, include_items=True)
+    first, second, fourth, thirteenth = (result.projections[i] for i in (0, 1, 3, 12))
+
+    assert result.has_recurring_income
+    assert first.income == Decimal("3000.00")
+    assert first.variable_expenses == Decimal("600.00")
+    assert first.installments == Decimal("333.33")
+    # Recorrências valem em todo mês a partir de start_date, qualquer que seja a frequência
+    assert first.recurring_expenses == Decimal("1300.00")
+    assert second.recurring_expenses == Decimal("1300.00")
+    assert fourth.installments == Decimal("0.00")
+    assert thirteenth.recurring_expenses == Decimal("1300.00")
+
+    # Saldo inicial = disponível atual (1000 + transações até hoje) e encadeamento mês a mês
+    assert first.initial_balance == Decimal("6400.00")
+    for previous, current in zip(result.projections, result.projections[1:]):
+        assert current.initial_balance == previous.projected_balance
+        assert current.projected_balance == (
+            current.initial_balance + current.income - current.recurring_expenses - current.installments - current.variable_expenses
+        )
+
+    assert [i.description for i in first.recurring_items] == ["Internet", "IPVA"]
+    assert [(i.description, i.amount) for i in first.installment_items] == [("Notebook", Decimal("333.33"))]
+    assert [(i.description, i.amount) for i in first.income_items] == [("Salário", Decimal("5000.00"))]
+
+def test_items_only_on_request(db, user_id):
+    result = analytics_service.get_projection(db, user_id=user_id, months=3)
+    assert all(not p.recurring_items and not p.installment_items and not p.income_items for p in result.projections)
+    assert result.projections[0].installments == Decimal("333.33")
+
+def test_long_horizon_is_bounded_and_fast(db, user_id):
+    start = time.perf_counter()
+    result = projection_engine.project(db, user_id, MAX_PROJECTION_MONTHS + 100)
+    elapsed = time.perf_counter() - start
+
+    assert len(result.projections) == MAX_PROJECTION_MONTHS
+    assert elapsed < 1
+
+def test_scenarios_evaluated_together(db, user_id):
+    internet = db.query(RecurringExpense).filter(RecurringExpense.description == "Internet").one()
+    request = ProjectionScenariosRequest(months=24, scenarios=[
+        ProjectionScenario(name="Sem internet", cancel_recurring_ids=[internet.id]),
+        ProjectionScenario(name="Celular 12x", add_recurring=[
+            ScenarioRecurring(description="Celular", amount=Decimal("-1200.00"), type=RecurringType.installment, total_installments=12)
+        ]),
+        ProjectionScenario(name="Aumento", income_delta=Decimal("500"), variable_expense_delta=Decimal("-100")),
+    ])
+    result = analytics_service.get_projection_scenarios(db, user_id=user_id, request=request)
+    baseline = analytics_service.get_projection(db, user_id=user_id, months=24)
+
+    current = result.current
+    assert [p.projected_balance for p in current.projections] == [p.projected_balance for p in baseline.projections]
+
+    no_internet, phone, raise_ = result.scenarios
+    assert no_internet.difference_from_current == Decimal("2400.00")
+    assert all(p.recurring_expenses == c.recurring_expenses - 100 for p, c in zip(no_internet.projections, current.projections))
+
+    assert [p.installments - c.installments for p, c in zip(phone.projections, current.projections)] == [Decimal("100.00")] * 12 + [Decimal("0.00")] * 12
+    assert phone.difference_from_current == Decimal("-1200.00")
+
+    assert raise_.projections[0].income == Decimal("3500.00")
+    assert raise_.difference_from_current == Decimal("14400.00")
+    assert raise_.min_balance == min(p.projected_balance for p in raise_.projections)
+
+def test_scenarios_reject_unknown_recurring(db, user_id):
+    request = ProjectionScenariosRequest(scenarios=[ProjectionScenario(name="X", cancel_recurring_ids=[uuid.uuid4()])])
+    with pytest.raises(ValueError):
+        analytics_service.get_projection_scenarios(db, user_id=user_id, request=request)
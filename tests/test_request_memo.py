@@ -0,0 +1,114 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.transaction import Transaction, TransactionNature
+from app.services.financial_engine import financial_engine
+from app.services.summary import summary_service
+from app.services.memo import memo_stats
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_request_memo.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_request_memo.db"):
+        os.remove("./test_request_memo.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_data(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    acc = Account(id=uuid.uuid4(), name="Main", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2024, 1, 1), user_id=user_id)
+    db.add(acc)
+    db.add(Transaction(id=uuid.uuid4(), description="T", amount=Decimal("-100.00"), nature=TransactionNature.EXPENSE, date=date(2024, 2, 1), account_id=acc.id, user_id=user_id))
+    db.commit()
+    return user_id, acc
+
+class StatementCounter:
+    def __enter__(self):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self.on_execute)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, *args):
+        self.count += 1
+
+def test_repeated_calls_hit_memo(db, user_data):
+    user_id, acc = user_data
+    first = financial_engine.get_balances(db, user_id)
+
+    with StatementCounter() as counter:
+        again = financial_engine.get_balances(db, user_id=user_id, as_of=None)
+        financial_engine.calculate_available_balance(db, user_id)
+        financial_engine.calculate_available_balance(db, user_id)
+
+    assert again == first == {acc.id: Decimal("900.00")}
+    # calculate_available_balance reaproveita get_accounts_with_balances já calculado
+    assert counter.count == 0
+    assert memo_stats(db) == {"hits": 3, "misses": 3}
+
+def test_dashboard_reuses_sub_computations(db, user_data):
+    user_id, _ = user_data
+    summary_service.get_dashboard_data(db, user_id)
+    stats = memo_stats(db)
+    # saldos (available + net worth); o gráfico usa uma única query por faixa de meses
+    assert stats["hits"] >= 1
+
+def test_writes_invalidate_memo(db, user_data):
+    user_id, acc = user_data
+    assert financial_engine.get_balances(db, user_id) == {acc.id: Decimal("900.00")}
+
+    db.add(Transaction(id=uuid.uuid4(), description="T", amount=Decimal("-50.00"), nature=TransactionNature.EXPENSE, date=date(2024, 2, 2), account_id=acc.id, user_id=user_id))
+    db.commit()
+
+    assert financial_engine.get_balances(db, user_id) == {acc.id: Decimal("850.00")}
+
+def test_memo_is_per_session(db, user_data):
+    user_id, _ = user_data
+    financial_engine.get_balances(db, user_id)
+
+    other = TestingSessionLocal()
+    try:
+        financial_engine.get_balances(other, user_id)
+        assert memo_stats(other) == {"hits": 0, "misses": 2}
+    finally:
+        other.close()
+
+def test_memo_returns_independent_copies(db, user_data):
+    user_id, acc = user_data
+    first = financial_engine.get_monthly_totals_range(db, user_id, date(2024, 1, 1), date(2024, 2, 1))
+    original = first[1]["expense"]
+    first[1]["expense"] = Decimal("999")
+    first.append({})
+
+    again = financial_engine.get_monthly_totals_range(db, user_id, date(2024, 1, 1), date(2024, 2, 1))
+    assert len(again) == 2
+    assert again[1]["expense"] == original
+
+    # Instâncias ORM continuam sendo os objetos da sessão
+    accounts = financial_engine.get_accounts_with_balances(db, user_id)
+    assert financial_engine.get_accounts_with_balances(db, user_id)[0][0] is accounts[0][0]
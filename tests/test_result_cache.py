@@ -0,0 +1,126 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.category import Category, CategoryType
+from app.models.transaction import Transaction, TransactionNature
+from app.crud.data_version import data_version
+from app.crud.ledger import ledger
+from app.crud.transaction import transaction as crud_transaction
+from app.services.summary import summary_service
+from app.services.result_cache import ResultCache, result_cache
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_result_cache.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_result_cache.db"):
+        os.remove("./test_result_cache.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    result_cache.clear()
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_data(db):
+    users = [uuid.uuid4(), uuid.uuid4()]
+    for n, user_id in enumerate(users):
+        db.add(User(id=user_id, username=f"user_{n}", hashed_password="pw"))
+    acc = Account(id=uuid.uuid4(), name="Main", type=AccountType.banco, initial_balance=Decimal("1000.00"), initial_balance_date=date(2024, 1, 1), user_id=users[0])
+    cat = Category(id=uuid.uuid4(), name="Mercado", type=CategoryType.expense, user_id=users[0])
+    db.add_all([acc, cat])
+    db.commit()
+    return users, acc, cat
+
+def add_tx(db, user_id, acc, cat, amount="-100.00"):
+    tx = Transaction(id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=TransactionNature.EXPENSE, date=date(2024, 2, 1), account_id=acc.id, category_id=cat.id, user_id=user_id)
+    db.add(tx)
+    db.flush()
+    ledger.apply(db, Transaction.id == tx.id)
+    db.commit()
+    return tx
+
+def count_statements(fn):
+    statements = []
+
+    def on_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return result, statements
+
+def test_writes_bump_only_the_owner_version(db, user_data):
+    users, acc, cat = user_data
+    before = [data_version.get(db, u) for u in users]
+
+    add_tx(db, users[0], acc, cat)
+
+    assert data_version.get(db, users[0]) == before[0] + 1
+    assert data_version.get(db, users[1]) == before[1]
+
+def test_bulk_soft_delete_bumps_version(db, user_data):
+    users, acc, cat = user_data
+    tx = add_tx(db, users[0], acc, cat)
+    before = data_version.get(db, users[0])
+
+    crud_transaction.remove_by_user(db, id=tx.id, user_id=users[0])
+
+    assert data_version.get(db, users[0]) == before + 1
+
+def test_system_category_write_bumps_everyone(db, user_data):
+    users, _, _ = user_data
+    before = [data_version.get(db, u) for u in users]
+
+    db.add(Category(id=uuid.uuid4(), name="Sistema", type=CategoryType.expense, user_id=None, is_system=True))
+    db.commit()
+
+    assert [data_version.get(db, u) for u in users] == [v + 1 for v in before]
+
+def test_unchanged_data_served_from_cache(db, user_data):
+    users, acc, cat = user_data
+    add_tx(db, users[0], acc, cat)
+
+    first = summary_service.get_monthly_summary(db, 2024, 2, user_id=users[0])
+    again, statements = count_statements(lambda: summary_service.get_monthly_summary(db, 2024, 2, user_id=users[0]))
+
+    assert again == first
+    # Só a leitura da versão
+    assert len(statements) == 1 and "data_version" in statements[0]
+
+    add_tx(db, users[0], acc, cat, "-50.00")
+    fresh = summary_service.get_monthly_summary(db, 2024, 2, user_id=users[0])
+    assert fresh.total_expenses == first.total_expenses + Decimal("50.00")
+
+def test_lru_eviction():
+    cache = ResultCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") == (None, False)
+    assert cache.get("a") == (1, True)
+    assert cache.get("c") == (3, True)
+    assert cache.stats()["size"] == 2
@@ -0,0 +1,99 @@
+import pytest
+import uuid
+from datetime import date
+from decimal import Decimal
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base
+from app.models.user import User
+from app.models.account import Account, AccountType
+from app.models.category import Category, CategoryType
+from app.models.transaction import Transaction, TransactionNature
+from app.crud.monthly_rollup import monthly_rollup
+from app.services.summary import summary_service
+
+# Test Database Setup
+SQLALCHEMY_DATABASE_URL = "sqlite:///./test_year_summary.db"
+engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture(scope="module", autouse=True)
+def cleanup_database():
+    yield
+    engine.dispose()
+    import os
+    if os.path.exists("./test_year_summary.db"):
+        os.remove("./test_year_summary.db")
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(bind=engine)
+    session = TestingSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def user_data(db):
+    user_id = uuid.uuid4()
+    db.add(User(id=user_id, username="testuser", hashed_password="pw"))
+    acc = Account(id=uuid.uuid4(), name="Main", type=AccountType.banco, initial_balance=Decimal("0"), initial_balance_date=date(2022, 1, 1), user_id=user_id)
+    food = Category(id=uuid.uuid4(), name="Mercado", type=CategoryType.expense, user_id=user_id)
+    rent = Category(id=uuid.uuid4(), name="Aluguel", type=CategoryType.expense, user_id=user_id)
+    db.add_all([acc, food, rent])
+
+    def add(amount, nature, tx_date, category=None):
+        db.add(Transaction(id=uuid.uuid4(), description="T", amount=Decimal(amount), nature=nature, date=tx_date, account_id=acc.id, category_id=category.id if category else None, user_id=user_id))
+
+    add("4000.00", TransactionNature.INCOME, date(2023, 1, 5))
+    add("-1000.00", TransactionNature.EXPENSE, date(2023, 1, 10), rent)
+    add("-200.00", TransactionNature.EXPENSE, date(2023, 12, 31), food)
+    add("5000.00", TransactionNature.INCOME, date(2024, 1, 5))
+    add("-1100.00", TransactionNature.EXPENSE, date(2024, 1, 10), rent)
+    add("-300.00", TransactionNature.EXPENSE, date(2024, 6, 1), food)
+    add("-50.00", TransactionNature.EXPENSE, date(2024, 6, 2))
+    add("700.00", TransactionNature.INVESTMENT, date(2024, 6, 3))
+    add("-100.00", TransactionNature.TRANSFER, date(2024, 6, 4))
+    # Inserções diretas não passam pelo ledger: materializa os agregados como o backfill
+    monthly_rollup.rebuild(db, [user_id])
+    db.commit()
+    return user_id
+
+def test_year_totals_and_months(db, user_data):
+    result = summary_service.get_year_summary(db, user_data, 2024)
+
+    assert (result.totals.total_income, result.totals.total_expenses, result.totals.total_invested, result.totals.balance) == (
+        Decimal("5000.00"), Decimal("1450.00"), Decimal("700.00"), Decimal("3550.00")
+    )
+    assert [m.month for m in result.months] == list(range(1, 13))
+    assert result.months[5].total_expenses == Decimal("350.00")
+    assert result.months[2].balance == Decimal(0)
+    assert result.totals == summary_service.get_yearly_summary(db, 2024, user_id=user_data)
+    assert result.compare_to is None and result.compare_totals is None
+    assert [(c.category_name, c.total) for c in result.categories] == [
+        ("Aluguel", Decimal("1100.00")), ("Mercado", Decimal("300.00")), ("Sem Categoria", Decimal("50.00"))
+    ]
+
+def test_year_over_year_in_one_statement(db, user_data):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        result = summary_service.get_year_summary(db, user_data, 2024, compare_to=2023)
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+    assert len([s for s in statements if "monthly_rollups" in s]) == 1
+    assert result.compare_totals.total_expenses == Decimal("1200.00")
+    assert result.compare_months[11].total_expenses == Decimal("200.00")
+    deltas = {c.category_name: (c.total, c.compare_total, c.delta, c.delta_percentage) for c in result.categories}
+    assert deltas == {
+        "Aluguel": (Decimal("1100.00"), Decimal("1000.00"), Decimal("100.00"), 10.0),
+        "Mercado": (Decimal("300.00"), Decimal("200.00"), Decimal("100.00"), 50.0),
+        "Sem Categoria": (Decimal("50.00"), Decimal(0), Decimal("50.00"), None),
+    }